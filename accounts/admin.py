@@ -2,6 +2,7 @@ from django.contrib import admin
 from .models import Profile
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
+from jobs.search_backends import get_search_backend
 
 User = get_user_model()
 
@@ -11,6 +12,11 @@ class ProfileAdmin(admin.ModelAdmin):
 	list_display = ('user', 'headline')
 	search_fields = ('user__username', 'headline', 'skills')
 
+	def get_search_results(self, request, queryset, search_term):
+		if not search_term:
+			return queryset, False
+		return get_search_backend().filter_profiles(queryset, search_term), False
+
 
 try:
 	admin.site.register(User, UserAdmin)
@@ -0,0 +1,81 @@
+from django.db import OperationalError, migrations
+
+# The FTS5 table and sync triggers as of this migration (jobs.fts recreates
+# missing triggers at runtime with its own, current, copy of this DDL).
+COLUMNS = (
+    'username, first_name, last_name, headline, bio, skills, experience, '
+    'education, company, location, desired_positions, desired_companies'
+)
+
+
+def select(p, u, where):
+    return (
+        f"SELECT {p}.id, {u}.username, {u}.first_name, {u}.last_name, {p}.headline, {p}.bio, "
+        f"{p}.skills, {p}.experience, {p}.education, {p}.company, {p}.location, "
+        f"{p}.desired_positions, {p}.desired_companies FROM {where}"
+    )
+
+
+CREATE_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS accounts_profile_fts USING fts5({COLUMNS})",
+    f"""CREATE TRIGGER IF NOT EXISTS accounts_profile_fts_ai AFTER INSERT ON accounts_profile BEGIN
+        INSERT INTO accounts_profile_fts(rowid, {COLUMNS})
+        {select('new', 'u', 'auth_user u WHERE u.id = new.user_id')};
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_profile_fts_ad AFTER DELETE ON accounts_profile BEGIN
+        DELETE FROM accounts_profile_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS accounts_profile_fts_au AFTER UPDATE ON accounts_profile BEGIN
+        DELETE FROM accounts_profile_fts WHERE rowid = old.id;
+        INSERT INTO accounts_profile_fts(rowid, {COLUMNS})
+        {select('new', 'u', 'auth_user u WHERE u.id = new.user_id')};
+    END""",
+    f"INSERT INTO accounts_profile_fts(rowid, {COLUMNS}) "
+    + select('p', 'u', 'accounts_profile p JOIN auth_user u ON u.id = p.user_id'),
+]
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS accounts_profile_fts_ai",
+    "DROP TRIGGER IF EXISTS accounts_profile_fts_ad",
+    "DROP TRIGGER IF EXISTS accounts_profile_fts_au",
+    "DROP TABLE IF EXISTS accounts_profile_fts",
+]
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+        except OperationalError:
+            return False
+    return True
+
+
+def create_profile_fts(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+
+
+def drop_profile_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_profile_latitude_profile_location_profile_longitude'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_profile_fts, drop_profile_fts),
+    ]
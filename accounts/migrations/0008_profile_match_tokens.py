@@ -0,0 +1,47 @@
+import re
+
+from django.db import migrations, models
+
+# jobs.matching's tokenizer as of this migration
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset({
+    'the','and','a','an','of','to','in','for','with','on','at','by','from','as','is','are','be','this','that',
+    'it','or','we','our','you','your','their','they','he','she','his','her','them','us','i','have','has','had',
+    'will','can','may','must','should','would','could','about','over','under','into','out','up','down','new',
+    'role','job','position','responsibilities','requirements','preferred','experience','years','year'
+})
+
+
+def token_string(*texts):
+    text = ' '.join(t for t in texts if t).lower()
+    return ' '.join(sorted({t for t in TOKEN_RE.findall(text) if t not in STOPWORDS}))
+
+
+def backfill_match_tokens(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    batch = []
+    for profile in Profile.objects.only('pk', 'skills', 'experience').iterator(chunk_size=500):
+        profile.match_tokens = token_string(profile.skills, profile.experience)
+        if profile.match_tokens:
+            batch.append(profile)
+        if len(batch) >= 500:
+            Profile.objects.bulk_update(batch, ['match_tokens'])
+            batch = []
+    if batch:
+        Profile.objects.bulk_update(batch, ['match_tokens'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_profile_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='match_tokens',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_match_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(lat, lon, precision=9):
+    """jobs.geo.encode as of this migration."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, value, bits = [], 0, 0
+    for i in range(precision * 5):
+        interval, coord = (lon_range, lon) if i % 2 == 0 else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if coord >= mid:
+            value, interval[0] = value * 2 + 1, mid
+        else:
+            value, interval[1] = value * 2, mid
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            value, bits = 0, 0
+    return ''.join(chars)
+
+
+def hash_existing_coordinates(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    rows = Profile.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    objs = [Profile(pk=pk, geohash=encode(lat, lon)) for pk, lat, lon in rows.values_list('pk', 'latitude', 'longitude').iterator()]
+    Profile.objects.bulk_update(objs, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_profile_match_tokens'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['geohash', 'latitude', 'longitude'], name='profile_geohash_idx'),
+        ),
+        migrations.RunPython(hash_existing_coordinates, migrations.RunPython.noop),
+    ]
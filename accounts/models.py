@@ -1,5 +1,8 @@
 from django.conf import settings
 from django.db import models
+from django.utils.functional import cached_property
+
+from jobs import geo, matching
 
 
 class Profile(models.Model):
@@ -16,6 +19,8 @@ class Profile(models.Model):
 	location = models.CharField(max_length=255, blank=True)
 	latitude = models.FloatField(null=True, blank=True)
 	longitude = models.FloatField(null=True, blank=True)
+	# Geohash of the coordinates for spatial lookups (see jobs.geo), kept in sync by save()
+	geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
 	avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
 	# Recruiter flag and company when applicable
 	is_recruiter = models.BooleanField(default=False)
@@ -42,5 +47,33 @@ class Profile(models.Model):
 	phone_visible = models.BooleanField(default=False)
 	email_visible = models.BooleanField(default=False)
 
+	# Stopword-filtered skills + experience tokens (see jobs.matching), kept in sync by save()
+	match_tokens = models.TextField(blank=True, default='', editable=False)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["geohash", "latitude", "longitude"], name="profile_geohash_idx"),
+		]
+
+	def save(self, *args, **kwargs):
+		self.match_tokens = matching.profile_token_string(self)
+		self.geohash = geo.encode(self.latitude, self.longitude)
+		# the skills may have changed since skill_list was first read
+		self.__dict__.pop('skill_list', None)
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None:
+			update_fields = set(update_fields)
+			if {'skills', 'experience'} & update_fields:
+				update_fields.add('match_tokens')
+			if {'latitude', 'longitude'} & update_fields:
+				update_fields.add('geohash')
+			kwargs['update_fields'] = update_fields
+		super().save(*args, **kwargs)
+
+	@cached_property
+	def skill_list(self):
+		"""`skills` as a list, for templates; split once per instance."""
+		return matching.split_list(self.skills)
+
 	def __str__(self) -> str:
 		return f"Profile: {self.user.username}"
@@ -7,13 +7,14 @@ from .forms import SignUpForm
 from django.contrib.auth import login
 from django.contrib.auth.views import LoginView
 from django.urls import reverse
-from django.db.models import Q
 from django.http import HttpResponseForbidden
-import re
 from django.contrib.auth.models import User
 from django.contrib import messages
 from .emails import send_profile_message, send_direct_email
 from jobs.models import SavedProfile, Message
+from jobs.search_backends import get_search_backend
+from jobs.pagination import KeysetPage, keyset_page, capped_count
+from jobs import matching, search_cache, skills
 
 @login_required
 def message_user_view(request, pk):
@@ -191,37 +192,46 @@ def find_applicants(request):
 
 	# Unified query param
 	q = request.GET.get('q', '').strip()
+	# Optional skill filter: indexed joins through the skill taxonomy
+	skill_names = matching.split_list(request.GET.get('skills', ''))
 
-	qs = Profile.objects.filter(is_recruiter=False)
+	qs = Profile.objects.filter(is_recruiter=False).select_related('user')
+	if skill_names:
+		qs = skills.filter_profiles(qs, skill_names)
+	cursor = request.GET.get('cursor')
 
 	if q:
-		# Tokenize on commas/whitespace; require each token to match at least one field
-		tokens = [t for t in re.split(r'[,\s]+', q) if t]
-		for t in tokens:
-			qs = qs.filter(
-				Q(user__username__icontains=t) |
-				Q(user__first_name__icontains=t) |
-				Q(user__last_name__icontains=t) |
-				Q(headline__icontains=t) |
-				Q(bio__icontains=t) |
-				Q(skills__icontains=t) |
-				Q(experience__icontains=t) |
-				Q(education__icontains=t) |
-				Q(company__icontains=t) |
-				Q(location__icontains=t) |
-				Q(desired_positions__icontains=t) |
-				Q(desired_companies__icontains=t)
-			)
-
-	qs = qs.select_related('user').order_by('user__username')
-
-	for p in qs:
-		p.skill_list = [s.strip() for s in p.skills.split(",")] if p.skills else []
-		p.desired_positions_list = [s.strip() for s in p.desired_positions.split(",")] if p.desired_positions else []
+		# Every comma/whitespace separated token must match some candidate field;
+		# each page (ids, next cursor and count) is cached per normalized query
+		backend = get_search_backend()
+		base = qs
+		qs = backend.filter_profiles(qs, q)
+		scope = [f'candidates:{backend.name}', sorted(skills.normalize(n) for n in skill_names), cursor or '']
+		loaded = {}
+
+		def compute():
+			loaded['page'] = keyset_page(qs, ('user__username', 'pk'), cursor)
+			return [[p.pk for p in loaded['page']], loaded['page'].next_cursor, capped_count(qs)]
+
+		ids, next_cursor, (total_count, count_capped) = search_cache.cached_value(
+			'profiles', scope, search_cache.normalize_tokens(q), compute
+		)
+		page = loaded.get('page')
+		if page is None:
+			found = base.in_bulk(ids)
+			page = KeysetPage([found[pk] for pk in ids if pk in found], next_cursor)
+	else:
+		page = keyset_page(qs, ('user__username', 'pk'), cursor)
+		total_count, count_capped = capped_count(qs)
 
 	return render(request, 'accounts/find-candidates.html', {
-		'profiles': qs,
+		'profiles': page.object_list,
+		'page': page,
+		'cursor': cursor,
+		'total_count': total_count,
+		'count_capped': count_capped,
 		'q': q,
+		'skills': ', '.join(skill_names),
 	})
 
 class CustomLoginView(LoginView):
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Job, Application
+from .search_backends import get_search_backend
 
 
 @admin.register(Job)
@@ -7,6 +8,11 @@ class JobAdmin(admin.ModelAdmin):
 	list_display = ('title', 'company', 'location', 'posted_at')
 	search_fields = ('title', 'company', 'location')
 
+	def get_search_results(self, request, queryset, search_term):
+		if not search_term:
+			return queryset, False
+		return get_search_backend().filter_jobs(queryset, search_term), False
+
 
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
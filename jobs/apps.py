@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate, pre_migrate
+        from . import checks, signals  # noqa: F401 (checks registers itself)
+
+        pre_migrate.connect(signals.drop_fts_triggers, sender=self)
+        post_migrate.connect(signals.ensure_fts_triggers, sender=self)
@@ -0,0 +1,239 @@
+"""
+In-memory prefix index serving search-box autocomplete.
+
+Phrases (job titles, companies, locations and profile skills) live in a
+sorted list searched with bisect, so a lookup is a binary search plus a
+scan of the matching range, every match of which is ranked. Every phrase
+is also keyed from each of its words, so "eng" completes "Senior Engineer"
+too. The ranges of one- and two-letter prefixes are the long ones; their
+top MAX_LIMIT completions are kept until the index next changes.
+
+The index is process-local: it is built from the database on first use,
+patched by Job/Profile signals (jobs.signals) for saves handled by this
+process, and rebuilt in a background thread every
+AUTOCOMPLETE_REBUILD_INTERVAL seconds to pick up changes made by other
+workers, while lookups keep using the current one. Saves handled during a
+rebuild are replayed onto the new index.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+KINDS = ('title', 'company', 'location', 'skill')
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# prefixes up to this long have their top completions memoized
+MEMO_PREFIX_LENGTH = 2
+DEFAULT_REBUILD_INTERVAL = 600
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize(text):
+    return _SPACE_RE.sub(' ', (text or '').strip().lower())
+
+
+class PrefixIndex:
+    """Sorted (key, phrase) entries with a usage count per phrase."""
+
+    def __init__(self, phrases=()):
+        """An index of `phrases`, sorted once (add() keeps it sorted one phrase at a time)."""
+        self._phrases = {}  # normalized phrase -> [display text, count]
+        counts = Counter()
+        for phrase in phrases:
+            norm = normalize(phrase)
+            if norm:
+                self._phrases.setdefault(norm, [phrase.strip(), 0])
+                counts[norm] += 1
+        for norm, count in counts.items():
+            self._phrases[norm][1] = count
+        self._entries = sorted((key, norm) for norm in self._phrases for key in self._keys(norm))
+        self._memo = {}  # short prefix -> top MAX_LIMIT completions
+
+    def __len__(self):
+        return len(self._phrases)
+
+    @staticmethod
+    def _keys(norm):
+        words = norm.split(' ')
+        for i in range(len(words)):
+            yield ' '.join(words[i:])
+
+    def add(self, phrase):
+        norm = normalize(phrase)
+        if not norm:
+            return
+        self._memo.clear()
+        entry = self._phrases.get(norm)
+        if entry is not None:
+            entry[1] += 1
+            return
+        self._phrases[norm] = [phrase.strip(), 1]
+        for key in self._keys(norm):
+            insort(self._entries, (key, norm))
+
+    def discard(self, phrase):
+        norm = normalize(phrase)
+        entry = self._phrases.get(norm)
+        if entry is None:
+            return
+        self._memo.clear()
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del self._phrases[norm]
+        for key in self._keys(norm):
+            i = bisect_left(self._entries, (key, norm))
+            if i < len(self._entries) and self._entries[i] == (key, norm):
+                del self._entries[i]
+
+    def _rank(self, prefix, limit):
+        seen = set()
+        i = bisect_left(self._entries, (prefix,))
+        while i < len(self._entries):
+            key, norm = self._entries[i]
+            if not key.startswith(prefix):
+                break
+            seen.add(norm)
+            i += 1
+        best = heapq.nsmallest(limit, seen, key=lambda n: (-self._phrases[n][1], n))
+        return [tuple(self._phrases[n]) for n in best]
+
+    def complete(self, prefix, limit=DEFAULT_LIMIT):
+        """[(display text, count)] for the most used phrases matching `prefix`."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if len(prefix) > MEMO_PREFIX_LENGTH or limit > MAX_LIMIT:
+            return self._rank(prefix, limit)
+        if prefix not in self._memo:
+            self._memo[prefix] = self._rank(prefix, MAX_LIMIT)
+        return self._memo[prefix][:limit]
+
+
+def job_phrases(job):
+    return [
+        (kind, value) for kind, value in
+        (('title', job.title), ('company', job.company), ('location', job.location))
+        if value and value.strip()
+    ]
+
+
+def profile_phrases(profile):
+    if profile.is_recruiter:
+        return []
+    return [('skill', s.strip()) for s in (profile.skills or '').split(',') if s.strip()]
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # one build at a time
+        self._indexes = None
+        self._sources = {}
+        self._built_at = 0.0
+        self._pending = None  # (source, phrases) saved while a build runs
+
+    @property
+    def ready(self):
+        return self._indexes is not None
+
+    def build(self):
+        with self._build_lock:
+            self._build()
+
+    def _build(self):
+        # callers hold self._build_lock
+        from accounts.models import Profile
+        from .models import Job
+
+        with self._lock:
+            self._pending = []
+        try:
+            sources = {}
+            for job in Job.objects.only('pk', 'title', 'company', 'location').iterator():
+                sources[('job', job.pk)] = job_phrases(job)
+            for profile in Profile.objects.only('pk', 'skills', 'is_recruiter').iterator():
+                sources[('profile', profile.pk)] = profile_phrases(profile)
+            indexes = {
+                kind: PrefixIndex(value for phrases in sources.values() for k, value in phrases if k == kind)
+                for kind in KINDS
+            }
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for source, phrases in self._pending:
+                self._apply(indexes, sources, source, phrases)
+            self._pending = None
+            self._indexes, self._sources = indexes, sources
+            self._built_at = time.monotonic()
+
+    def _rebuild_in_background(self):
+        try:
+            self.build()
+        finally:
+            connection.close()
+
+    def _ensure_fresh(self):
+        if not self.ready:
+            # the first lookup has nothing to serve, so it waits for one build
+            with self._build_lock:
+                if not self.ready:
+                    self._build()
+            return
+        interval = getattr(settings, 'AUTOCOMPLETE_REBUILD_INTERVAL', DEFAULT_REBUILD_INTERVAL)
+        if time.monotonic() - self._built_at > interval and not self._build_lock.locked():
+            # bumped so later lookups don't start another rebuild meanwhile
+            self._built_at = time.monotonic()
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    @staticmethod
+    def _apply(indexes, sources, source, phrases):
+        for kind, value in sources.pop(source, []):
+            indexes[kind].discard(value)
+        if phrases:
+            sources[source] = phrases
+            for kind, value in phrases:
+                indexes[kind].add(value)
+
+    def _replace(self, source, phrases):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((source, phrases))
+            if self.ready:
+                self._apply(self._indexes, self._sources, source, phrases)
+
+    def update_job(self, job):
+        self._replace(('job', job.pk), job_phrases(job))
+
+    def remove_job(self, job):
+        self._replace(('job', job.pk), [])
+
+    def update_profile(self, profile):
+        self._replace(('profile', profile.pk), profile_phrases(profile))
+
+    def remove_profile(self, profile):
+        self._replace(('profile', profile.pk), [])
+
+    def complete(self, prefix, kinds=KINDS, limit=DEFAULT_LIMIT):
+        """Top `limit` completions for `prefix` across `kinds`, most used first."""
+        self._ensure_fresh()
+        with self._lock:
+            found = [
+                (count, text, kind)
+                for kind in kinds
+                for text, count in self._indexes[kind].complete(prefix, limit)
+            ]
+        found.sort(key=lambda r: (-r[0], r[1].lower()))
+        return [{'text': text, 'kind': kind, 'count': count} for count, text, kind in found[:limit]]
+
+
+index = AutocompleteIndex()
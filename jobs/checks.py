@@ -0,0 +1,32 @@
+"""
+System checks for the deployment settings jobs relies on.
+
+The search cache (jobs.search_cache) and the map tile versions (jobs.tiles)
+keep their version counters in the default cache. Every worker process has
+to see the same counters, or a save handled by one worker leaves the others
+serving stale results and each worker hands out its own ETags for the same
+tile. A process-local cache only works for a single-process server, so it
+fails `manage.py check --deploy` (run it as part of every deployment).
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f"The default cache ({backend}) is not shared between worker processes.",
+        hint=(
+            "Search results and map tiles are versioned in the default cache; set CACHE_BACKEND and "
+            "CACHE_LOCATION to Redis, memcached or a database cache table (see linkedout/settings.py)."
+        ),
+        id='jobs.E001',
+    )]
@@ -0,0 +1,109 @@
+"""
+Zoom-aware marker clusters for the job map.
+
+The map asks for a viewport and a zoom level (or for single tiles). The
+viewport is split into the slippy-map tiles covering it (jobs.tiles), and
+each tile is answered on its own, so panning reuses the tiles already
+computed and the payload grows with the screen, not the dataset.
+
+Below MAX_CLUSTER_ZOOM a tile is a grid of geohash cells (jobs.geo) of
+roughly a quarter of its width (precision_for_zoom), aggregated in the
+database: one GROUP BY over the (geohash, latitude, longitude) index gives
+each cell's job count, centroid and bounding box. From MAX_CLUSTER_ZOOM on
+the tile's jobs are returned one by one, at most MAX_TILE_JOBS of them.
+Clusters are not merged across tile edges.
+
+Tiles are cached per (zoom, tile, filters) under the tile's change
+version (jobs.tiles), so saving or deleting a job invalidates only the
+tiles it was or is in.
+"""
+from math import ceil
+
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import Substr
+
+from . import geo, tiles
+
+MAX_ZOOM = tiles.MAX_ZOOM
+MAX_CLUSTER_ZOOM = 15
+MAX_TILE_JOBS = 500
+# a viewport needing more tiles than this is refused (two 1920x1080 screens need ~80)
+MAX_VIEWPORT_TILES = 128
+
+
+def precision_for_zoom(zoom):
+    """Geohash length whose cells are about a quarter of a tile wide at `zoom`."""
+    # a geohash of length p has ceil(5p / 2) longitude bits; a tile is 2**-zoom of the globe
+    for precision in range(1, geo.GEOHASH_PRECISION):
+        if ceil(5 * precision / 2) >= zoom + 2:
+            return precision
+    return geo.GEOHASH_PRECISION
+
+
+def tile_clusters(queryset, zoom, x, y):
+    """
+    {'clusters': [...]} for one tile of `queryset` (Jobs with coordinates),
+    or {'jobs': [...], 'truncated': bool} from MAX_CLUSTER_ZOOM on.
+    """
+    qs = tiles.in_tile(queryset, zoom, x, y)
+    if zoom >= MAX_CLUSTER_ZOOM:
+        rows = list(
+            qs.order_by('pk').values('pk', 'title', 'company', 'location', 'latitude', 'longitude')[:MAX_TILE_JOBS + 1]
+        )
+        return {
+            'jobs': [{
+                'id': row['pk'],
+                'title': row['title'],
+                'company': row['company'],
+                'location': row['location'],
+                'lat': row['latitude'],
+                'lon': row['longitude'],
+            } for row in rows[:MAX_TILE_JOBS]],
+            'truncated': len(rows) > MAX_TILE_JOBS,
+        }
+    cells = (
+        qs.order_by()
+        .values(cell=Substr('geohash', 1, precision_for_zoom(zoom)))
+        .annotate(
+            count=Count('pk'), lat=Avg('latitude'), lon=Avg('longitude'),
+            west=Min('longitude'), south=Min('latitude'), east=Max('longitude'), north=Max('latitude'),
+        )
+        .order_by('cell')
+    )
+    return {'clusters': [{
+        'lat': cell['lat'],
+        'lon': cell['lon'],
+        'count': cell['count'],
+        'bbox': [cell['west'], cell['south'], cell['east'], cell['north']],
+    } for cell in cells]}
+
+
+def cached_tile(queryset, zoom, x, y, filters='', q=''):
+    """
+    tile_clusters() through the tile cache (jobs.tiles). `filters` and `q`
+    must identify how `queryset` was narrowed (see JobSearchFilterForm.cache_scope).
+    """
+    return tiles.cached('jobs', zoom, x, y, scope(filters, q), lambda: tile_clusters(queryset, zoom, x, y))
+
+
+def scope(filters='', q=''):
+    """Cache scope / ETag variant of a tile for the given filters and text query."""
+    return f'{filters}\x1f{q}'
+
+
+def viewport(queryset, west, south, east, north, zoom, filters='', q=''):
+    """
+    Clusters (or jobs, at high zoom) of every tile covering the box, as one
+    {'zoom', 'clusters', 'jobs', 'truncated'} dict. Raises ValueError when
+    the box needs more than MAX_VIEWPORT_TILES tiles at this zoom.
+    """
+    covering = tiles.viewport_tiles(west, south, east, north, zoom)
+    if len(covering) > MAX_VIEWPORT_TILES:
+        raise ValueError(f"Viewport needs {len(covering)} tiles at zoom {zoom}")
+    result = {'zoom': zoom, 'clusters': [], 'jobs': [], 'truncated': False}
+    for x, y in covering:
+        tile = cached_tile(queryset, zoom, x, y, filters, q)
+        result['clusters'].extend(tile.get('clusters', ()))
+        result['jobs'].extend(tile.get('jobs', ()))
+        result['truncated'] = result['truncated'] or tile.get('truncated', False)
+    return result
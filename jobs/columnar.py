@@ -0,0 +1,88 @@
+"""
+Compact, column-oriented encoding of map marker lists.
+
+The map endpoints return lists of dicts, which repeat every key for every
+marker. Clients may opt in to a columnar form instead, with ?format= or the
+Accept header:
+
+    rows         [{"id": 1, "lat": 40.7, ...}, ...]  (default)
+    columns      {"format": "columns", "count": n,
+                  "columns": {"id": [1, ...], "lat": [40.7, ...], ...}}
+    columns-f32  as columns, but lat/lon leave "columns" for "coords": a
+                 base64 buffer of little-endian float32 (lat, lon) pairs,
+                 NaN where a marker has no coordinates (float32 keeps them
+                 to within about 2 m)
+
+The list keeps its key in the response ("jobs", "applications"), so other
+fields (e.g. "truncated") are unchanged. interactive_map.html decodes both
+columnar forms (decodeMarkers); `manage.py benchmark_marker_formats`
+measures their size and encoding time.
+"""
+import base64
+import sys
+from array import array
+
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from . import streaming
+
+FORMATS = ('rows', 'columns', 'columns-f32')
+MEDIA_TYPES = {
+    'columns': 'application/vnd.linkedout.columns+json',
+    'columns-f32': 'application/vnd.linkedout.columns-f32+json',
+}
+NAN = float('nan')
+
+
+def requested_format(request):
+    """(format, content type) asked for by ?format= or, failing that, the Accept header."""
+    fmt = request.GET.get('format')
+    if fmt in FORMATS:
+        return fmt, 'application/json'
+    accept = request.headers.get('Accept', '')
+    # the more specific type first: one is a prefix of the other
+    for fmt in ('columns-f32', 'columns'):
+        if MEDIA_TYPES[fmt] in accept:
+            return fmt, MEDIA_TYPES[fmt]
+    return 'rows', 'application/json'
+
+
+def pack_coords(lats, lons):
+    """Base64 of little-endian float32 (lat, lon) pairs; None becomes NaN."""
+    packed = array('f', [NAN if v is None else v for pair in zip(lats, lons) for v in pair])
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def encode(rows, fmt, lat_key='lat', lon_key='lon'):
+    """`rows` (dicts sharing their keys) in format `fmt`."""
+    if fmt == 'rows':
+        return rows
+    keys = list(rows[0]) if rows else []
+    if fmt == 'columns-f32':
+        coords = pack_coords([row[lat_key] for row in rows], [row[lon_key] for row in rows])
+        keys = [key for key in keys if key not in (lat_key, lon_key)]
+    result = {'format': fmt, 'count': len(rows), 'columns': {key: [row[key] for row in rows] for key in keys}}
+    if fmt == 'columns-f32':
+        result['coords'] = coords
+    return result
+
+
+def marker_response(request, key, rows, **extra):
+    """
+    Response of {key: rows, **extra}, with `rows` (an iterable) in the
+    requested format. The row format is streamed (jobs.streaming); the
+    columnar ones need every row first. Callable `extra` values are called
+    after the rows are consumed.
+    """
+    fmt, content_type = requested_format(request)
+    if fmt == 'rows':
+        response = streaming.json_response(key, rows, **extra)
+    else:
+        rows = list(rows)
+        extra = {name: value() if callable(value) else value for name, value in extra.items()}
+        response = JsonResponse({key: encode(rows, fmt), **extra}, content_type=content_type)
+    patch_vary_headers(response, ('Accept',))
+    return response
@@ -0,0 +1,81 @@
+"""
+Facet counts (companies, locations, visa sponsorship, salary bands) for a
+set of jobs, computed in a single SQL statement: one GROUP BY per facet,
+glued together with UNION ALL, so the database returns only the grouped
+counts rather than every matching row. Company and location groups are
+ranked with ROW_NUMBER() inside their subquery and cut to the top N there,
+since a compound statement cannot carry a per-part ORDER BY/LIMIT on SQLite.
+"""
+from django.db.models import Case, CharField, Count, F, Value, When, Window
+from django.db.models.functions import Coalesce, Lower, RowNumber
+
+from .models import Job
+
+TOP_N = 8
+
+# (key, label, lower bound inclusive, upper bound exclusive), applied to the
+# top of each job's salary range (salary_max, else salary_min)
+SALARY_BANDS = [
+    ('under_50k', 'Under $50k', None, 50000),
+    ('50k_100k', '$50k – $100k', 50000, 100000),
+    ('100k_150k', '$100k – $150k', 100000, 150000),
+    ('150k_plus', '$150k+', 150000, None),
+]
+
+
+def _band_case():
+    salary = Coalesce('salary_max', 'salary_min')
+    whens = []
+    for key, _, low, high in SALARY_BANDS:
+        cond = {}
+        if low is not None:
+            cond['salary_top__gte'] = low
+        if high is not None:
+            cond['salary_top__lt'] = high
+        whens.append(When(**cond, then=Value(key)))
+    return salary, Case(*whens, default=Value(''), output_field=CharField())
+
+
+def _grouped(queryset, facet, value, top_n=None):
+    grouped = queryset.values(facet=Value(facet, output_field=CharField()), value=value).annotate(n=Count('pk'))
+    if top_n is not None:
+        grouped = grouped.annotate(
+            rank=Window(RowNumber(), order_by=[F('n').desc(), Lower('value')]),
+        ).filter(rank__lte=top_n)
+    return grouped.values_list('facet', 'value', 'n')
+
+
+def compute_facets(queryset, top_n=TOP_N):
+    """
+    {'company': [(value, count), ...], 'location': [...], 'visa': {...},
+    'salary': [(key, label, count), ...]} for the jobs in `queryset`.
+    """
+    base = queryset.order_by()
+    salary_top, band = _band_case()
+    parts = _grouped(base.exclude(company=''), 'company', F('company'), top_n).union(
+        _grouped(base.exclude(location=''), 'location', F('location'), top_n),
+        _grouped(base, 'visa', F('visa_sponsorship')),
+        _grouped(
+            base.alias(salary_top=salary_top).filter(salary_top__isnull=False).alias(band=band),
+            'salary', F('band'),
+        ),
+        all=True,
+    )
+
+    grouped = {'company': [], 'location': [], 'visa': {}, 'salary': {}}
+    for facet, value, n in parts:
+        if facet in ('company', 'location'):
+            grouped[facet].append((value, n))
+        else:
+            grouped[facet][value] = n
+
+    def top(rows):
+        return sorted(rows, key=lambda r: (-r[1], r[0].lower()))[:top_n]
+
+    visa_labels = dict(Job.VISA_CHOICES)
+    return {
+        'company': top(grouped['company']),
+        'location': top(grouped['location']),
+        'visa': [(key, visa_labels[key], grouped['visa'].get(key, 0)) for key in visa_labels],
+        'salary': [(key, label, grouped['salary'].get(key, 0)) for key, label, _, _ in SALARY_BANDS],
+    }
@@ -1,5 +1,10 @@
+from datetime import timedelta
+
 from django import forms
+from django.db.models import Q
+from django.utils import timezone
 from .models import Job
+from . import matching, skills
 
 
 class JobPostForm(forms.ModelForm):
@@ -20,3 +25,49 @@ class JobPostForm(forms.ModelForm):
         if smin is not None and smax is not None and smin > smax:
             raise forms.ValidationError('Minimum salary cannot be greater than maximum salary')
         return cleaned
+
+
+class JobSearchFilterForm(forms.Form):
+    """Structured filters for job search and the map API (all optional, from GET)."""
+    salary_min = forms.IntegerField(required=False, min_value=0)
+    salary_max = forms.IntegerField(required=False, min_value=0)
+    visa = forms.ChoiceField(required=False, choices=[('', 'Any'), ('sponsor', 'Sponsorship available')])
+    posted_within = forms.TypedChoiceField(
+        required=False, coerce=int, empty_value=None,
+        choices=[('', 'Any time'), (1, 'Past 24 hours'), (7, 'Past week'), (30, 'Past month')],
+    )
+    # comma-separated; matched through the skill taxonomy (jobs.skills)
+    skills = forms.CharField(required=False, max_length=200)
+
+    def active_filters(self):
+        """Cleaned values of the filters that were given and valid."""
+        if not self.is_bound:
+            return {}
+        self.is_valid()
+        return {k: v for k, v in self.cleaned_data.items() if v not in (None, '')}
+
+    def filter(self, queryset):
+        f = self.active_filters()
+        # Salary: keep jobs whose [salary_min, salary_max] range overlaps the
+        # requested one; a job with a single bound is treated as that point.
+        if 'salary_min' in f:
+            queryset = queryset.filter(
+                Q(salary_max__gte=f['salary_min']) |
+                Q(salary_max__isnull=True, salary_min__gte=f['salary_min'])
+            )
+        if 'salary_max' in f:
+            queryset = queryset.filter(
+                Q(salary_min__lte=f['salary_max']) |
+                Q(salary_min__isnull=True, salary_max__lte=f['salary_max'])
+            )
+        if f.get('visa') == 'sponsor':
+            queryset = queryset.filter(visa_sponsorship='sponsor')
+        if 'posted_within' in f:
+            queryset = queryset.filter(posted_at__gte=timezone.now() - timedelta(days=f['posted_within']))
+        if f.get('skills'):
+            queryset = skills.filter_jobs(queryset, matching.split_list(f['skills']))
+        return queryset
+
+    def cache_scope(self):
+        """Stable string identifying the active filters, for cache keys (which hash it)."""
+        return ';'.join(f'{k}={v}' for k, v in sorted(self.active_filters().items()))
@@ -0,0 +1,188 @@
+"""
+DDL for the SQLite FTS5 tables used by search_backends.FTS5Backend.
+
+jobs_job_fts is an external-content table over jobs_job; accounts_profile_fts
+is a standalone table because a profile's searchable text also includes the
+user's name. Both are kept in sync by triggers (plus a signal for user name
+changes). Django rebuilds SQLite tables for some schema changes, which the
+triggers would get in the way of, so they are dropped before a migrate run
+that alters one of the tables they read (SOURCE_MODELS) and restored, with
+a resync, afterwards (see jobs.signals). Other migrate runs, including
+no-op ones, leave the triggers and the index alone.
+
+The migrations creating the tables (jobs 0005, accounts 0007) carry their
+own copy of this DDL, so later changes here don't alter what they did.
+"""
+from django.db import OperationalError
+
+JOB_FTS_TABLE = 'jobs_job_fts'
+PROFILE_FTS_TABLE = 'accounts_profile_fts'
+
+_JOB_COLUMNS = 'title, company, description, location'
+_JOB_NEW = 'new.id, new.title, new.company, new.description, new.location'
+_JOB_OLD = "'delete', old.id, old.title, old.company, old.description, old.location"
+
+JOB_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {JOB_FTS_TABLE} USING fts5("
+    f"{_JOB_COLUMNS}, content='jobs_job', content_rowid='id')"
+)
+JOB_TRIGGERS_SQL = [
+    f"""CREATE TRIGGER IF NOT EXISTS {JOB_FTS_TABLE}_ai AFTER INSERT ON jobs_job BEGIN
+        INSERT INTO {JOB_FTS_TABLE}(rowid, {_JOB_COLUMNS}) VALUES ({_JOB_NEW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {JOB_FTS_TABLE}_ad AFTER DELETE ON jobs_job BEGIN
+        INSERT INTO {JOB_FTS_TABLE}({JOB_FTS_TABLE}, rowid, {_JOB_COLUMNS}) VALUES ({_JOB_OLD});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {JOB_FTS_TABLE}_au AFTER UPDATE OF {_JOB_COLUMNS} ON jobs_job BEGIN
+        INSERT INTO {JOB_FTS_TABLE}({JOB_FTS_TABLE}, rowid, {_JOB_COLUMNS}) VALUES ({_JOB_OLD});
+        INSERT INTO {JOB_FTS_TABLE}(rowid, {_JOB_COLUMNS}) VALUES ({_JOB_NEW});
+    END""",
+]
+JOB_REBUILD_SQL = f"INSERT INTO {JOB_FTS_TABLE}({JOB_FTS_TABLE}) VALUES ('rebuild')"
+
+_PROFILE_COLUMNS = (
+    'username, first_name, last_name, headline, bio, skills, experience, '
+    'education, company, location, desired_positions, desired_companies'
+)
+
+
+def _profile_select(p, u, where):
+    return (
+        f"SELECT {p}.id, {u}.username, {u}.first_name, {u}.last_name, {p}.headline, {p}.bio, "
+        f"{p}.skills, {p}.experience, {p}.education, {p}.company, {p}.location, "
+        f"{p}.desired_positions, {p}.desired_companies FROM {where}"
+    )
+
+
+PROFILE_TABLE_SQL = f"CREATE VIRTUAL TABLE IF NOT EXISTS {PROFILE_FTS_TABLE} USING fts5({_PROFILE_COLUMNS})"
+PROFILE_TRIGGERS_SQL = [
+    f"""CREATE TRIGGER IF NOT EXISTS {PROFILE_FTS_TABLE}_ai AFTER INSERT ON accounts_profile BEGIN
+        INSERT INTO {PROFILE_FTS_TABLE}(rowid, {_PROFILE_COLUMNS})
+        {_profile_select('new', 'u', 'auth_user u WHERE u.id = new.user_id')};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {PROFILE_FTS_TABLE}_ad AFTER DELETE ON accounts_profile BEGIN
+        DELETE FROM {PROFILE_FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {PROFILE_FTS_TABLE}_au AFTER UPDATE ON accounts_profile BEGIN
+        DELETE FROM {PROFILE_FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {PROFILE_FTS_TABLE}(rowid, {_PROFILE_COLUMNS})
+        {_profile_select('new', 'u', 'auth_user u WHERE u.id = new.user_id')};
+    END""",
+]
+PROFILE_REBUILD_SQL = [
+    f"DELETE FROM {PROFILE_FTS_TABLE}",
+    f"INSERT INTO {PROFILE_FTS_TABLE}(rowid, {_PROFILE_COLUMNS}) "
+    + _profile_select('p', 'u', 'accounts_profile p JOIN auth_user u ON u.id = p.user_id'),
+]
+# Name changes on auth_user are synced from a User post_save signal rather than
+# a trigger: a trigger on auth_user naming accounts_profile makes SQLite refuse
+# the table rebuilds Django performs on accounts_profile.
+PROFILE_USER_SYNC_SQL = [
+    f"DELETE FROM {PROFILE_FTS_TABLE} WHERE rowid IN (SELECT id FROM accounts_profile WHERE user_id = %s)",
+    f"INSERT INTO {PROFILE_FTS_TABLE}(rowid, {_PROFILE_COLUMNS}) "
+    + _profile_select('p', 'u', 'accounts_profile p JOIN auth_user u ON u.id = p.user_id WHERE p.user_id = %s'),
+]
+
+# (app label, model) of the tables the triggers read
+SOURCE_MODELS = {('jobs', 'job'), ('accounts', 'profile'), ('auth', 'user')}
+
+FTS_TABLES = {
+    JOB_FTS_TABLE: (JOB_TABLE_SQL, JOB_TRIGGERS_SQL, [JOB_REBUILD_SQL]),
+    PROFILE_FTS_TABLE: (PROFILE_TABLE_SQL, PROFILE_TRIGGERS_SQL, PROFILE_REBUILD_SQL),
+}
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+        except OperationalError:
+            return False
+    return True
+
+
+def _trigger_names(cursor, table):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f'{table}_%'])
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_fts(connection, table):
+    """Create an FTS table with its triggers and fill it from the source rows."""
+    if not fts5_available(connection):
+        return
+    table_sql, triggers_sql, rebuild_sql = FTS_TABLES[table]
+    with connection.cursor() as cursor:
+        cursor.execute(table_sql)
+        for sql in triggers_sql:
+            cursor.execute(sql)
+        for sql in rebuild_sql:
+            cursor.execute(sql)
+
+
+def drop_fts(connection, table):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in _trigger_names(cursor, table):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _table_exists(cursor, table):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [table])
+    return cursor.fetchone() is not None
+
+
+def alters_sources(plan):
+    """Whether a migration plan [(migration, backwards)] changes a table the triggers read."""
+    for migration, _ in plan or ():
+        for operation in migration.operations:
+            model = getattr(operation, 'model_name', None) or getattr(operation, 'name', None)
+            if isinstance(model, str) and (migration.app_label, model.lower()) in SOURCE_MODELS:
+                return True
+    return False
+
+
+def drop_fts_triggers(connection, plan=None):
+    """
+    Remove the sync triggers for the duration of a migrate run whose `plan`
+    alters a table they read. SQLite rejects renaming a rebuilt table while
+    a trigger elsewhere refers to it, and rebuilt tables lose their triggers
+    anyway; ensure_fts restores them.
+    """
+    if connection.vendor != 'sqlite' or not alters_sources(plan):
+        return
+    with connection.cursor() as cursor:
+        for table in FTS_TABLES:
+            for name in _trigger_names(cursor, table):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def ensure_fts(connection):
+    """Recreate missing triggers and resync the affected index from its source rows."""
+    if connection.vendor != 'sqlite':
+        return
+    for table, (_, triggers_sql, rebuild_sql) in FTS_TABLES.items():
+        with connection.cursor() as cursor:
+            if not _table_exists(cursor, table):
+                continue
+            if len(_trigger_names(cursor, table)) == len(triggers_sql):
+                continue
+            for sql in triggers_sql:
+                cursor.execute(sql)
+            for sql in rebuild_sql:
+                cursor.execute(sql)
+
+
+def sync_profile_user(connection, user_id):
+    """Refresh the FTS rows of a user's profile after their name changed."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if not _table_exists(cursor, PROFILE_FTS_TABLE):
+            return
+        for sql in PROFILE_USER_SYNC_SQL:
+            cursor.execute(sql, [user_id])
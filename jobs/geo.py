@@ -0,0 +1,219 @@
+"""
+Great-circle distance and spatial queries over latitude/longitude columns.
+
+Job, Profile and Application store a geohash of their coordinates next to
+them (GEOHASH_PRECISION characters, about 5 m across), set on save. A
+geohash names a cell of a fixed grid, and every cell inside another shares
+its prefix, so "rows in this cell" is one index range scan
+(prefix <= geohash < prefix + '{'; '{' sorts after every geohash digit).
+
+Area queries are resolved into a few cells first. A viewport (a bounding
+box) is covered by at most MAX_COVER_CELLS cells of the finest precision
+that allows it, and a radius search covers the bounding box of its circle.
+Only rows in those cells are read, as range scans on the (geohash,
+latitude, longitude) index. The exact box bounds and the haversine
+distance are then checked against the index entries, so only the rows
+returned are loaded as model instances.
+
+Bounding boxes of circles follow Matuschek, "Finding Points Within a
+Distance of a Latitude/Longitude Using Bounding Coordinates": a box crossing
+the antimeridian becomes two longitude ranges, and a circle containing a
+pole covers every longitude.
+
+Batches of distances are computed in one NumPy pass (haversine_array),
+as are the radius filter, sort and rounding over them (rank_by_distance,
+round_miles); NumPy is optional and the same functions fall back to the
+scalar formula.
+
+This module must not import models: accounts.models uses it.
+"""
+import heapq
+from math import asin, ceil, cos, degrees, floor, pi, radians, sin, sqrt
+
+from django.db.models import Q
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_MILES = 3958.8
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+# sorts after every geohash character: [prefix, prefix + PREFIX_END) is a cell
+PREFIX_END = '{'
+MAX_COVER_CELLS = 64
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles between two points given in degrees."""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * asin(min(1.0, sqrt(a)))
+
+
+def haversine_array(lat1, lon1, lat2, lon2):
+    """
+    haversine() over arrays (NumPy broadcasting, so one side may be a
+    single point): an array of distances in miles, or a list without NumPy.
+    """
+    if np is None:
+        if all(isinstance(v, (int, float)) for v in (lat1, lon1)):
+            return [haversine(lat1, lon1, a, b) for a, b in zip(lat2, lon2)]
+        return [haversine(*args) for args in zip(lat1, lon1, lat2, lon2)]
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def rank_by_distance(lat, lon, ids, lats, lons, radius=None, limit=None):
+    """
+    [(distance in miles, id)] for the points (ids, lats, lons) within
+    `radius` miles of (lat, lon), nearest first (ties by id), at most `limit`.
+    """
+    if np is None:
+        found = [(d, pk) for d, pk in zip(haversine_array(lat, lon, lats, lons), ids) if radius is None or d <= radius]
+        return sorted(found) if limit is None else heapq.nsmallest(limit, found)
+    ids = np.asarray(ids, dtype=np.int64)
+    distances = haversine_array(lat, lon, lats, lons)
+    if radius is not None:
+        keep = distances <= radius
+        ids, distances = ids[keep], distances[keep]
+    if limit is not None and limit < len(ids):
+        # everything up to the limit-th distance, ties included; the sort below cuts exactly
+        cutoff = np.partition(distances, limit - 1)[limit - 1] if limit > 0 else -1.0
+        keep = distances <= cutoff
+        ids, distances = ids[keep], distances[keep]
+    order = np.lexsort((ids, distances))[:limit]
+    return list(zip(distances[order].tolist(), ids[order].tolist()))
+
+
+def round_miles(distances, digits=2):
+    """Distances rounded for display, as a list of floats."""
+    if np is None:
+        return [round(d, digits) for d in distances]
+    return np.round(np.asarray(distances, dtype=np.float64), digits).tolist()
+
+
+def encode(lat, lon, precision=GEOHASH_PRECISION):
+    """Geohash of a point, or '' when either coordinate is missing."""
+    if lat is None or lon is None:
+        return ''
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, value, bits = [], 0, 0
+    for i in range(precision * 5):
+        # bits alternate longitude, latitude, starting with longitude
+        interval, coord = (lon_range, lon) if i % 2 == 0 else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if coord >= mid:
+            value, interval[0] = value * 2 + 1, mid
+        else:
+            value, interval[1] = value * 2, mid
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            value, bits = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell."""
+    lon_bits = ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def cover(west, south, east, north, max_cells=MAX_COVER_CELLS):
+    """
+    Geohash prefixes of the cells covering a box (west <= east), using the
+    finest precision needing at most `max_cells` cells (one-character cells
+    when none does).
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = range(floor((south + 90) / height), min(floor((north + 90) / height), round(180 / height) - 1) + 1)
+        cols = range(floor((west + 180) / width), min(floor((east + 180) / width), round(360 / width) - 1) + 1)
+        if len(rows) * len(cols) <= max_cells:
+            break
+    return [
+        encode(-90 + (row + 0.5) * height, -180 + (col + 0.5) * width, precision)
+        for row in rows for col in cols
+    ]
+
+
+def cells_q(field, cells):
+    """Q matching rows whose `field` geohash lies in one of `cells`."""
+    cond = Q()
+    for cell in cells:
+        cond |= Q(**{f'{field}__gte': cell, f'{field}__lt': cell + PREFIX_END})
+    return cond
+
+
+def bounding_box(lat, lon, radius):
+    """
+    (min_lat, max_lat, [(min_lon, max_lon), ...]) in degrees covering every
+    point within `radius` miles of (lat, lon).
+    """
+    angle = radius / EARTH_RADIUS_MILES
+    lat_r, lon_r = radians(lat), radians(lon)
+    min_lat, max_lat = lat_r - angle, lat_r + angle
+    if angle >= pi or min_lat <= -pi / 2 or max_lat >= pi / 2:
+        # the circle contains a pole (or the whole globe)
+        return degrees(max(min_lat, -pi / 2)), degrees(min(max_lat, pi / 2)), [(-180.0, 180.0)]
+    delta = asin(min(1.0, sin(angle) / cos(lat_r)))
+    min_lon, max_lon = lon_r - delta, lon_r + delta
+    if min_lon < -pi:
+        ranges = [(min_lon + 2 * pi, pi), (-pi, max_lon)]
+    elif max_lon > pi:
+        ranges = [(min_lon, pi), (-pi, max_lon - 2 * pi)]
+    else:
+        ranges = [(min_lon, max_lon)]
+    return degrees(min_lat), degrees(max_lat), [(degrees(lo), degrees(hi)) for lo, hi in ranges]
+
+
+def parse_bbox(value):
+    """
+    (west, south, east, north) from a "west,south,east,north" string (as
+    Leaflet's LatLngBounds.toBBoxString() gives it). Raises ValueError.
+    """
+    west, south, east, north = (float(v) for v in value.split(','))
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError(f"Invalid bounding box {value!r}")
+    return west, south, east, north
+
+
+def _within(queryset, min_lat, max_lat, lon_ranges, hash_field, lat_field, lon_field):
+    cells = [cell for lo, hi in lon_ranges for cell in cover(lo, min_lat, hi, max_lat)]
+    lon_cond = Q()
+    for lo, hi in lon_ranges:
+        lon_cond |= Q(**{f'{lon_field}__range': (lo, hi)})
+    return queryset.filter(cells_q(hash_field, cells)).filter(lon_cond, **{f'{lat_field}__range': (min_lat, max_lat)})
+
+
+def within_viewport(queryset, west, south, east, north,
+                    hash_field='geohash', lat_field='latitude', lon_field='longitude'):
+    """Narrow `queryset` to the rows inside a box; west > east crosses the antimeridian."""
+    lon_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+    return _within(queryset, south, north, lon_ranges, hash_field, lat_field, lon_field)
+
+
+def within_box(queryset, lat, lon, radius,
+               hash_field='geohash', lat_field='latitude', lon_field='longitude'):
+    """Narrow `queryset` to the rows inside the bounding box of a circle."""
+    min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius)
+    return _within(queryset, min_lat, max_lat, lon_ranges, hash_field, lat_field, lon_field)
+
+
+def nearby(queryset, lat, lon, radius, limit=None,
+           hash_field='geohash', lat_field='latitude', lon_field='longitude'):
+    """
+    [(distance in miles, obj)] for the rows of `queryset` within `radius`
+    miles of (lat, lon), nearest first (ties by pk), at most `limit` of them.
+    """
+    rows = list(within_box(queryset, lat, lon, radius, hash_field, lat_field, lon_field).values_list(
+        'pk', lat_field, lon_field
+    ))
+    ids, lats, lons = zip(*rows) if rows else ((), (), ())
+    best = rank_by_distance(lat, lon, ids, lats, lons, radius, limit)
+    objs = queryset.in_bulk([pk for _, pk in best])
+    return [(distance, objs[pk]) for distance, pk in best if pk in objs]
@@ -0,0 +1,261 @@
+"""
+Offline geocoding of free-text locations ("Austin, TX", "10001", an
+address), used when a form arrives with a location but no coordinates.
+
+Locations are resolved from a gazetteer file (settings.GEOCODER_GAZETTEER,
+by default the small one bundled in jobs/data; `manage.py build_gazetteer`
+writes a full one from GeoNames postal codes). It is loaded once per
+process into sorted arrays searched by bisection:
+
+- postcodes: 5-digit US ZIP codes (a ZIP+4 uses its first five digits)
+- places: normalized "name\\tREGION" keys, and the bare names for inputs
+  without a state (the first place of that name in the file wins)
+
+Names are normalized the same way on both sides (lowercase, accents and
+punctuation dropped, "St"/"Ft"/"Mt" spelled out), so "st. louis, mo" finds
+"St. Louis". A lookup takes microseconds and never leaves the process.
+
+A ZIP code is only taken from the end of the input ("Springfield, IL
+62701"), so a house number is never read as one, and a "City, ST" match
+wins over it.
+
+Inputs the gazetteer cannot resolve are left without coordinates unless
+a fallback geocoder is opted into (settings.GEOCODER_FALLBACK, a dotted
+path such as NominatimGeocoder; empty by default, since it is called while
+the request waits). Fallback answers (and misses) are cached, and calls
+are bounded by settings.GEOCODER_TIMEOUT. A fallback that cannot be
+reached raises GeocoderUnavailable and the location is left without
+coordinates.
+"""
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+import urllib.parse
+import urllib.request
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+DEFAULT_GAZETTEER = Path(__file__).resolve().parent / 'data' / 'gazetteer.tsv'
+DEFAULT_TIMEOUT = 3
+# seconds a fallback answer (or the lack of one) is cached
+FALLBACK_CACHE_TIMEOUT = 60 * 60 * 24
+
+STATES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
+    'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'DC': 'District of Columbia',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois',
+    'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana',
+    'ME': 'Maine', 'MD': 'Maryland', 'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota',
+    'MS': 'Mississippi', 'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma', 'OR': 'Oregon',
+    'PA': 'Pennsylvania', 'PR': 'Puerto Rico', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont',
+    'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
+}
+COUNTRY_NAMES = {'us', 'usa', 'u s', 'u s a', 'united states', 'united states of america'}
+ABBREVIATIONS = {'st': 'saint', 'ste': 'sainte', 'ft': 'fort', 'mt': 'mount'}
+POSTCODE_RE = re.compile(r'(?<!\d)(\d{5})(?:-\d{4})?(?!\d)')
+TRAILING_POSTCODE_RE = re.compile(r'(?<![\d-])(\d{5})(?:-\d{4})?$')
+
+
+class GeocoderUnavailable(Exception):
+    """The fallback geocoder could not be reached or gave an unusable answer."""
+
+
+def normalize(name):
+    """Lookup key for a place name ('' when nothing is left)."""
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode().lower()
+    words = re.sub(r'[^a-z0-9]+', ' ', text).split()
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+def _region_codes():
+    codes = {normalize(code): code for code in STATES}
+    codes.update((normalize(name), code) for code, name in STATES.items())
+    return codes
+
+
+REGION_CODES = _region_codes()
+
+
+class Gazetteer:
+    def __init__(self, places=(), postcodes=()):
+        """
+        `places` are (name, region, lat, lon) in order of preference,
+        `postcodes` (5-digit code, lat, lon).
+        """
+        keyed, names = {}, {}
+        for name, region, lat, lon in places:
+            name = normalize(name)
+            if name:
+                keyed.setdefault(f'{name}\t{region.upper()}', (lat, lon))
+                names.setdefault(name, (lat, lon))
+        self._place_keys, self._place_coords = self._pack(keyed)
+        self._name_keys, self._name_coords = self._pack(names)
+        by_code = {}
+        for code, lat, lon in postcodes:
+            by_code.setdefault(int(code), (lat, lon))
+        codes = sorted(by_code)
+        self._postcodes = array('i', codes)
+        self._postcode_coords = array('d', [v for code in codes for v in by_code[code]])
+
+    @staticmethod
+    def _pack(mapping):
+        keys = sorted(mapping)
+        return keys, array('d', [v for key in keys for v in mapping[key]])
+
+    @classmethod
+    def from_file(cls, path):
+        """Read a gazetteer file: tab-separated kind, name, region, lat, lon."""
+        places, postcodes = [], []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip() or line.startswith('#'):
+                    continue
+                kind, name, region, lat, lon = line.rstrip('\n').split('\t')
+                if kind == 'postcode':
+                    postcodes.append((name, float(lat), float(lon)))
+                else:
+                    places.append((name, region, float(lat), float(lon)))
+        return cls(places, postcodes)
+
+    def __len__(self):
+        return len(self._place_keys) + len(self._postcodes)
+
+    @staticmethod
+    def _find(keys, coords, key):
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return coords[2 * i], coords[2 * i + 1]
+        return None
+
+    def postcode(self, code):
+        """(lat, lon) of a 5-digit ZIP code, or None."""
+        return self._find(self._postcodes, self._postcode_coords, int(code))
+
+    def place(self, name, region=None):
+        """(lat, lon) of a place, in `region` (a state code) if given, or None."""
+        name = normalize(name)
+        if region:
+            return self._find(self._place_keys, self._place_coords, f'{name}\t{region.upper()}')
+        return self._find(self._name_keys, self._name_coords, name)
+
+    def lookup(self, query):
+        """(lat, lon) for "City, ST", a ZIP code or an address ending in either, or None."""
+        raw = [part.strip() for part in (query or '').split(',')]
+        raw = [part for part in raw if normalize(part)]
+        while raw and normalize(raw[-1]) in COUNTRY_NAMES:
+            raw.pop()
+        if not raw:
+            return None
+        # only a ZIP that ends the address counts ("..., IL 62701", "10001");
+        # a leading house number ("12345 Main St") is not one
+        match = TRAILING_POSTCODE_RE.search(raw[-1])
+        code = match.group(1) if match else None
+        parts = [normalize(POSTCODE_RE.sub(' ', part)) for part in raw]
+        parts = [part for part in parts if part]
+        candidates = []
+        # "..., City, ST" / "..., City, State"
+        if len(parts) >= 2 and parts[-1] in REGION_CODES:
+            candidates.append((parts[-2], REGION_CODES[parts[-1]]))
+        # "City ST" / "City State"
+        words = parts[-1].split() if parts else []
+        if len(words) >= 2 and words[-1] in REGION_CODES:
+            candidates.append((' '.join(words[:-1]), REGION_CODES[words[-1]]))
+        for name, region in candidates:
+            found = self.place(name, region)
+            if found:
+                return found
+        if code:
+            found = self.postcode(code)
+            if found:
+                return found
+        return self.place(parts[-1]) if parts else None
+
+
+class NominatimGeocoder:
+    """Fallback geocoder querying OpenStreetMap Nominatim (mind its usage policy)."""
+    url = 'https://nominatim.openstreetmap.org/search'
+    user_agent = 'linkedout/1.0'
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'GEOCODER_TIMEOUT', DEFAULT_TIMEOUT)
+
+    def _search(self, query):
+        params = {'format': 'json', 'q': query, 'limit': 1}
+        headers = {'User-Agent': self.user_agent}
+        if requests is not None:
+            resp = requests.get(self.url, params=params, headers=headers, timeout=self.timeout)
+            resp.raise_for_status()
+            return resp.json()
+        req = urllib.request.Request(self.url + '?' + urllib.parse.urlencode(params), headers=headers)
+        with urllib.request.urlopen(req, timeout=self.timeout) as r:
+            return json.loads(r.read().decode('utf-8'))
+
+    def geocode(self, query):
+        """(lat, lon) of the best match for `query`, or None when there is none."""
+        try:
+            data = self._search(query)
+            return (float(data[0]['lat']), float(data[0]['lon'])) if data else None
+        except (OSError, ValueError, LookupError, TypeError) as e:
+            # requests' exceptions are OSErrors; bad JSON is a ValueError
+            raise GeocoderUnavailable(str(e)) from e
+
+
+_lock = threading.Lock()
+_gazetteers = {}
+_fallbacks = {}
+
+
+def get_gazetteer(path=None):
+    """The gazetteer loaded from `path` (settings.GEOCODER_GAZETTEER by default), once per process."""
+    path = str(path or getattr(settings, 'GEOCODER_GAZETTEER', '') or DEFAULT_GAZETTEER)
+    if path not in _gazetteers:
+        with _lock:
+            if path not in _gazetteers:
+                _gazetteers[path] = Gazetteer.from_file(path)
+    return _gazetteers[path]
+
+
+def get_fallback(path=None):
+    """The fallback geocoder named by settings.GEOCODER_FALLBACK, or None when disabled."""
+    path = getattr(settings, 'GEOCODER_FALLBACK', '') if path is None else path
+    if not path:
+        return None
+    if path not in _fallbacks:
+        _fallbacks[path] = import_string(path)()
+    return _fallbacks[path]
+
+
+def geocode(query):
+    """(lat, lon) for a free-text location, or None."""
+    query = (query or '').strip()
+    if not query:
+        return None
+    found = get_gazetteer().lookup(query)
+    fallback = get_fallback()
+    if found or fallback is None:
+        return found
+    key = 'geocode:' + hashlib.sha1(normalize(query).encode()).hexdigest()
+    cached = cache.get(key)
+    if cached is not None:
+        return tuple(cached) or None
+    try:
+        found = fallback.geocode(query)
+    except GeocoderUnavailable:
+        return None
+    cache.set(key, found or (), FALLBACK_CACHE_TIMEOUT)
+    return found
@@ -0,0 +1,207 @@
+"""
+In-memory spatial index of job coordinates for the map endpoints.
+
+Jobs are held as points on the unit sphere (x, y, z) in a SciPy cKDTree.
+The straight-line (chord) distance between two unit vectors grows with
+their great-circle distance, so a radius of d miles is a ball of chord
+2 sin(d / 2R) and the nearest points by chord are the nearest on the
+globe. Both radius and k-nearest lookups are logarithmic in the number of
+jobs instead of a database scan. Candidates from the tree are measured
+in one vectorized pass (jobs.geo.rank_by_distance), so results and their
+order (distance, then pk) match the database query (geo.nearby).
+
+A KD-tree takes no inserts, so saves handled by this process (jobs.signals)
+go to an overlay instead: the job's tree entry is masked and its new
+position is checked by brute force next to the tree. Like the autocomplete
+index, the tree is built from the database on first use and rebuilt every
+GEO_INDEX_REBUILD_INTERVAL seconds (picking up other workers' changes), or
+once the overlay holds MAX_OVERLAY jobs, which keeps it balanced.
+
+NumPy and SciPy are optional: without them `available` is False and
+nearby_jobs() queries the database.
+"""
+import threading
+import time
+from math import pi, sin
+
+from django.conf import settings
+
+from . import geo
+from .models import Job
+
+try:
+    import numpy as np
+    from scipy import spatial
+except ImportError:
+    np = None
+    spatial = None
+
+DEFAULT_REBUILD_INTERVAL = 600
+MAX_OVERLAY = 256
+# ids per in_bulk() when loading ranked jobs through a filtered queryset
+LOAD_BATCH_SIZE = 500
+# half the Earth's circumference: every point is within this distance
+WHOLE_EARTH = pi * geo.EARTH_RADIUS_MILES
+
+
+def unit_vectors(lat, lon):
+    """(n, 3) unit vectors for arrays of latitudes and longitudes in degrees."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def chord(radius):
+    """Straight-line distance through the unit sphere for a great-circle distance in miles."""
+    return 2 * sin(min(radius / geo.EARTH_RADIUS_MILES, pi) / 2)
+
+
+class JobLocations:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tree = None
+        self._ids = None  # job ids in tree order
+        self._coords = None  # (lat, lon) rows in tree order
+        self._masked = set()  # job ids whose tree entry is out of date
+        self._overlay = {}  # job id -> (lat, lon) saved since the build
+        self._built_at = 0.0
+
+    @property
+    def available(self):
+        return spatial is not None
+
+    @property
+    def ready(self):
+        return self._ids is not None
+
+    def invalidate(self):
+        self._ids = None
+
+    def build(self):
+        rows = list(
+            Job.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+            .values_list('pk', 'latitude', 'longitude')
+        )
+        ids = np.array([pk for pk, _, _ in rows], dtype=np.int64)
+        coords = np.array([(lat, lon) for _, lat, lon in rows], dtype=np.float64).reshape(-1, 2)
+        tree = spatial.cKDTree(unit_vectors(coords[:, 0], coords[:, 1])) if rows else None
+        with self._lock:
+            self._tree, self._ids, self._coords = tree, ids, coords
+            self._masked, self._overlay = set(), {}
+            self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        interval = getattr(settings, 'GEO_INDEX_REBUILD_INTERVAL', DEFAULT_REBUILD_INTERVAL)
+        if not self.ready or len(self._overlay) >= MAX_OVERLAY or time.monotonic() - self._built_at > interval:
+            self.build()
+
+    def update_job(self, job):
+        if not self.ready:
+            return
+        with self._lock:
+            self._masked.add(job.pk)
+            if job.latitude is not None and job.longitude is not None:
+                self._overlay[job.pk] = (job.latitude, job.longitude)
+            else:
+                self._overlay.pop(job.pk, None)
+
+    def remove_job(self, job):
+        if not self.ready:
+            return
+        with self._lock:
+            self._masked.add(job.pk)
+            self._overlay.pop(job.pk, None)
+
+    def _snapshot(self):
+        self._ensure_fresh()
+        with self._lock:
+            return self._tree, self._ids, self._coords, set(self._masked), dict(self._overlay)
+
+    def _measure(self, lat, lon, rows, ids, coords, masked, overlay, radius=None, limit=None):
+        """
+        [(distance, job id)] for tree rows `rows` plus the overlay within
+        `radius`, by distance then id, at most `limit` (geo.rank_by_distance).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        if masked:
+            rows = rows[~np.isin(ids[rows], np.fromiter(masked, dtype=np.int64, count=len(masked)))]
+        extra = np.array(list(overlay.values()), dtype=np.float64).reshape(-1, 2)
+        return geo.rank_by_distance(
+            lat, lon,
+            np.concatenate((ids[rows], np.fromiter(overlay, dtype=np.int64, count=len(overlay)))),
+            np.concatenate((coords[rows, 0], extra[:, 0])),
+            np.concatenate((coords[rows, 1], extra[:, 1])),
+            radius, limit,
+        )
+
+    def within(self, lat, lon, radius):
+        """[(distance in miles, job id)] for every job within `radius`, nearest first."""
+        tree, ids, coords, masked, overlay = self._snapshot()
+        rows = []
+        if tree is not None:
+            # a hair wider than the radius; haversine has the final say
+            point = unit_vectors(np.array([lat]), np.array([lon]))[0]
+            rows = tree.query_ball_point(point, chord(radius) * (1 + 1e-9) + 1e-12)
+        return self._measure(lat, lon, rows, ids, coords, masked, overlay, radius=radius)
+
+    def nearest(self, lat, lon, k):
+        """[(distance in miles, job id)] for the `k` jobs nearest to (lat, lon)."""
+        tree, ids, coords, masked, overlay = self._snapshot()
+        rows = []
+        if tree is not None and k > 0:
+            # masked entries may take up some of the tree's nearest slots
+            n = min(len(ids), k + len(masked))
+            point = unit_vectors(np.array([lat]), np.array([lon]))[0]
+            _, rows = tree.query(point, k=n)
+            rows = np.atleast_1d(rows)
+        return self._measure(lat, lon, rows, ids, coords, masked, overlay, limit=k)
+
+
+locations = JobLocations()
+
+
+def _iter_load(queryset, ranked, limit):
+    """(distance, job) for the `ranked` job ids still in `queryset`, in order, at most `limit`."""
+    count = 0
+    for start in range(0, len(ranked), LOAD_BATCH_SIZE):
+        batch = ranked[start:start + LOAD_BATCH_SIZE]
+        jobs = queryset.in_bulk([pk for _, pk in batch])
+        for distance, pk in batch:
+            if pk in jobs:
+                yield distance, jobs[pk]
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+
+def _load(queryset, ranked, limit):
+    return list(_iter_load(queryset, ranked, limit))
+
+
+def nearby_jobs(queryset, lat, lon, radius=None, limit=None):
+    """
+    [(distance in miles, job)] for the jobs of `queryset` within `radius`
+    miles of (lat, lon), or the `limit` nearest ones when radius is None
+    (limit is then required); nearest first, at most `limit`. Served from
+    the in-memory index when available, else from the database
+    (geo.nearby).
+    """
+    return list(iter_nearby_jobs(queryset, lat, lon, radius, limit))
+
+
+def iter_nearby_jobs(queryset, lat, lon, radius=None, limit=None):
+    """
+    nearby_jobs() as an iterator. Within a radius, jobs are loaded
+    LOAD_BATCH_SIZE at a time as it is consumed.
+    """
+    if not locations.available:
+        return iter(geo.nearby(queryset, lat, lon, WHOLE_EARTH if radius is None else radius, limit))
+    if radius is not None:
+        return _iter_load(queryset, locations.within(lat, lon, radius), limit)
+    # filters may reject some of the nearest jobs: widen until enough pass
+    k = limit
+    while True:
+        ranked = locations.nearest(lat, lon, k)
+        result = _load(queryset, ranked, limit)
+        if len(result) >= limit or len(ranked) < k:
+            return iter(result)
+        k *= 4
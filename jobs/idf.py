@@ -0,0 +1,124 @@
+"""
+Document frequencies of match tokens, for IDF-weighted ("tfidf") scoring.
+
+MatchTermFrequency holds, for every token, how many Job and Profile rows
+carry it in match_tokens. Saves and deletes adjust only the counts of the
+tokens that were added or removed (jobs.signals), so nothing is recomputed
+per request. Scoring reads an in-memory snapshot of the table, refreshed
+every MATCH_IDF_SNAPSHOT_INTERVAL seconds and patched by this process's own
+changes in between. rebuild() recomputes the table from scratch.
+
+Match tokens are a set per document, so the term frequency is 0 or 1 and a
+token's weight is just its smoothed inverse document frequency:
+idf(t) = ln((1 + N) / (1 + df(t))) + 1, N being the number of documents.
+"""
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from . import matching
+from .models import Job, MatchTermFrequency
+
+MAX_TERM_LENGTH = 64
+DEFAULT_SNAPSHOT_INTERVAL = 300
+
+
+def _terms(tokens):
+    return {t[:MAX_TERM_LENGTH] for t in tokens}
+
+
+def document_count():
+    from accounts.models import Profile
+
+    return Job.objects.count() + Profile.objects.count()
+
+
+class DocumentFrequencies:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = None
+        self._total = 0
+        self._loaded_at = 0.0
+
+    def load(self):
+        counts = dict(MatchTermFrequency.objects.filter(document_count__gt=0).values_list('term', 'document_count'))
+        total = document_count()
+        with self._lock:
+            self._counts, self._total = counts, total
+            self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        interval = getattr(settings, 'MATCH_IDF_SNAPSHOT_INTERVAL', DEFAULT_SNAPSHOT_INTERVAL)
+        if self._counts is None or time.monotonic() - self._loaded_at > interval:
+            self.load()
+
+    def apply(self, added, removed, documents=0):
+        """Patch the snapshot with a change already written to the table."""
+        if self._counts is None:
+            return
+        with self._lock:
+            for term in added:
+                self._counts[term] = self._counts.get(term, 0) + 1
+            for term in removed:
+                self._counts[term] = max(0, self._counts.get(term, 0) - 1)
+            self._total = max(0, self._total + documents)
+
+    def weights(self, tokens):
+        """{token: idf} for `tokens`."""
+        self._ensure_fresh()
+        with self._lock:
+            n = self._total
+            return {
+                t: math.log((1 + n) / (1 + self._counts.get(t[:MAX_TERM_LENGTH], 0))) + 1
+                for t in tokens
+            }
+
+
+frequencies = DocumentFrequencies()
+
+
+def record_change(old_tokens, new_tokens, documents=0):
+    """
+    Apply one document's token change to the table and the snapshot.
+    `documents` is +1 for a new document, -1 for a deleted one.
+    """
+    old_terms, new_terms = _terms(old_tokens), _terms(new_tokens)
+    added, removed = new_terms - old_terms, old_terms - new_terms
+    if not added and not removed and not documents:
+        return
+    with transaction.atomic():
+        if removed:
+            MatchTermFrequency.objects.filter(term__in=removed, document_count__gt=0).update(
+                document_count=F('document_count') - 1
+            )
+        if added:
+            # insert missing terms at 0, then count every added term: a term
+            # another save creates concurrently is skipped, not an IntegrityError
+            MatchTermFrequency.objects.bulk_create(
+                [MatchTermFrequency(term=t, document_count=0) for t in added], ignore_conflicts=True
+            )
+            MatchTermFrequency.objects.filter(term__in=added).update(document_count=F('document_count') + 1)
+    frequencies.apply(added, removed, documents)
+
+
+def rebuild():
+    """Recount every token over all Job and Profile rows. Returns the number of terms."""
+    from accounts.models import Profile
+
+    counts = Counter()
+    for job in Job.objects.only('pk', 'title', 'description', 'match_tokens').iterator():
+        counts.update(_terms(matching.job_tokens(job)))
+    for profile in Profile.objects.only('pk', 'skills', 'experience', 'match_tokens').iterator():
+        counts.update(_terms(matching.profile_tokens(profile)))
+    with transaction.atomic():
+        MatchTermFrequency.objects.all().delete()
+        MatchTermFrequency.objects.bulk_create(
+            (MatchTermFrequency(term=t, document_count=n) for t, n in counts.items()), batch_size=1000
+        )
+    frequencies.load()
+    return len(counts)
@@ -0,0 +1,167 @@
+"""
+Approximate candidate retrieval with MinHash and locality-sensitive hashing.
+
+Exact recommendation scoring touches every candidate. With
+settings.RECOMMENDATION_RETRIEVAL = 'lsh' a job is instead scored against a
+shortlist: the profiles whose token sets are likely to overlap the job's.
+
+Every profile's match tokens get a MinHash signature of NUM_BANDS *
+ROWS_PER_BAND values (the minimum of a universal hash over the tokens, per
+hash function). Two sets agree on one value with probability equal to
+their Jaccard similarity. The signature is cut into bands and each band is
+hashed into a bucket stored in CandidateBucket. Jobs are hashed the same
+way, and the shortlist is the profiles sharing the most buckets with the
+job. With 16 bands of 4 rows a pair with Jaccard similarity s shares at
+least one bucket with probability 1 - (1 - s^4)^16: about 64% at 0.3,
+96% at 0.5.
+
+Buckets are rewritten when a profile's tokens change (jobs.signals) and
+bulk-built by the build_candidate_buckets command. evaluate_lsh reports
+recall against the exact ranking. Changing the constants below requires
+rebuilding the buckets.
+"""
+import hashlib
+import heapq
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from . import matching, scoring
+from .models import CandidateBucket
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+# Mersenne prime modulus: (a * x + b) stays below 2**63 for 31-bit inputs
+PRIME = (1 << 31) - 1
+DEFAULT_SHORTLIST_SIZE = 2000
+
+_rng = random.Random(20240611)
+HASH_PARAMS = [(_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(NUM_HASHES)]
+if np is not None:
+    _A = np.array([a for a, _ in HASH_PARAMS], dtype=np.uint64).reshape(-1, 1)
+    _B = np.array([b for _, b in HASH_PARAMS], dtype=np.uint64).reshape(-1, 1)
+
+
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), 'big') % PRIME
+
+
+def signature(tokens):
+    """MinHash signature of a token set (None for an empty set)."""
+    if not tokens:
+        return None
+    xs = [_token_hash(t) for t in tokens]
+    if np is not None:
+        values = (_A * np.array(xs, dtype=np.uint64) + _B) % PRIME
+        return [int(v) for v in values.min(axis=1)]
+    return [min((a * x + b) % PRIME for x in xs) for a, b in HASH_PARAMS]
+
+
+def band_buckets(sig):
+    """[(band, bucket)] for a signature."""
+    buckets = []
+    for band in range(NUM_BANDS):
+        rows = sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        raw = band.to_bytes(2, 'big') + b''.join(v.to_bytes(4, 'big') for v in rows)
+        digest = hashlib.blake2b(raw, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+
+def token_buckets(tokens):
+    sig = signature(tokens)
+    return band_buckets(sig) if sig is not None else []
+
+
+def profile_bucket_rows(profile):
+    return [
+        CandidateBucket(profile_id=profile.pk, band=band, bucket=bucket)
+        for band, bucket in token_buckets(matching.profile_tokens(profile))
+    ]
+
+
+def update_profile(profile):
+    """Rewrite a profile's buckets from its current tokens."""
+    with transaction.atomic():
+        CandidateBucket.objects.filter(profile_id=profile.pk).delete()
+        CandidateBucket.objects.bulk_create(profile_bucket_rows(profile))
+
+
+def rebuild(profiles=None, batch_size=1000):
+    """Rebuild the buckets of `profiles` (default: all). Returns the number of profiles."""
+    from accounts.models import Profile
+
+    profiles = Profile.objects.all() if profiles is None else profiles
+    count, batch, ids = 0, [], []
+    for profile in profiles.only('pk', 'skills', 'experience', 'match_tokens').iterator(chunk_size=batch_size):
+        ids.append(profile.pk)
+        batch.extend(profile_bucket_rows(profile))
+        count += 1
+        if len(ids) >= batch_size:
+            _write(ids, batch)
+            ids, batch = [], []
+    if ids:
+        _write(ids, batch)
+    return count
+
+
+def _write(profile_ids, rows):
+    with transaction.atomic():
+        CandidateBucket.objects.filter(profile_id__in=profile_ids).delete()
+        CandidateBucket.objects.bulk_create(rows, batch_size=1000)
+
+
+def shortlist(job_tokens, size=None):
+    """
+    Ids of up to `size` profiles sharing the most LSH buckets with
+    `job_tokens` (most shared first), with the number of shared buckets.
+    """
+    size = size or getattr(settings, 'LSH_SHORTLIST_SIZE', DEFAULT_SHORTLIST_SIZE)
+    buckets = token_buckets(job_tokens)
+    if not buckets:
+        return []
+    cond = Q()
+    for band, bucket in buckets:
+        cond |= Q(band=band, bucket=bucket)
+    return list(
+        CandidateBucket.objects.filter(cond)
+        .values('profile_id')
+        .annotate(shared=Count('pk'))
+        .order_by('-shared', 'profile_id')
+        .values_list('profile_id', 'shared')[:size]
+    )
+
+
+def top(job_tokens, k=None, exclude_user_ids=(), mode=None, size=None):
+    """
+    [(profile_id, score)] for the best `k` of a `size` shortlist of
+    candidates, scored exactly (as jobs.scoring.score does) and ranked like
+    ScoringEngine.top.
+    """
+    from accounts.models import Profile
+
+    ids = [pk for pk, _ in shortlist(job_tokens, size)]
+    profiles = (
+        Profile.objects.filter(pk__in=ids, is_recruiter=False, user__is_active=True)
+        .exclude(user_id__in=list(exclude_user_ids))
+        .only('pk', 'skills', 'experience', 'match_tokens')
+    )
+    # the job's weights are the same for every candidate: compute them once
+    weights = scoring.job_weights(job_tokens, mode)
+    if weights is None:
+        scored = [(-matching.overlap_score(job_tokens, matching.profile_tokens(p)), p.pk) for p in profiles]
+    else:
+        scored = [
+            (-matching.weighted_overlap_score(job_tokens, matching.profile_tokens(p), weights), p.pk)
+            for p in profiles
+        ]
+    best = sorted(scored) if k is None else heapq.nsmallest(k, scored)
+    return [(pk, -neg_score) for neg_score, pk in best]
@@ -0,0 +1,13 @@
+"""Shared helpers for the benchmark_* and compare_* management commands."""
+import time
+
+
+def best_time(fn, repeat):
+    """(milliseconds, result) of the fastest of `repeat` calls of `fn`."""
+    best = float('inf')
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from jobs import matching
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Compute the stored match_tokens column for every Job and Profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def _backfill(self, queryset, fields, token_string, batch_size):
+        batch, changed = [], 0
+        for obj in queryset.only('pk', 'match_tokens', *fields).iterator(chunk_size=batch_size):
+            tokens = token_string(obj)
+            if tokens == obj.match_tokens:
+                continue
+            obj.match_tokens = tokens
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                changed += queryset.model.objects.bulk_update(batch, ['match_tokens'])
+                batch = []
+        if batch:
+            changed += queryset.model.objects.bulk_update(batch, ['match_tokens'])
+        return changed
+
+    def handle(self, *args, **options):
+        size = options['batch_size']
+        jobs = self._backfill(Job.objects.all(), ('title', 'description'), matching.job_token_string, size)
+        profiles = self._backfill(
+            Profile.objects.all(), ('skills', 'experience'), matching.profile_token_string, size
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {jobs} jobs and {profiles} profiles."))
@@ -0,0 +1,64 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import geo
+from jobs.management.benchmarking import best_time
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the scalar haversine loop with the vectorized distance "
+        "functions (jobs.geo) on random points: distances alone, and the "
+        "radius filter + sort + rounding used by /map/nearby/ (no database access)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+        parser.add_argument('--radius', type=float, default=250)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _loop_rank(self, lat, lon, ids, lats, lons, radius):
+        """The scalar version: haversine per point, filter, sort, round."""
+        found = []
+        for pk, p_lat, p_lon in zip(ids, lats, lons):
+            distance = geo.haversine(lat, lon, p_lat, p_lon)
+            if distance <= radius:
+                found.append((distance, pk))
+        found.sort()
+        return [(round(distance, 2), pk) for distance, pk in found]
+
+    def _vector_rank(self, lat, lon, ids, lats, lons, radius):
+        ranked = geo.rank_by_distance(lat, lon, ids, lats, lons, radius)
+        return list(zip(geo.round_miles([distance for distance, _ in ranked]), [pk for _, pk in ranked]))
+
+    def handle(self, *args, **options):
+        if geo.np is None:
+            raise CommandError("NumPy is required for this benchmark.")
+        np = geo.np
+        rng = random.Random(options['seed'])
+        repeat, radius = max(1, options['repeat']), options['radius']
+        lat, lon = 40.71, -74.01
+
+        for size in options['sizes']:
+            lats = [rng.uniform(-60, 70) for _ in range(size)]
+            lons = [rng.uniform(-180, 180) for _ in range(size)]
+            ids = list(range(1, size + 1))
+            lat_arr, lon_arr, id_arr = np.array(lats), np.array(lons), np.array(ids)
+
+            loop_ms, expected = best_time(lambda: [geo.haversine(lat, lon, a, b) for a, b in zip(lats, lons)], repeat)
+            vector_ms, distances = best_time(lambda: geo.haversine_array(lat, lon, lat_arr, lon_arr), repeat)
+            error = float(np.max(np.abs(distances - np.array(expected)))) if size else 0.0
+            loop_rank_ms, ranked = best_time(lambda: self._loop_rank(lat, lon, ids, lats, lons, radius), repeat)
+            vector_rank_ms, from_vector = best_time(
+                lambda: self._vector_rank(lat, lon, id_arr, lat_arr, lon_arr, radius), repeat
+            )
+            same = [pk for _, pk in from_vector] == [pk for _, pk in ranked]
+            self.stdout.write(
+                f"{size:>9} points   distances: loop {loop_ms:9.2f} ms, vectorized {vector_ms:8.2f} ms "
+                f"({loop_ms / max(vector_ms, 1e-6):6.1f}x, max difference {error:.2e} mi)   "
+                f"r={radius:g} mi rank: loop {loop_rank_ms:9.2f} ms, vectorized {vector_rank_ms:8.2f} ms "
+                f"({loop_rank_ms / max(vector_rank_ms, 1e-6):6.1f}x, {len(ranked)} matches)   "
+                f"same ranking: {'yes' if same else 'NO'}"
+            )
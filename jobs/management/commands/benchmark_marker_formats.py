@@ -0,0 +1,60 @@
+import gzip
+import json
+import random
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from jobs import columnar
+from jobs.management.benchmarking import best_time
+
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises']
+TITLES = ['Python developer', 'Data engineer', 'Frontend engineer', 'Product manager', 'DevOps engineer']
+CITIES = ['New York, NY', 'San Francisco, CA', 'London', 'Berlin', 'Auckland', 'Austin, TX']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the size and encoding time of /map/nearby/ payloads in the "
+        "default row format and the columnar formats (jobs.columnar), on "
+        "synthetic markers (no database access)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1_000, 10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _markers(self, rng, n):
+        """Rows shaped like jobs_nearby's."""
+        return [{
+            'id': i + 1,
+            'title': rng.choice(TITLES),
+            'company': rng.choice(COMPANIES),
+            'location': rng.choice(CITIES),
+            'lat': rng.uniform(-60, 70),
+            'lon': rng.uniform(-180, 180),
+            'distance_miles': round(rng.uniform(0, 50), 2),
+        } for i in range(n)]
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        repeat = max(1, options['repeat'])
+        for size in options['sizes']:
+            rows = self._markers(rng, size)
+            line = [f"{size:>7} markers"]
+            baseline = None
+            for fmt in columnar.FORMATS:
+                # what JsonResponse does: encode, then json.dumps with Django's encoder
+                ms, body = best_time(
+                    lambda: json.dumps({'jobs': columnar.encode(rows, fmt), 'truncated': False}, cls=DjangoJSONEncoder),
+                    repeat,
+                )
+                raw = len(body.encode())
+                zipped = len(gzip.compress(body.encode()))
+                baseline = baseline or (raw, zipped, ms)
+                line.append(
+                    f"{fmt}: {raw / 1024:9.1f} KiB ({raw / baseline[0]:4.0%}), gzip {zipped / 1024:8.1f} KiB "
+                    f"({zipped / baseline[1]:4.0%}), {ms:8.2f} ms ({ms / baseline[2]:4.0%})"
+                )
+            self.stdout.write('   '.join(line))
@@ -0,0 +1,101 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs import geo, geoindex
+from jobs.management.benchmarking import best_time
+from jobs.models import Job
+
+# (lat, lon) of a few cities; Auckland's circle crosses the antimeridian at large radii
+POINTS = [(40.71, -74.01), (37.77, -122.42), (51.51, -0.13), (-36.85, 174.76)]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the old full-scan radius search with the geohash-cell prefilter "
+        "used by /map/nearby/ (jobs.geo), optionally on synthetic jobs that are "
+        "rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--radius', type=float, nargs='+', default=[15, 50, 250])
+        parser.add_argument('--synthetic', type=int, default=0, help="Random jobs to add for the run.")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _full_scan(self, qs, lat, lon, radius):
+        """The previous implementation: every job with coordinates, distance in Python."""
+        found = []
+        for job in qs.all():
+            distance = geo.haversine(lat, lon, job.latitude, job.longitude)
+            if distance <= radius:
+                found.append((distance, job.pk))
+        return sorted(found)
+
+    def _same(self, found, expected):
+        """Same jobs in the same order; vectorized distances may differ from the scalar ones in the last bits."""
+        return [pk for _, pk in found] == [pk for _, pk in expected] and all(
+            abs(a - b) <= 1e-9 for (a, _), (b, _) in zip(found, expected)
+        )
+
+    def _prefiltered(self, qs, lat, lon, radius):
+        return [(distance, job.pk) for distance, job in geo.nearby(qs, lat, lon, radius)]
+
+    def _kd_tree(self, qs, lat, lon, radius):
+        return [(distance, job.pk) for distance, job in geoindex.nearby_jobs(qs, lat, lon, radius)]
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['synthetic']:
+                    self._add_jobs(options['synthetic'], random.Random(options['seed']))
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _add_jobs(self, n, rng):
+        jobs = []
+        for i in range(n):
+            # clustered around the benchmark points, plus uniform background noise
+            if rng.random() < 0.8:
+                lat, lon = rng.choice(POINTS)
+                lat, lon = lat + rng.gauss(0, 3), (lon + rng.gauss(0, 3) + 180) % 360 - 180
+            else:
+                lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+            lat = max(-90, min(90, lat))
+            # bulk_create skips Job.save(), which sets the geohash
+            jobs.append(Job(title=f'Synthetic job {i}', latitude=lat, longitude=lon, geohash=geo.encode(lat, lon)))
+        Job.objects.bulk_create(jobs, batch_size=1000)
+
+    def _run(self, options):
+        repeat = max(1, options['repeat'])
+        qs = Job.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True).only(
+            'pk', 'title', 'company', 'location', 'latitude', 'longitude'
+        )
+        self.stdout.write(f"{qs.count()} jobs with coordinates")
+        use_tree = geoindex.locations.available
+        if use_tree:
+            build_ms, _ = best_time(geoindex.locations.build, 1)
+            self.stdout.write(f"KD-tree built in {build_ms:.0f} ms")
+        for lat, lon in POINTS:
+            for radius in options['radius']:
+                scan_ms, expected = best_time(lambda: self._full_scan(qs, lat, lon, radius), repeat)
+                box_ms, found = best_time(lambda: self._prefiltered(qs, lat, lon, radius), repeat)
+                in_box = geo.within_box(qs, lat, lon, radius).count()
+                line = (
+                    f"({lat:7.2f}, {lon:8.2f}) r={radius:>6g} mi   matches: {len(found):>6}   box: {in_box:>7}   "
+                    f"full scan: {scan_ms:9.2f} ms   prefilter: {box_ms:8.2f} ms"
+                )
+                same = self._same(found, expected)
+                if use_tree:
+                    tree_ms, from_tree = best_time(lambda: self._kd_tree(qs, lat, lon, radius), repeat)
+                    ranking_ms, _ = best_time(lambda: geoindex.locations.within(lat, lon, radius), repeat)
+                    line += f"   kd-tree: {tree_ms:8.2f} ms ({ranking_ms:.2f} ms ranking)"
+                    same = same and self._same(from_tree, expected)
+                self.stdout.write(f"{line}   same result: {'yes' if same else 'NO'}")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from jobs.management.benchmarking import best_time
+from jobs.search_backends import get_search_backend
+
+BACKENDS = {
+    'icontains': 'jobs.search_backends.IcontainsBackend',
+    'index': 'jobs.search_backends.InvertedIndexBackend',
+    'fts5': 'jobs.search_backends.FTS5Backend',
+}
+
+
+class Command(BaseCommand):
+    help = "Time job and candidate searches for each search backend against the current database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=['python', 'software engineer', 'data, remote'])
+        parser.add_argument('--backend', action='append', choices=sorted(BACKENDS), dest='backends')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        for name in options['backends'] or list(BACKENDS):
+            backend = get_search_backend(BACKENDS[name])
+            for q in options['queries']:
+                job_ms, ids = best_time(lambda: backend.search_jobs(q), repeat)
+                profiles = Profile.objects.filter(is_recruiter=False)
+                prof_ms, n_profiles = best_time(
+                    lambda: len(list(backend.filter_profiles(profiles, q).values_list('pk', flat=True))), repeat
+                )
+                self.stdout.write(
+                    f"{name:<10} {q!r:<24} jobs: {len(ids or []):>6} in {job_ms:8.2f} ms   "
+                    f"profiles: {n_profiles:>6} in {prof_ms:8.2f} ms"
+                )
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import lsh
+
+
+class Command(BaseCommand):
+    help = "Recompute the MinHash/LSH buckets (CandidateBucket) of every profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = lsh.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Bucketed {count} profiles in {time.perf_counter() - start:.1f}s."
+        ))
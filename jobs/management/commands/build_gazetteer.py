@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import geocoding
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a gazetteer file (jobs.geocoding) from a GeoNames postal code "
+        "dump (e.g. US.txt from download.geonames.org/export/zip/): every ZIP "
+        "code, and every place at the mean position of its ZIP codes, places "
+        "with more ZIP codes first. Point settings.GEOCODER_GAZETTEER at the output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="GeoNames postal code dump (tab-separated, UTF-8)")
+        parser.add_argument('output', help="gazetteer file to write")
+        parser.add_argument('--countries', nargs='+', default=['US', 'PR'])
+
+    def handle(self, *args, **options):
+        countries = set(options['countries'])
+        postcodes = {}
+        places = defaultdict(list)
+        try:
+            with open(options['source'], encoding='utf-8') as f:
+                for line in f:
+                    fields = line.rstrip('\n').split('\t')
+                    if len(fields) < 11 or fields[0] not in countries:
+                        continue
+                    code, name, region = fields[1], fields[2], fields[4] or fields[0]
+                    try:
+                        lat, lon = float(fields[9]), float(fields[10])
+                    except ValueError:
+                        continue
+                    if len(code) == 5 and code.isdigit():
+                        postcodes.setdefault(code, (region, lat, lon))
+                    if name:
+                        places[name, region].append((lat, lon))
+        except OSError as e:
+            raise CommandError(e)
+
+        ordered = sorted(places.items(), key=lambda item: (-len(item[1]), item[0]))
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            f.write(f"# Built from {options['source']} by `manage.py build_gazetteer` (see jobs/geocoding.py).\n")
+            for (name, region), points in ordered:
+                lat = sum(p[0] for p in points) / len(points)
+                lon = sum(p[1] for p in points) / len(points)
+                f.write(f"place\t{name}\t{region}\t{lat:.4f}\t{lon:.4f}\n")
+            for code, (region, lat, lon) in sorted(postcodes.items()):
+                f.write(f"postcode\t{code}\t{region}\t{lat:.4f}\t{lon:.4f}\n")
+
+        gazetteer = geocoding.Gazetteer.from_file(options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(ordered)} places and {len(postcodes)} ZIP codes to {options['output']} "
+            f"({len(gazetteer)} lookup keys)."
+        ))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import recommendations
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored top candidates (JobCandidateScore) for every job, or the given job ids."
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.all()
+        if options['job_ids']:
+            jobs = jobs.filter(pk__in=options['job_ids'])
+        start = time.perf_counter()
+        rows = recommendations.rebuild(jobs)
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {rows} recommendations for {jobs.count()} jobs in {time.perf_counter() - start:.1f}s."
+        ))
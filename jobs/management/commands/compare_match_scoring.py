@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from jobs import matching, scoring
+from jobs.management.benchmarking import best_time
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Rank candidates for jobs under every match scoring mode and report "
+        "latency and how much the top rankings agree."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='*', type=int)
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=5, help="Jobs to compare when no ids are given.")
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.order_by('-posted_at')
+        jobs = jobs.filter(pk__in=options['job_ids']) if options['job_ids'] else jobs[:options['limit']]
+        k, repeat = options['top'], max(1, options['repeat'])
+        scoring.engine.candidates()
+
+        for job in jobs:
+            tokens = matching.job_tokens(job)
+            rankings = {}
+            self.stdout.write(f"Job {job.pk}: {job}")
+            for mode in scoring.MODES:
+                ms, ranked = best_time(lambda: scoring.engine.top(tokens, k, mode=mode), repeat)
+                rankings[mode] = ranked
+                shown = ', '.join(f"{pk}:{score:.0f}" for pk, score in ranked)
+                self.stdout.write(f"  {mode:<8} {ms:8.2f} ms   {shown}")
+            ids = [{pk for pk, _ in ranked} for ranked in rankings.values()]
+            common = set.intersection(*ids)
+            self.stdout.write(f"  top-{k} agreement: {len(common)}/{max(len(i) for i in ids) or 0}")
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import lsh, matching, scoring
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure recall@K of LSH candidate retrieval against the exact ranking, "
+        "with the latency of both, over recent jobs or the given job ids."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='*', type=int)
+        parser.add_argument('--k', type=int, default=20)
+        parser.add_argument('--jobs', type=int, default=50, help="Recent jobs to evaluate when no ids are given.")
+        parser.add_argument('--shortlist', type=int, help="Override LSH_SHORTLIST_SIZE.")
+        parser.add_argument('--verbose-jobs', action='store_true', help="Print a line per job.")
+
+    def handle(self, *args, **options):
+        k = options['k']
+        jobs = Job.objects.order_by('-posted_at')
+        jobs = jobs.filter(pk__in=options['job_ids']) if options['job_ids'] else jobs[:options['jobs']]
+        scoring.engine.candidates()
+
+        recalls, exact_ms, lsh_ms, shortlisted = [], 0.0, 0.0, 0
+        for job in jobs:
+            tokens = matching.job_tokens(job)
+            start = time.perf_counter()
+            # only candidates with some overlap can be expected from the buckets
+            exact = [(pk, score) for pk, score in scoring.engine.top(tokens, k) if score > 0]
+            exact_ms += (time.perf_counter() - start) * 1000
+            if not exact:
+                continue
+            # candidates tied with the k-th exact score are equally correct answers
+            cutoff = exact[-1][1]
+            relevant = {pk for pk, score in scoring.engine.top(tokens) if score >= cutoff}
+            start = time.perf_counter()
+            approx = [pk for pk, _ in lsh.top(tokens, k, size=options['shortlist'])]
+            lsh_ms += (time.perf_counter() - start) * 1000
+            candidates = lsh.shortlist(tokens, options['shortlist'])
+            shortlisted += len(candidates)
+            recall = len(relevant & set(approx)) / len(exact)
+            recalls.append(recall)
+            if options['verbose_jobs']:
+                self.stdout.write(f"job {job.pk:>7}  recall@{k}: {recall:.2f}  shortlist: {len(candidates)}")
+
+        if not recalls:
+            self.stdout.write("No jobs with matching candidates to evaluate.")
+            return
+        n = len(recalls)
+        self.stdout.write(
+            f"{n} jobs   mean recall@{k}: {sum(recalls) / n:.3f}   min: {min(recalls):.2f}   "
+            f"mean shortlist: {shortlisted / n:.0f}   exact: {exact_ms / n:.2f} ms/job   "
+            f"lsh: {lsh_ms / n:.2f} ms/job"
+        )
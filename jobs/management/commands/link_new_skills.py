@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import skills
+
+
+class Command(BaseCommand):
+    help = (
+        "Link the skills created by profile saves since the last run to the existing jobs "
+        "that mention them. Run it often (e.g. every minute from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help="Link at most this many skills, oldest first.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        n_skills, n_links = skills.link_pending(options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {n_skills} new skills to {n_links} jobs in {time.perf_counter() - started:.1f}s."
+        ))
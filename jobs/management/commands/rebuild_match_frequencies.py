@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from jobs import idf
+
+
+class Command(BaseCommand):
+    help = "Recount the document frequencies of match tokens (MatchTermFrequency) over all jobs and profiles."
+
+    def handle(self, *args, **options):
+        terms = idf.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Counted {terms} terms over {idf.document_count()} documents."))
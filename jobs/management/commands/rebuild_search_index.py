@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from jobs import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the job search inverted index (JobTerm postings) from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} jobs."))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import skills
+
+
+class Command(BaseCommand):
+    help = "Seed the skill aliases and relink every profile and job to the skill taxonomy."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        n_skills, profile_links, job_links = skills.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"{n_skills} skills: linked {profile_links} profile skills and {job_links} job skills "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
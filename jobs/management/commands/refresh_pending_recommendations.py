@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import recommendations
+from jobs.models import PendingRescore
+
+
+class Command(BaseCommand):
+    help = (
+        "Rescore the profiles queued by saves that changed their tokens or candidacy "
+        "and update the stored recommendations. Run it often (e.g. every minute from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help="Refresh at most this many profiles, oldest first.")
+        parser.add_argument(
+            '--rebuild-over', type=int, default=1000,
+            help="Rebuild every job's ranking instead when more profiles than this are queued.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        done = recommendations.refresh_pending(options['limit'], options['rebuild_over'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {done} profiles in {time.perf_counter() - start:.1f}s; "
+            f"{PendingRescore.objects.count()} still queued."
+        ))
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs import matching, recommendations, rescoring, scoring
+from jobs.models import Job, JobCandidateScore
+
+
+class Command(BaseCommand):
+    help = (
+        "Rescore every job (or the given job ids) against every candidate in "
+        "parallel worker processes and rewrite the stored recommendations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='*', type=int)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=50, help="Jobs per worker task.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per database write.")
+        parser.add_argument('--top', type=int, help="Candidates stored per job (default RECOMMENDATION_STORE_SIZE).")
+
+    def handle(self, *args, **options):
+        top_n = options['top'] or recommendations.store_size()
+        mode = scoring.get_mode()
+        jobs = Job.objects.only('pk', 'title', 'description', 'match_tokens').order_by('pk')
+        if options['job_ids']:
+            jobs = jobs.filter(pk__in=options['job_ids'])
+
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix='rescore-') as directory:
+            vocabulary, typecode = rescoring.write_candidates(directory, scoring.candidate_rows())
+            n_candidates = os.path.getsize(os.path.join(directory, rescoring.PROFILES_FILE)) // 8
+            tasks = []
+            for job in jobs.iterator():
+                tokens = matching.job_tokens(job)
+                ids = rescoring.encode_job(tokens, vocabulary)
+                weights = None
+                if mode != 'overlap':
+                    weights = {ids[t]: w for t, w in scoring.job_weights(tokens, mode).items()}
+                tasks.append((job.pk, list(ids.values()), weights))
+            self.stdout.write(
+                f"{len(tasks)} jobs x {n_candidates} candidates, {len(vocabulary)} terms, "
+                f"{options['workers']} workers ({mode} scoring)"
+            )
+
+            chunk = max(1, options['chunk_size'])
+            done, rows, written = 0, [], 0
+            with ProcessPoolExecutor(
+                max_workers=max(1, options['workers']),
+                initializer=rescoring.init_worker,
+                initargs=(directory, len(vocabulary), typecode),
+            ) as pool:
+                futures = [
+                    pool.submit(rescoring.score_jobs, tasks[i:i + chunk], top_n)
+                    for i in range(0, len(tasks), chunk)
+                ]
+                for future in as_completed(futures):
+                    results = future.result()
+                    for job_id, ranked in results:
+                        rows.append((job_id, ranked))
+                    done += len(results)
+                    if sum(len(r) for _, r in rows) >= options['batch_size']:
+                        written += self._write(rows)
+                        rows = []
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"  {done}/{len(tasks)} jobs ({done * 100 // max(1, len(tasks))}%)  "
+                        f"{done * n_candidates / elapsed:,.0f} pairs/s  {elapsed:.1f}s"
+                    )
+            written += self._write(rows)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {len(tasks) * n_candidates:,} pairs and stored {written:,} recommendations in {elapsed:.1f}s."
+        ))
+
+    def _write(self, results):
+        """Replace the stored rankings of the jobs in `results`."""
+        if not results:
+            return 0
+        objs = [
+            JobCandidateScore(job_id=job_id, profile_id=profile_id, score=score)
+            for job_id, ranked in results
+            for profile_id, score in ranked
+        ]
+        with transaction.atomic():
+            JobCandidateScore.objects.filter(job_id__in=[job_id for job_id, _ in results]).delete()
+            JobCandidateScore.objects.bulk_create(objs, batch_size=1000)
+        return len(objs)
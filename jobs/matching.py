@@ -0,0 +1,91 @@
+"""
+Token sets used for job/candidate match scoring.
+
+A job's tokens come from its title and description, a profile's from its
+skills and experience: lowercased alphanumeric words minus stopwords. They
+are computed when the object is saved and stored in the `match_tokens`
+column as a space-separated sorted list, so scoring is a set intersection
+on data loaded with the row instead of re-tokenizing text on every call.
+
+This module must not import models: accounts.models uses it.
+"""
+import re
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset({
+    'the','and','a','an','of','to','in','for','with','on','at','by','from','as','is','are','be','this','that',
+    'it','or','we','our','you','your','their','they','he','she','his','her','them','us','i','have','has','had',
+    'will','can','may','must','should','would','could','about','over','under','into','out','up','down','new',
+    'role','job','position','responsibilities','requirements','preferred','experience','years','year'
+})
+
+
+def tokenize(*texts):
+    """Stopword-filtered set of alphanumeric tokens across `texts`."""
+    text = ' '.join(t for t in texts if t).lower()
+    return {t for t in TOKEN_RE.findall(text) if t not in STOPWORDS}
+
+
+def split_list(value):
+    """Entries of a comma-separated text field such as Profile.skills, stripped."""
+    return [s.strip() for s in (value or '').split(',') if s.strip()]
+
+
+def serialize(tokens):
+    return ' '.join(sorted(tokens))
+
+
+def parse(value):
+    return frozenset(value.split()) if value else frozenset()
+
+
+def job_token_string(job):
+    return serialize(tokenize(job.title, job.description))
+
+
+def profile_token_string(profile):
+    return serialize(tokenize(profile.skills, profile.experience))
+
+
+def job_tokens(job):
+    """A job's token set: the stored column, or computed for rows not yet backfilled."""
+    stored = getattr(job, 'match_tokens', '')
+    if stored:
+        return parse(stored)
+    return frozenset(tokenize(getattr(job, 'title', '') or '', getattr(job, 'description', '') or ''))
+
+
+def profile_tokens(profile):
+    """A profile's token set: the stored column, or computed for rows not yet backfilled."""
+    stored = getattr(profile, 'match_tokens', '')
+    if stored:
+        return parse(stored)
+    return frozenset(tokenize(getattr(profile, 'skills', '') or '', getattr(profile, 'experience', '') or ''))
+
+
+def overlap_score(job_tokens, cand_tokens):
+    """
+    Share (0-100) of the job's tokens that also appear in the candidate's.
+    Normalized by job token count to capture how much of the job text is
+    covered by the candidate's background.
+    """
+    if not job_tokens or not cand_tokens:
+        return 0
+    overlap = len(job_tokens & cand_tokens)
+    return max(0, min(100, (overlap / len(job_tokens)) * 100.0))
+
+
+def weighted_overlap_score(job_tokens, cand_tokens, weights):
+    """
+    overlap_score with every job token counted by its weight ({token:
+    weight}, e.g. IDF) instead of 1, so shared rare tokens count for more
+    than shared common ones.
+    """
+    if not job_tokens or not cand_tokens:
+        return 0
+    total = sum(weights[t] for t in job_tokens)
+    if total <= 0:
+        return 0
+    shared = sum(weights[t] for t in job_tokens & cand_tokens)
+    return max(0, min(100, (shared / total) * 100.0))
@@ -0,0 +1,54 @@
+import re
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The tokenizer as of this migration; jobs 0014 reindexes with its successor.
+TERM_RE = re.compile(r"[a-z0-9]+")
+
+
+def job_term_counts(*texts):
+    counts = Counter()
+    for text in texts:
+        counts.update(t[:64] for t in TERM_RE.findall((text or '').lower()))
+    return counts
+
+
+def index_existing_jobs(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobTerm = apps.get_model('jobs', 'JobTerm')
+    for job in Job.objects.iterator():
+        counts = job_term_counts(job.title, job.company, job.description, job.location)
+        JobTerm.objects.bulk_create(
+            JobTerm(term=term, job_id=job.pk, frequency=freq) for term, freq in counts.items()
+        )
+        Job.objects.filter(pk=job.pk).update(search_length=sum(counts.values()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='search_length',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='JobTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField(default=1)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='jobs.job')),
+            ],
+            options={
+                'unique_together': {('term', 'job')},
+            },
+        ),
+        migrations.RunPython(index_existing_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+from django.db import OperationalError, migrations
+
+# The FTS5 table and sync triggers as of this migration (jobs.fts recreates
+# missing triggers at runtime with its own, current, copy of this DDL).
+COLUMNS = 'title, company, description, location'
+NEW = 'new.id, new.title, new.company, new.description, new.location'
+OLD = "'delete', old.id, old.title, old.company, old.description, old.location"
+
+CREATE_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS jobs_job_fts USING fts5({COLUMNS}, content='jobs_job', content_rowid='id')",
+    f"""CREATE TRIGGER IF NOT EXISTS jobs_job_fts_ai AFTER INSERT ON jobs_job BEGIN
+        INSERT INTO jobs_job_fts(rowid, {COLUMNS}) VALUES ({NEW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS jobs_job_fts_ad AFTER DELETE ON jobs_job BEGIN
+        INSERT INTO jobs_job_fts(jobs_job_fts, rowid, {COLUMNS}) VALUES ({OLD});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS jobs_job_fts_au AFTER UPDATE OF {COLUMNS} ON jobs_job BEGIN
+        INSERT INTO jobs_job_fts(jobs_job_fts, rowid, {COLUMNS}) VALUES ({OLD});
+        INSERT INTO jobs_job_fts(rowid, {COLUMNS}) VALUES ({NEW});
+    END""",
+    "INSERT INTO jobs_job_fts(jobs_job_fts) VALUES ('rebuild')",
+]
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS jobs_job_fts_ai",
+    "DROP TRIGGER IF EXISTS jobs_job_fts_ad",
+    "DROP TRIGGER IF EXISTS jobs_job_fts_au",
+    "DROP TABLE IF EXISTS jobs_job_fts",
+]
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+        except OperationalError:
+            return False
+    return True
+
+
+def create_job_fts(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+
+
+def drop_job_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_job_fts, drop_job_fts),
+    ]
@@ -0,0 +1,47 @@
+import re
+
+from django.db import migrations, models
+
+# jobs.matching's tokenizer as of this migration
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset({
+    'the','and','a','an','of','to','in','for','with','on','at','by','from','as','is','are','be','this','that',
+    'it','or','we','our','you','your','their','they','he','she','his','her','them','us','i','have','has','had',
+    'will','can','may','must','should','would','could','about','over','under','into','out','up','down','new',
+    'role','job','position','responsibilities','requirements','preferred','experience','years','year'
+})
+
+
+def token_string(*texts):
+    text = ' '.join(t for t in texts if t).lower()
+    return ' '.join(sorted({t for t in TOKEN_RE.findall(text) if t not in STOPWORDS}))
+
+
+def backfill_match_tokens(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    batch = []
+    for job in Job.objects.only('pk', 'title', 'description').iterator(chunk_size=500):
+        job.match_tokens = token_string(job.title, job.description)
+        if job.match_tokens:
+            batch.append(job)
+        if len(batch) >= 500:
+            Job.objects.bulk_update(batch, ['match_tokens'])
+            batch = []
+    if batch:
+        Job.objects.bulk_update(batch, ['match_tokens'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_job_search_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='match_tokens',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_match_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_profile_match_tokens'),
+        ('jobs', '0007_job_match_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCandidateScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidate_scores', to='jobs.job')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_scores', to='accounts.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job', '-score', 'profile'], name='job_candidate_rank_idx')],
+                'unique_together': {('job', 'profile')},
+            },
+        ),
+    ]
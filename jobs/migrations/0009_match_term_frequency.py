@@ -0,0 +1,36 @@
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def count_existing_tokens(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Profile = apps.get_model('accounts', 'Profile')
+    MatchTermFrequency = apps.get_model('jobs', 'MatchTermFrequency')
+    counts = Counter()
+    for model in (Job, Profile):
+        for tokens in model.objects.values_list('match_tokens', flat=True).iterator():
+            counts.update({t[:64] for t in (tokens or '').split()})
+    MatchTermFrequency.objects.bulk_create(
+        (MatchTermFrequency(term=t, document_count=n) for t, n in counts.items()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_profile_match_tokens'),
+        ('jobs', '0008_job_candidate_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchTermFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, unique=True)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_existing_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+import hashlib
+import random
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# jobs.lsh's MinHash banding as of this migration
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+PRIME = (1 << 31) - 1
+_rng = random.Random(20240611)
+HASH_PARAMS = [(_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(NUM_BANDS * ROWS_PER_BAND)]
+
+
+def token_buckets(tokens):
+    """[(band, bucket)] for a token set ([] when empty)."""
+    if not tokens:
+        return []
+    xs = [int.from_bytes(hashlib.blake2b(t.encode(), digest_size=4).digest(), 'big') % PRIME for t in tokens]
+    sig = [min((a * x + b) % PRIME for x in xs) for a, b in HASH_PARAMS]
+    buckets = []
+    for band in range(NUM_BANDS):
+        rows = sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        raw = band.to_bytes(2, 'big') + b''.join(v.to_bytes(4, 'big') for v in rows)
+        digest = hashlib.blake2b(raw, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+
+def bucket_existing_profiles(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    CandidateBucket = apps.get_model('jobs', 'CandidateBucket')
+    rows = []
+    for pk, tokens in Profile.objects.values_list('pk', 'match_tokens').iterator():
+        rows.extend(
+            CandidateBucket(profile_id=pk, band=band, bucket=bucket)
+            for band, bucket in token_buckets(set((tokens or '').split()))
+        )
+        if len(rows) >= 10000:
+            CandidateBucket.objects.bulk_create(rows, batch_size=1000)
+            rows = []
+    CandidateBucket.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_profile_match_tokens'),
+        ('jobs', '0009_match_term_frequency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='accounts.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='candidate_bucket_idx')],
+                'unique_together': {('profile', 'band')},
+            },
+        ),
+        migrations.RunPython(bucket_existing_profiles, migrations.RunPython.noop),
+    ]
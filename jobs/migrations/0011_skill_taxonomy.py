@@ -0,0 +1,135 @@
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# jobs.skills' normalization and seed aliases as of this migration
+WORD_RE = re.compile(r"\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+MAX_KEY_LENGTH = 100
+MAX_PHRASE_WORDS = 4
+ALIASES = {
+    'JavaScript': ['js', 'ecmascript'],
+    'TypeScript': ['ts'],
+    'Python': ['py', 'python3'],
+    'C++': ['cpp'],
+    'C#': ['c sharp', 'csharp'],
+    '.NET': ['dotnet', '.net core'],
+    'Node.js': ['node', 'nodejs'],
+    'React': ['reactjs', 'react.js'],
+    'Vue.js': ['vue', 'vuejs'],
+    'Angular': ['angularjs', 'angular.js'],
+    'PostgreSQL': ['postgres'],
+    'MongoDB': ['mongo'],
+    'Kubernetes': ['k8s'],
+    'Amazon Web Services': ['aws'],
+    'Google Cloud Platform': ['gcp', 'google cloud'],
+    'Machine Learning': ['ml'],
+    'Natural Language Processing': ['nlp'],
+    'scikit-learn': ['sklearn'],
+}
+
+
+def normalize(name):
+    return ' '.join(WORD_RE.findall((name or '').lower()))[:MAX_KEY_LENGTH]
+
+
+def phrases(*texts):
+    found = set()
+    for text in texts:
+        words = WORD_RE.findall((text or '').lower())
+        for i in range(len(words)):
+            for j in range(i + 1, min(i + MAX_PHRASE_WORDS, len(words)) + 1):
+                found.add(' '.join(words[i:j]))
+    return found
+
+
+def link_existing_skills(apps, schema_editor):
+    Skill = apps.get_model('jobs', 'Skill')
+    SkillAlias = apps.get_model('jobs', 'SkillAlias')
+    ProfileSkill = apps.get_model('jobs', 'ProfileSkill')
+    JobSkill = apps.get_model('jobs', 'JobSkill')
+    Profile = apps.get_model('accounts', 'Profile')
+    Job = apps.get_model('jobs', 'Job')
+    aliases = {}
+
+    def skill_id(key, name):
+        if key not in aliases:
+            skill, _ = Skill.objects.get_or_create(key=key, defaults={'name': name[:MAX_KEY_LENGTH]})
+            SkillAlias.objects.create(alias=key, skill=skill)
+            aliases[key] = skill.pk
+        return aliases[key]
+
+    for name, spellings in ALIASES.items():
+        canonical = skill_id(normalize(name), name)
+        for key in {normalize(s) for s in spellings} - set(aliases):
+            SkillAlias.objects.create(alias=key, skill_id=canonical)
+            aliases[key] = canonical
+
+    rows = []
+    for pk, text in Profile.objects.values_list('pk', 'skills').iterator(chunk_size=1000):
+        ids = []
+        for name in (s.strip() for s in (text or '').split(',')):
+            key = normalize(name)
+            if key and skill_id(key, name) not in ids:
+                ids.append(aliases[key])
+        rows.extend(ProfileSkill(profile_id=pk, skill_id=s, position=i) for i, s in enumerate(ids))
+    ProfileSkill.objects.bulk_create(rows, batch_size=1000)
+
+    rows = []
+    for pk, title, description in Job.objects.values_list('pk', 'title', 'description').iterator(chunk_size=1000):
+        ids = {aliases[p] for p in phrases(title, description) if p in aliases}
+        rows.extend(JobSkill(job_id=pk, skill_id=s) for s in sorted(ids))
+    JobSkill.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_profile_match_tokens'),
+        ('jobs', '0010_candidate_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='jobs.skill')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfileSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='accounts.profile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_links', to='jobs.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'profile'], name='profile_skill_idx')],
+                'unique_together': {('profile', 'skill')},
+            },
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='jobs.job')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_links', to='jobs.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'job'], name='job_skill_idx')],
+                'unique_together': {('job', 'skill')},
+            },
+        ),
+        migrations.RunPython(link_existing_skills, migrations.RunPython.noop),
+    ]
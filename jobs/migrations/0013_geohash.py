@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(lat, lon, precision=9):
+    """jobs.geo.encode as of this migration."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, value, bits = [], 0, 0
+    for i in range(precision * 5):
+        interval, coord = (lon_range, lon) if i % 2 == 0 else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if coord >= mid:
+            value, interval[0] = value * 2 + 1, mid
+        else:
+            value, interval[1] = value * 2, mid
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            value, bits = 0, 0
+    return ''.join(chars)
+
+
+def hash_existing_coordinates(apps, schema_editor):
+    for model, lat, lon, field in (
+        ('Job', 'latitude', 'longitude', 'geohash'),
+        ('Application', 'applicant_latitude', 'applicant_longitude', 'applicant_geohash'),
+    ):
+        Model = apps.get_model('jobs', model)
+        rows = Model.objects.filter(**{f'{lat}__isnull': False, f'{lon}__isnull': False})
+        objs = [Model(pk=pk, **{field: encode(y, x)}) for pk, y, x in rows.values_list('pk', lat, lon).iterator()]
+        Model.objects.bulk_update(objs, [field], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_job_lat_lon_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_lat_lon_idx',
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='applicant_geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['applicant_geohash', 'applicant_latitude', 'applicant_longitude'], name='application_geohash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['geohash', 'latitude', 'longitude'], name='job_geohash_idx'),
+        ),
+        migrations.RunPython(hash_existing_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+import re
+from collections import Counter
+
+from django.db import migrations
+
+# jobs.search's tokenizer as of this migration: words keep the symbols of
+# names like c++, c# and .net, and are also indexed by their alphanumeric parts.
+TERM_RE = re.compile(r"\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+PART_RE = re.compile(r"[a-z0-9]+")
+
+
+def job_term_counts(*texts):
+    counts = Counter()
+    for text in texts:
+        for word in TERM_RE.findall((text or '').lower()):
+            word = word[:64]
+            counts[word] += 1
+            parts = PART_RE.findall(word)
+            if parts != [word]:
+                counts.update(parts)
+    return counts
+
+
+def reindex_jobs(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobTerm = apps.get_model('jobs', 'JobTerm')
+    JobTerm.objects.all().delete()
+    postings = []
+    for job in Job.objects.only('pk', 'title', 'company', 'description', 'location').iterator(chunk_size=500):
+        counts = job_term_counts(job.title, job.company, job.description, job.location)
+        postings.extend(JobTerm(term=t, job_id=job.pk, frequency=f) for t, f in counts.items())
+        Job.objects.filter(pk=job.pk).update(search_length=sum(counts.values()))
+        if len(postings) >= 500:
+            JobTerm.objects.bulk_create(postings)
+            postings = []
+    JobTerm.objects.bulk_create(postings)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_pending_rescore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='jobs_linked',
+            field=models.BooleanField(default=True),
+        ),
+    ]
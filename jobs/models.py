@@ -3,6 +3,8 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from . import geo, matching
+
 
 class Job(models.Model):
 	title = models.CharField(max_length=255)
@@ -13,6 +15,8 @@ class Job(models.Model):
 	# Optional geographic coordinates (latitude, longitude)
 	latitude = models.FloatField(null=True, blank=True)
 	longitude = models.FloatField(null=True, blank=True)
+	# Geohash of the coordinates for spatial lookups (see jobs.geo), kept in sync by save()
+	geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
 	# Salary range (optional)
 	salary_min = models.IntegerField(null=True, blank=True)
 	salary_max = models.IntegerField(null=True, blank=True)
@@ -23,11 +27,89 @@ class Job(models.Model):
 	]
 	visa_sponsorship = models.CharField(max_length=32, choices=VISA_CHOICES, default='none')
 	owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="jobs", null=True, blank=True)
+	# Number of indexed terms in the job's text; document length for BM25 ranking
+	search_length = models.PositiveIntegerField(default=0, editable=False)
+	# Stopword-filtered title + description tokens (see jobs.matching), kept in sync by save()
+	match_tokens = models.TextField(blank=True, default='', editable=False)
+
+	class Meta:
+		indexes = [
+			# Newest-first listing and keyset pagination
+			models.Index(fields=["posted_at"], name="job_posted_idx"),
+			# Search filters: sponsorship + recency, salary range overlap
+			models.Index(fields=["visa_sponsorship", "posted_at"], name="job_visa_posted_idx"),
+			models.Index(fields=["salary_min", "salary_max"], name="job_salary_idx"),
+			# Lets both arms of the range-overlap OR (see JobSearchFilterForm) use an index
+			models.Index(fields=["salary_max", "salary_min"], name="job_salary_max_idx"),
+			# Map queries: geohash cell ranges, covering the coordinates (see jobs.geo)
+			models.Index(fields=["geohash", "latitude", "longitude"], name="job_geohash_idx"),
+		]
+
+	def save(self, *args, **kwargs):
+		self.match_tokens = matching.job_token_string(self)
+		self.geohash = geo.encode(self.latitude, self.longitude)
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None:
+			update_fields = set(update_fields)
+			if {'title', 'description'} & update_fields:
+				update_fields.add('match_tokens')
+			if {'latitude', 'longitude'} & update_fields:
+				update_fields.add('geohash')
+			kwargs['update_fields'] = update_fields
+		super().save(*args, **kwargs)
 
 	def __str__(self):
 		return f"{self.title} @ {self.company or 'Unknown'}"
 
 
+class JobTerm(models.Model):
+	"""
+	Inverted-index posting: how often a term occurs in a job's searchable text.
+	Maintained by jobs.search whenever a Job is saved; removed with the Job.
+	"""
+	term = models.CharField(max_length=64)
+	job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="terms")
+	frequency = models.PositiveIntegerField(default=1)
+
+	class Meta:
+		# (term, job) doubles as the postings index used for term and prefix lookups
+		unique_together = ("term", "job")
+
+	def __str__(self):
+		return f"{self.term} -> job {self.job_id} ({self.frequency})"
+
+
+class CandidateBucket(models.Model):
+	"""
+	LSH bucket of a profile's MinHash signature: one row per band. Profiles
+	sharing a bucket with a job are likely to overlap it (see jobs.lsh).
+	"""
+	profile = models.ForeignKey("accounts.Profile", on_delete=models.CASCADE, related_name="lsh_buckets")
+	band = models.PositiveSmallIntegerField()
+	bucket = models.BigIntegerField()
+
+	class Meta:
+		unique_together = ("profile", "band")
+		indexes = [
+			models.Index(fields=["band", "bucket"], name="candidate_bucket_idx"),
+		]
+
+	def __str__(self):
+		return f"profile {self.profile_id} band {self.band}: {self.bucket}"
+
+
+class MatchTermFrequency(models.Model):
+	"""
+	Document frequency of a match token: how many Job and Profile rows have
+	it in their match_tokens. Maintained incrementally by jobs.idf.
+	"""
+	term = models.CharField(max_length=64, unique=True)
+	document_count = models.PositiveIntegerField(default=0)
+
+	def __str__(self):
+		return f"{self.term}: {self.document_count}"
+
+
 class Application(models.Model):
 	STATUS_CHOICES = [
         ('applied', 'Applied'),
@@ -46,6 +128,22 @@ class Application(models.Model):
 	applicant_location = models.CharField(max_length=255, blank=True)
 	applicant_latitude = models.FloatField(null=True, blank=True)
 	applicant_longitude = models.FloatField(null=True, blank=True)
+	applicant_geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
+
+	class Meta:
+		indexes = [
+			models.Index(
+				fields=["applicant_geohash", "applicant_latitude", "applicant_longitude"],
+				name="application_geohash_idx",
+			),
+		]
+
+	def save(self, *args, **kwargs):
+		self.applicant_geohash = geo.encode(self.applicant_latitude, self.applicant_longitude)
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None and {'applicant_latitude', 'applicant_longitude'} & set(update_fields):
+			kwargs['update_fields'] = {*update_fields, 'applicant_geohash'}
+		super().save(*args, **kwargs)
 
 	def __str__(self):
 		return f"{self.user.username} - {self.job.title} ({self.status})"
@@ -68,6 +166,96 @@ class SavedProfile(models.Model):
 		return f"{self.recruiter.username} saved {self.saved_user.username}"
 
 
+class JobCandidateScore(models.Model):
+	"""
+	Materialized recommendation: one of the top candidates for a job and
+	their match score. Kept up to date by jobs.recommendations.
+	"""
+	job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="candidate_scores")
+	profile = models.ForeignKey("accounts.Profile", on_delete=models.CASCADE, related_name="job_scores")
+	score = models.FloatField()
+
+	class Meta:
+		unique_together = ("job", "profile")
+		indexes = [
+			# A job's ranking, read one page at a time in this order
+			models.Index(fields=["job", "-score", "profile"], name="job_candidate_rank_idx"),
+		]
+
+	def __str__(self):
+		return f"job {self.job_id} -> profile {self.profile_id} ({self.score:.1f})"
+
+
+class PendingRescore(models.Model):
+	"""
+	Profile whose stored recommendations are out of date: queued by a save
+	that changed its tokens or candidacy, cleared by the
+	refresh_pending_recommendations command (see jobs.recommendations).
+	"""
+	profile = models.OneToOneField("accounts.Profile", on_delete=models.CASCADE, primary_key=True, related_name="+")
+	queued_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+	def __str__(self):
+		return f"profile {self.profile_id} queued {self.queued_at:%Y-%m-%d %H:%M}"
+
+
+class Skill(models.Model):
+	"""
+	Canonical skill that free-text skill lists are normalized onto (see
+	jobs.skills). `key` is the normalized spelling, `name` the display one.
+	"""
+	name = models.CharField(max_length=100)
+	key = models.CharField(max_length=100, unique=True)
+	# False until link_new_skills has linked it to the jobs predating it
+	jobs_linked = models.BooleanField(default=True)
+
+	def __str__(self):
+		return self.name
+
+
+class SkillAlias(models.Model):
+	"""A normalized spelling of a skill, including the skill's own key."""
+	alias = models.CharField(max_length=100, unique=True)
+	skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name="aliases")
+
+	def __str__(self):
+		return f"{self.alias} -> {self.skill_id}"
+
+
+class ProfileSkill(models.Model):
+	"""A skill from a profile's skills list, kept in sync by jobs.skills."""
+	profile = models.ForeignKey("accounts.Profile", on_delete=models.CASCADE, related_name="skill_links")
+	skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name="profile_links")
+	# place in the profile's own list
+	position = models.PositiveSmallIntegerField(default=0)
+
+	class Meta:
+		unique_together = ("profile", "skill")
+		indexes = [
+			# candidates having a given skill
+			models.Index(fields=["skill", "profile"], name="profile_skill_idx"),
+		]
+
+	def __str__(self):
+		return f"profile {self.profile_id} -> skill {self.skill_id}"
+
+
+class JobSkill(models.Model):
+	"""A known skill mentioned in a job's title or description (see jobs.skills)."""
+	job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="skill_links")
+	skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name="job_links")
+
+	class Meta:
+		unique_together = ("job", "skill")
+		indexes = [
+			# jobs asking for a given skill
+			models.Index(fields=["skill", "job"], name="job_skill_idx"),
+		]
+
+	def __str__(self):
+		return f"job {self.job_id} -> skill {self.skill_id}"
+
+
 class Message(models.Model):
 	"""
 	In-app messages between users. Stored here to avoid touching accounts.models.
@@ -0,0 +1,144 @@
+"""
+Cursor (keyset) pagination for search result pages.
+
+Instead of OFFSET, a page continues from the sort key of the last row the
+client saw, so fetching page N costs the same as fetching page 1 and only
+`per_page + 1` rows are ever loaded. Cursors are opaque url-safe strings.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+PAGE_SIZE = 20
+# Totals above this are reported as "COUNT_CAP+" rather than counted exactly
+COUNT_CAP = 1000
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the list of key values in `cursor`, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _after(ordering, values):
+    """Q selecting rows that sort strictly after `values` under `ordering`."""
+    cond = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        op = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{op}': values[i]})
+        for prev, value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev.lstrip('-'): value})
+        cond |= step
+    return cond
+
+
+def keyset_page(queryset, ordering, cursor=None, per_page=PAGE_SIZE):
+    """
+    One page of `queryset` ordered by `ordering` (field names, '-' for
+    descending; the last one must be unique, e.g. pk), starting after `cursor`.
+    """
+    qs = queryset.order_by(*ordering)
+    values = decode_cursor(cursor)
+    if values and len(values) == len(ordering):
+        if _field(qs.model, ordering[0].lstrip('-')).get_internal_type() == 'DateTimeField':
+            values[0] = parse_datetime(values[0]) if isinstance(values[0], str) else None
+        if values[0] is not None:
+            qs = qs.filter(_after(ordering, values))
+    rows = list(qs[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([_resolve(last, f.lstrip('-')) for f in ordering])
+    return KeysetPage(rows, next_cursor)
+
+
+def _field(model, path):
+    *relations, name = path.split('__')
+    for rel in relations:
+        model = model._meta.get_field(rel).related_model
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+def _resolve(obj, path):
+    for attr in path.split('__'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def id_list_page(ids, cursor=None, per_page=PAGE_SIZE):
+    """
+    One page of an already-ranked list of ids, continuing after the id in
+    `cursor`. Returns a KeysetPage of ids; the caller loads the objects.
+    """
+    start = 0
+    values = decode_cursor(cursor)
+    if values:
+        try:
+            start = ids.index(values[0]) + 1
+        except ValueError:
+            start = 0
+    page_ids = ids[start:start + per_page]
+    next_cursor = None
+    if start + per_page < len(ids):
+        next_cursor = encode_cursor([page_ids[-1]])
+    return KeysetPage(page_ids, next_cursor)
+
+
+def top_k_page(top, cursor=None, per_page=PAGE_SIZE):
+    """
+    One page of a ranking, continuing at the offset in `cursor`. `top(k)`
+    must return the best `k` items, best first; only as many as the page
+    needs (plus one, to know whether there is a next page) are selected.
+    """
+    start = 0
+    values = decode_cursor(cursor)
+    if values and isinstance(values[0], int) and values[0] > 0:
+        start = values[0]
+    items = top(start + per_page + 1)
+    next_cursor = None
+    if len(items) > start + per_page:
+        next_cursor = encode_cursor([start + per_page])
+    return KeysetPage(items[start:start + per_page], next_cursor)
+
+
+def capped_count(queryset, cap=COUNT_CAP):
+    """
+    (count, capped): an exact count up to `cap`, otherwise (cap, True).
+    Counting a LIMITed subquery keeps the cost bounded on large tables.
+    """
+    n = queryset.order_by()[:cap + 1].count()
+    return (cap, True) if n > cap else (n, False)
@@ -0,0 +1,183 @@
+"""
+Materialized job recommendations (JobCandidateScore).
+
+Each job keeps its RECOMMENDATION_STORE_SIZE best candidates with their
+match scores, so the recommendations page reads a pre-ranked page with one
+indexed query instead of rescoring the candidate pool on every visit.
+
+The store is built in bulk by the build_recommendations command and kept
+current by jobs.signals:
+
+- a job whose title or description changes is rescored against every
+  candidate (refresh_job, one pass of the scoring engine);
+- a profile whose tokens or candidacy change is queued (PendingRescore),
+  and the refresh_pending_recommendations command later rescores it
+  against every job (refresh_profile), moving it in, out of, or within each
+  job's ranking. A job is only rescored in full when its ranking may need
+  a candidate that is not stored, i.e. when a stored candidate drops out of
+  a full ranking. Until then the profile keeps its old stored scores.
+
+Scores use settings.MATCH_SCORING; rebuild after changing it. In 'tfidf'
+mode stored scores use the IDF weights of when they were computed.
+Jobs without stored rows are ranked live by the view until they are built.
+Applicants are not excluded here but when reading, as applications change
+far more often than job or profile text.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from . import lsh, matching, scoring
+from .models import Job, JobCandidateScore, PendingRescore
+
+DEFAULT_STORE_SIZE = 500
+
+
+def store_size():
+    return getattr(settings, 'RECOMMENDATION_STORE_SIZE', DEFAULT_STORE_SIZE)
+
+
+def is_candidate(profile):
+    return not profile.is_recruiter and profile.user.is_active
+
+
+def rank_candidates(job_tokens, k=None, exclude_user_ids=()):
+    """
+    [(profile_id, score)] for the best `k` candidates for a job's tokens:
+    exact over every candidate (the scoring engine) or, with
+    settings.RECOMMENDATION_RETRIEVAL = 'lsh', over an LSH shortlist.
+    """
+    if getattr(settings, 'RECOMMENDATION_RETRIEVAL', 'exact') == 'lsh':
+        return lsh.top(job_tokens, k, exclude_user_ids)
+    return scoring.engine.top(job_tokens, k, exclude_user_ids)
+
+
+def refresh_job(job):
+    """Replace `job`'s stored ranking with a fresh top-N of its candidates."""
+    from accounts.models import Profile
+
+    ranked = rank_candidates(matching.job_tokens(job), store_size())
+    # the engine's matrix may predate profiles deleted by another process
+    existing = set(Profile.objects.filter(pk__in=[pk for pk, _ in ranked]).values_list('pk', flat=True))
+    ranked = [(pk, score) for pk, score in ranked if pk in existing]
+    with transaction.atomic():
+        JobCandidateScore.objects.filter(job=job).delete()
+        JobCandidateScore.objects.bulk_create(
+            [JobCandidateScore(job_id=job.pk, profile_id=pk, score=score) for pk, score in ranked],
+            batch_size=500,
+        )
+    return len(ranked)
+
+
+def refresh_profile(profile):
+    """Rescore `profile` against every job and update the affected rankings."""
+    size = store_size()
+    stored = dict(JobCandidateScore.objects.filter(profile=profile).values_list('job_id', 'score'))
+    stats = {
+        row['job']: (row['n'], row['low'])
+        for row in JobCandidateScore.objects.values('job').annotate(n=Count('pk'), low=Min('score'))
+    }
+    scores = {}
+    if is_candidate(profile):
+        tokens = matching.profile_tokens(profile)
+        scores = {
+            job.pk: scoring.score(matching.job_tokens(job), tokens)
+            for job in Job.objects.only('pk', 'title', 'description', 'match_tokens').iterator()
+        }
+
+    upserts, full_refresh, trim = [], set(), set()
+    for job_id, score in scores.items():
+        n, low = stats.get(job_id, (0, None))
+        if n == 0:
+            # not materialized yet; read live until built
+            continue
+        if job_id in stored:
+            if n >= size and score < stored[job_id] and score <= low:
+                # may now rank below candidates that aren't stored
+                full_refresh.add(job_id)
+            else:
+                upserts.append(JobCandidateScore(job_id=job_id, profile_id=profile.pk, score=score))
+        elif n < size or score > low or (score == low and profile.pk < _last_profile_id(job_id, low)):
+            upserts.append(JobCandidateScore(job_id=job_id, profile_id=profile.pk, score=score))
+            if n >= size:
+                trim.add(job_id)
+    dropped = set(stored) - set(scores)
+    full_refresh |= {job_id for job_id in dropped if stats[job_id][0] >= size}
+
+    with transaction.atomic():
+        JobCandidateScore.objects.filter(profile=profile, job_id__in=dropped).delete()
+        JobCandidateScore.objects.bulk_create(
+            upserts, batch_size=500,
+            update_conflicts=True, unique_fields=['job', 'profile'], update_fields=['score'],
+        )
+        for job_id in trim:
+            _trim(job_id, size)
+    refill(full_refresh)
+
+
+def queue_profile(profile):
+    """Queue `profile` for refresh_pending(), or move it to the back of the queue."""
+    PendingRescore.objects.bulk_create(
+        [PendingRescore(profile_id=profile.pk, queued_at=timezone.now())],
+        update_conflicts=True, unique_fields=['profile'], update_fields=['queued_at'],
+    )
+
+
+def refresh_pending(limit=None, rebuild_over=None):
+    """
+    Refresh the queued profiles, oldest first (at most `limit`), or rebuild
+    every ranking when more than `rebuild_over` are queued. Profiles queued
+    again meanwhile stay queued. Returns how many were refreshed.
+    """
+    from accounts.models import Profile
+
+    started = timezone.now()
+    queued = list(PendingRescore.objects.order_by('queued_at').values_list('profile_id', 'queued_at')[:limit])
+    if rebuild_over is not None and len(queued) > rebuild_over:
+        rebuild()
+        return PendingRescore.objects.filter(queued_at__lte=started).delete()[0]
+    profiles = Profile.objects.select_related('user').in_bulk([pk for pk, _ in queued])
+    for profile_id, queued_at in queued:
+        if profile_id in profiles:
+            refresh_profile(profiles[profile_id])
+        PendingRescore.objects.filter(profile_id=profile_id, queued_at__lte=queued_at).delete()
+    return len(queued)
+
+
+def jobs_to_refill(profile):
+    """Jobs whose full ranking loses a candidate if `profile` goes away."""
+    full = (
+        JobCandidateScore.objects.values('job').annotate(n=Count('pk')).filter(n__gte=store_size())
+        .values('job')
+    )
+    return list(
+        JobCandidateScore.objects.filter(profile=profile, job__in=full).values_list('job_id', flat=True)
+    )
+
+
+def refill(job_ids):
+    for job in Job.objects.filter(pk__in=job_ids):
+        refresh_job(job)
+
+
+def _last_profile_id(job_id, score):
+    """Profile ranked last among the job's stored candidates with `score`."""
+    return (
+        JobCandidateScore.objects.filter(job_id=job_id, score=score)
+        .order_by('-profile_id').values_list('profile_id', flat=True).first()
+    )
+
+
+def _trim(job_id, size):
+    keep = JobCandidateScore.objects.filter(job_id=job_id).order_by('-score', 'profile_id')[:size]
+    JobCandidateScore.objects.filter(job_id=job_id).exclude(pk__in=keep.values('pk')).delete()
+
+
+def rebuild(jobs=None):
+    """Rebuild the stored rankings of `jobs` (default: all). Returns rows stored."""
+    jobs = Job.objects.all() if jobs is None else jobs
+    return sum(
+        refresh_job(job)
+        for job in jobs.only('pk', 'title', 'description', 'match_tokens').iterator()
+    )
@@ -0,0 +1,119 @@
+"""
+Parallel rescoring of every job's stored recommendations (JobCandidateScore),
+used by the rescore_recommendations command.
+
+The parent process writes the candidates' token sets once, as a CSR matrix
+of term ids (indptr / indices / profile ids as raw int arrays), to a
+temporary directory. Worker processes memory-map those files read-only
+instead of receiving pickled querysets, so only the small per-job task
+(job id, token ids, weights) and the top-N results cross process
+boundaries. Workers score with the same CandidateMatrix / CandidateList
+code as the live engine (jobs.scoring), so rankings are identical.
+
+Worker functions must not import models at module level: with the 'spawn'
+start method a worker imports this module before Django is set up.
+"""
+import mmap
+import os
+from array import array
+
+INDPTR_FILE = 'indptr.bin'
+INDICES_FILE = 'indices.bin'
+PROFILES_FILE = 'profiles.bin'
+
+_candidates = None
+_mmaps = []
+
+
+class IdentityVocabulary:
+    """Vocabulary for data that is already encoded as term ids 0..n-1."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, term):
+        return 0 <= term < self.size
+
+    def __getitem__(self, term):
+        return term
+
+
+def write_candidates(directory, rows):
+    """
+    Encode (profile_id, user_id, tokens) rows into the mmap files in
+    `directory`. Returns (vocabulary {token: id}, index typecode).
+    """
+    vocabulary = {}
+    indptr, indices, profiles = array('q', [0]), array('q'), array('q')
+    for profile_id, _, tokens in rows:
+        profiles.append(profile_id)
+        indices.extend(vocabulary.setdefault(t, len(vocabulary)) for t in tokens)
+        indptr.append(len(indices))
+    # 32-bit indices when they fit, which is what SciPy uses without copying
+    typecode = 'i' if len(indices) < 2 ** 31 else 'q'
+    for name, data in ((INDPTR_FILE, indptr), (INDICES_FILE, indices)):
+        with open(os.path.join(directory, name), 'wb') as f:
+            array(typecode, data).tofile(f)
+    with open(os.path.join(directory, PROFILES_FILE), 'wb') as f:
+        profiles.tofile(f)
+    return vocabulary, typecode
+
+
+def encode_job(tokens, vocabulary):
+    """Job tokens as term ids; tokens no candidate has get distinct negative ids."""
+    unknown = iter(range(-1, -len(tokens) - 1, -1))
+    return {t: vocabulary[t] if t in vocabulary else next(unknown) for t in tokens}
+
+
+def _map(directory, name, typecode):
+    with open(os.path.join(directory, name), 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(array(typecode))
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _mmaps.append(mm)
+    return memoryview(mm).cast(typecode)
+
+
+def init_worker(directory, vocabulary_size, typecode):
+    """Process pool initializer: map the candidate files and build the scorer."""
+    global _candidates
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    from . import scoring
+
+    indptr = _map(directory, INDPTR_FILE, typecode)
+    indices = _map(directory, INDICES_FILE, typecode)
+    profiles = _map(directory, PROFILES_FILE, 'q')
+    if scoring.sparse is not None:
+        np = scoring.np
+        index_dtype = np.int32 if typecode == 'i' else np.int64
+        indptr = np.frombuffer(indptr, dtype=index_dtype)
+        indices = np.frombuffer(indices, dtype=index_dtype)
+        matrix = scoring.sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int8), indices, indptr),
+            shape=(len(profiles), vocabulary_size),
+        )
+        ids = np.frombuffer(profiles, dtype=np.int64)
+        _candidates = scoring.CandidateMatrix(ids, ids, matrix, IdentityVocabulary(vocabulary_size))
+    else:
+        _candidates = scoring.CandidateList(
+            (profiles[i], profiles[i], indices[indptr[i]:indptr[i + 1]].tolist())
+            for i in range(len(profiles))
+        )
+
+
+def score_jobs(tasks, top_n):
+    """
+    Worker task: [(job_id, token ids, weights or None)] ->
+    [(job_id, [(profile_id, score)])] with each job's best `top_n`.
+    """
+    return [
+        (job_id, _candidates.top(frozenset(token_ids), top_n, weights=weights))
+        for job_id, token_ids, weights in tasks
+    ]
@@ -0,0 +1,303 @@
+"""
+Candidate scoring engine for job recommendations.
+
+Every active candidate's match tokens (jobs.matching) are held in a sparse
+candidate-by-term matrix with a 1 wherever the candidate has the term. A
+job's tokens become a 0/1 vector over the same vocabulary, so one sparse
+matrix-vector product gives every candidate's overlap count at once; the
+score is the same `overlap / len(job_tokens) * 100` as
+matching.overlap_score. Top-K selection uses argpartition instead of
+sorting everybody. Ties are ranked by profile pk.
+
+settings.MATCH_SCORING picks the score: 'overlap' counts every shared token
+equally; 'tfidf' weights each job token by its IDF (jobs.idf), giving
+matching.weighted_overlap_score. The matrix is the same for both; only the
+job vector changes from 0/1 to the token weights.
+
+NumPy and SciPy are optional: without them the engine keeps the token sets
+and scores them one by one, with identical results.
+
+Like the geo index the matrix is process-local and takes no inserts.
+Profiles saved by this process (jobs.signals) whose tokens or candidacy
+changed go to an overlay: their matrix row is masked and the saved tokens
+are scored one by one next to the matrix. The matrix is built on first
+use and rebuilt every SCORING_REBUILD_INTERVAL seconds (picking up other
+workers' changes), or once MAX_OVERLAY profiles are masked.
+"""
+import heapq
+import threading
+import time
+
+from django.conf import settings
+
+from . import idf, matching
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+DEFAULT_REBUILD_INTERVAL = 600
+MAX_OVERLAY = 256
+MODES = ('overlap', 'tfidf')
+DEFAULT_MODE = 'overlap'
+
+
+def get_mode(mode=None):
+    mode = mode or getattr(settings, 'MATCH_SCORING', DEFAULT_MODE)
+    if mode not in MODES:
+        raise ValueError(f"Unknown match scoring mode {mode!r}; expected one of {MODES}")
+    return mode
+
+
+def job_weights(job_tokens, mode=None):
+    """Token weights for `mode`, or None for the unweighted overlap score."""
+    if get_mode(mode) == 'overlap':
+        return None
+    return idf.frequencies.weights(job_tokens)
+
+
+def score(job_tokens, cand_tokens, mode=None):
+    """Match score (0-100) of one candidate's tokens for a job's tokens."""
+    weights = job_weights(job_tokens, mode)
+    if weights is None:
+        return matching.overlap_score(job_tokens, cand_tokens)
+    return matching.weighted_overlap_score(job_tokens, cand_tokens, weights)
+
+
+class CandidateMatrix:
+    """Sparse candidate-by-term matrix (requires NumPy and SciPy)."""
+
+    def __init__(self, profile_ids, user_ids, matrix, vocabulary):
+        self.profile_ids = np.asarray(profile_ids, dtype=np.int64)
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.matrix = matrix
+        self.vocabulary = vocabulary
+        self._terms = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (profile_id, user_id, token set) rows."""
+        profile_ids, user_ids, indices, indptr = [], [], [], [0]
+        vocabulary = {}
+        for profile_id, user_id, tokens in rows:
+            profile_ids.append(profile_id)
+            user_ids.append(user_id)
+            indices.extend(vocabulary.setdefault(t, len(vocabulary)) for t in tokens)
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(profile_ids), len(vocabulary)),
+        )
+        return cls(profile_ids, user_ids, matrix, vocabulary)
+
+    def __len__(self):
+        return len(self.profile_ids)
+
+    def candidate(self, profile_id):
+        """(user_id, token set) of a profile's row, or None when it has none."""
+        i = int(np.searchsorted(self.profile_ids, profile_id))
+        if i == len(self) or self.profile_ids[i] != profile_id:
+            return None
+        if self._terms is None:
+            self._terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        cols = self.matrix.indices[self.matrix.indptr[i]:self.matrix.indptr[i + 1]]
+        return int(self.user_ids[i]), frozenset(self._terms[j] for j in cols)
+
+    def scores(self, job_tokens, weights=None):
+        """Score of every candidate, in row order."""
+        if not job_tokens:
+            return np.zeros(len(self), dtype=np.float64)
+        cols = [self.vocabulary[t] for t in job_tokens if t in self.vocabulary]
+        if weights is None:
+            vector = np.zeros(len(self.vocabulary), dtype=np.int32)
+            vector[cols] = 1
+            return self.matrix @ vector / len(job_tokens) * 100.0
+        total = sum(weights[t] for t in job_tokens)
+        if total <= 0:
+            return np.zeros(len(self), dtype=np.float64)
+        vector = np.zeros(len(self.vocabulary), dtype=np.float64)
+        vector[cols] = [weights[t] for t in job_tokens if t in self.vocabulary]
+        return np.clip(self.matrix @ vector / total * 100.0, 0, 100)
+
+    def top(self, job_tokens, k=None, exclude_user_ids=(), weights=None, exclude_profile_ids=()):
+        """[(profile_id, score)] for the `k` best candidates (all when k is None)."""
+        scores = self.scores(job_tokens, weights)
+        keep = np.ones(len(self), dtype=bool)
+        if exclude_user_ids:
+            keep &= ~np.isin(self.user_ids, list(exclude_user_ids))
+        if exclude_profile_ids:
+            keep &= ~np.isin(self.profile_ids, list(exclude_profile_ids))
+        rows = np.flatnonzero(keep)
+        if k is not None and k < len(rows):
+            if k <= 0:
+                return []
+            candidate_scores = scores[rows]
+            # argpartition leaves ties at the cut-off in arbitrary order; keep
+            # everything above it plus the lowest-pk rows that tie with it
+            cutoff = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            above = rows[candidate_scores > cutoff]
+            tied = rows[candidate_scores == cutoff][:k - len(above)]
+            rows = np.concatenate([above, tied])
+        order = rows[np.lexsort((rows, -scores[rows]))]
+        return [(int(self.profile_ids[i]), float(scores[i])) for i in order]
+
+
+class CandidateList:
+    """Pure-Python fallback with the same interface as CandidateMatrix."""
+
+    def __init__(self, rows):
+        self.rows = [(profile_id, user_id, frozenset(tokens)) for profile_id, user_id, tokens in rows]
+        self._index = {profile_id: i for i, (profile_id, _, _) in enumerate(self.rows)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def candidate(self, profile_id):
+        i = self._index.get(profile_id)
+        return None if i is None else self.rows[i][1:]
+
+    def top(self, job_tokens, k=None, exclude_user_ids=(), weights=None, exclude_profile_ids=()):
+        exclude_user_ids = set(exclude_user_ids)
+        if weights is None:
+            score = matching.overlap_score
+        else:
+            def score(job_tokens, tokens):
+                return matching.weighted_overlap_score(job_tokens, tokens, weights)
+        scored = (
+            (-score(job_tokens, tokens), i)
+            for i, (profile_id, user_id, tokens) in enumerate(self.rows)
+            if user_id not in exclude_user_ids and profile_id not in exclude_profile_ids
+        )
+        best = sorted(scored) if k is None else heapq.nsmallest(k, scored)
+        return [(self.rows[i][0], float(-neg_score)) for neg_score, i in best]
+
+
+def build(rows):
+    """A CandidateMatrix when NumPy/SciPy are installed, else a CandidateList."""
+    if sparse is not None:
+        return CandidateMatrix.from_rows(rows)
+    return CandidateList(rows)
+
+
+def candidate_rows():
+    """(profile_id, user_id, token set) for every active candidate, by pk."""
+    from accounts.models import Profile
+
+    qs = (
+        Profile.objects.filter(is_recruiter=False, user__is_active=True)
+        .order_by('pk')
+        .only('pk', 'user_id', 'match_tokens', 'skills', 'experience')
+    )
+    for profile in qs.iterator(chunk_size=2000):
+        yield profile.pk, profile.user_id, matching.profile_tokens(profile)
+
+
+class ScoringEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # one build at a time
+        self._candidates = None
+        self._masked = set()  # profile ids whose matrix row is out of date
+        self._overlay = {}  # profile id -> (user_id, token set) saved since the build
+        self._pending = None  # profile id -> entry, saved while a build runs
+        self._built_at = 0.0
+
+    @property
+    def ready(self):
+        return self._candidates is not None
+
+    def invalidate(self):
+        self._candidates = None
+
+    def _stale(self):
+        interval = getattr(settings, 'SCORING_REBUILD_INTERVAL', DEFAULT_REBUILD_INTERVAL)
+        return (
+            not self.ready or len(self._masked) >= MAX_OVERLAY
+            or time.monotonic() - self._built_at > interval
+        )
+
+    def build(self):
+        with self._build_lock:
+            self._build()
+
+    def _build(self):
+        # callers hold self._build_lock
+        with self._lock:
+            self._pending = {}
+        try:
+            candidates = build(candidate_rows())
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._candidates, self._masked, self._overlay = candidates, set(), {}
+            # saves the build may have missed
+            for profile_id, entry in pending.items():
+                self._apply(profile_id, entry)
+            self._built_at = time.monotonic()
+
+    def candidates(self):
+        """The candidate matrix, built or rebuilt first if it is due."""
+        # while another thread rebuilds, keep scoring against the current one
+        if self._stale() and not (self.ready and self._build_lock.locked()):
+            with self._build_lock:
+                if self._stale():
+                    self._build()
+        return self._candidates
+
+    def _apply(self, profile_id, entry):
+        # callers hold self._lock
+        if self._candidates.candidate(profile_id) == entry:
+            self._masked.discard(profile_id)
+            self._overlay.pop(profile_id, None)
+            return
+        self._masked.add(profile_id)
+        if entry is None:
+            self._overlay.pop(profile_id, None)
+        else:
+            self._overlay[profile_id] = entry
+
+    def _record(self, profile_id, entry):
+        with self._lock:
+            if self._pending is not None:
+                self._pending[profile_id] = entry
+            if self.ready:
+                self._apply(profile_id, entry)
+
+    def update_profile(self, profile, user=None):
+        """Patch in a saved profile: its new tokens, or its removal when it is no longer a candidate."""
+        if not self.ready and self._pending is None:
+            # not built in this process yet; the first build reads the database
+            return
+        user = user or profile.user
+        active = user.is_active and not profile.is_recruiter
+        self._record(profile.pk, (profile.user_id, matching.profile_tokens(profile)) if active else None)
+
+    def remove_profile(self, profile):
+        self._record(profile.pk, None)
+
+    def _snapshot(self):
+        self.candidates()
+        with self._lock:
+            return self._candidates, set(self._masked), dict(self._overlay)
+
+    def top(self, job_tokens, k=None, exclude_user_ids=(), mode=None):
+        """[(profile_id, score)] for the best `k` candidates for a job's tokens."""
+        candidates, masked, overlay = self._snapshot()
+        weights = job_weights(job_tokens, mode)
+        ranked = candidates.top(job_tokens, k, exclude_user_ids, weights, masked)
+        if not overlay:
+            return ranked
+        saved = CandidateList((pk, user_id, tokens) for pk, (user_id, tokens) in sorted(overlay.items()))
+        merged = heapq.merge(
+            ranked, saved.top(job_tokens, k, exclude_user_ids, weights), key=lambda r: (-r[1], r[0]),
+        )
+        return list(merged)[:k] if k is not None else list(merged)
+
+
+engine = ScoringEngine()
@@ -0,0 +1,176 @@
+"""
+Inverted index over Job text with BM25 ranking.
+
+Every Job's title, company, description and location are tokenized into
+JobTerm postings (term, job, frequency) when the job is saved. A search then
+only reads the postings for the query terms instead of scanning every row
+of the jobs table with LIKE.
+"""
+import math
+import re
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count
+
+from .models import Job, JobTerm
+
+# Words, keeping the symbols of names like c++, c#, .net and node.js
+TERM_RE = re.compile(r"\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+PART_RE = re.compile(r"[a-z0-9]+")
+MAX_TERM_LENGTH = 64
+# Shorter query terms, and terms with symbols, match whole terms only: "c"
+# must not expand to every word starting with c
+MIN_PREFIX_LENGTH = 3
+# Fields that feed the index; saves touching none of them skip re-indexing
+INDEXED_FIELDS = ('title', 'company', 'description', 'location')
+
+# BM25 tuning constants (standard defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STATS_CACHE_KEY = 'search:job_stats'
+
+
+def words(text):
+    """Lowercased words of `text`, symbols included ("c++", ".net")."""
+    if not text:
+        return []
+    return [t[:MAX_TERM_LENGTH] for t in TERM_RE.findall(text.lower())]
+
+
+def tokenize(text):
+    """
+    Index terms of `text`: its words, each followed by its alphanumeric parts
+    when it has symbols ("node.js" also indexes "node" and "js").
+    """
+    terms = []
+    for word in words(text):
+        terms.append(word)
+        parts = PART_RE.findall(word)
+        if parts != [word]:
+            terms.extend(parts)
+    return terms
+
+
+def query_terms(q):
+    """
+    Split a raw query the same way the search box always has (commas and
+    whitespace), then normalize each token into index terms.
+    """
+    terms = []
+    for token in re.split(r'[,\s]+', q or ''):
+        for term in words(token):
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def is_prefix(term):
+    """Whether query `term` also matches longer terms starting with it."""
+    return len(term) >= MIN_PREFIX_LENGTH and PART_RE.fullmatch(term) is not None
+
+
+def job_term_counts(title='', company='', description='', location=''):
+    """Term frequencies for a job's searchable text."""
+    counts = Counter()
+    for value in (title, company, description, location):
+        counts.update(tokenize(value))
+    return counts
+
+
+def index_job(job):
+    """(Re)build the postings for a single job."""
+    counts = job_term_counts(job.title, job.company, job.description, job.location)
+    with transaction.atomic():
+        JobTerm.objects.filter(job=job).delete()
+        JobTerm.objects.bulk_create(
+            JobTerm(term=term, job=job, frequency=freq) for term, freq in counts.items()
+        )
+        # queryset update so we don't re-trigger post_save on the job
+        Job.objects.filter(pk=job.pk).update(search_length=sum(counts.values()))
+    job.search_length = sum(counts.values())
+    cache.delete(STATS_CACHE_KEY)
+
+
+def rebuild_index(batch_size=500):
+    """Index every job from scratch. Returns the number of jobs indexed."""
+    JobTerm.objects.all().delete()
+    total = 0
+    postings = []
+    for job in Job.objects.only('pk', *INDEXED_FIELDS).iterator(chunk_size=batch_size):
+        counts = job_term_counts(job.title, job.company, job.description, job.location)
+        postings.extend(JobTerm(term=t, job_id=job.pk, frequency=f) for t, f in counts.items())
+        Job.objects.filter(pk=job.pk).update(search_length=sum(counts.values()))
+        if len(postings) >= batch_size:
+            JobTerm.objects.bulk_create(postings, batch_size=batch_size)
+            postings = []
+        total += 1
+    if postings:
+        JobTerm.objects.bulk_create(postings, batch_size=batch_size)
+    cache.delete(STATS_CACHE_KEY)
+    return total
+
+
+def corpus_stats():
+    """(number of jobs, average document length), cached until the index changes."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        agg = Job.objects.aggregate(n=Count('id'), avgdl=Avg('search_length'))
+        stats = (agg['n'] or 0, agg['avgdl'] or 0.0)
+        cache.set(STATS_CACHE_KEY, stats, 60 * 60)
+    return stats
+
+
+def term_postings(term):
+    """
+    Postings for every indexed term starting with `term` (see is_prefix),
+    else for `term` itself. A plain range on the (term, job) index, so
+    partially typed words still match.
+    """
+    if not is_prefix(term):
+        return JobTerm.objects.filter(term=term)
+    return JobTerm.objects.filter(term__gte=term, term__lt=term + '\uffff')
+
+
+def search_job_ids(q):
+    """
+    Return job ids matching every term of `q`, best BM25 score first.
+    Returns None when `q` is blank (i.e. no text filter); a query with no
+    indexable terms (only punctuation, say) matches nothing.
+    """
+    terms = query_terms(q)
+    if not terms:
+        return [] if (q or '').strip() else None
+
+    n_docs, avgdl = corpus_stats()
+    avgdl = avgdl or 1.0
+
+    matched = None
+    per_term = []
+    for term in terms:
+        rows = list(
+            term_postings(term)
+            .values_list('job_id', 'term', 'frequency', 'job__search_length')
+        )
+        if not rows:
+            return []
+        per_term.append(rows)
+        ids = {row[0] for row in rows}
+        matched = ids if matched is None else matched & ids
+        if not matched:
+            return []
+
+    scores = dict.fromkeys(matched, 0.0)
+    for rows in per_term:
+        df = Counter(row[1] for row in rows)
+        for job_id, term, tf, dl in rows:
+            if job_id not in scores:
+                continue
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * (dl or 0) / avgdl)
+            scores[job_id] += idf * tf * (BM25_K1 + 1) / norm
+
+    # newer postings (higher ids) win ties
+    return sorted(scores, key=lambda pk: (scores[pk], pk), reverse=True)
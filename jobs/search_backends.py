@@ -0,0 +1,159 @@
+"""
+Pluggable full-text search backends for jobs and candidate profiles.
+
+The active backend is picked with settings.SEARCH_BACKEND (a dotted path):
+
+- IcontainsBackend: the original chained `__icontains` filters (LIKE scans).
+  Works on any database and is the reference the others are compared with.
+- InvertedIndexBackend: jobs come from the JobTerm postings (jobs.search);
+  profiles fall back to icontains.
+- FTS5Backend: SQLite FTS5 virtual tables kept in sync by triggers created
+  in migrations (jobs 0005, accounts 0007).
+
+Every backend answers two questions for each model: which rows match a raw
+query (`filter_*`, a lazy queryset usable in further filtering, admin search
+or aggregation) and in which order they should be listed (`search_jobs`, a
+list of ids, best match first).
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Job
+from . import search
+
+DEFAULT_SEARCH_BACKEND = 'jobs.search_backends.InvertedIndexBackend'
+
+JOB_TEXT_FIELDS = ('title', 'company', 'description', 'location')
+PROFILE_TEXT_FIELDS = (
+    'user__username', 'user__first_name', 'user__last_name', 'headline', 'bio',
+    'skills', 'experience', 'education', 'company', 'location',
+    'desired_positions', 'desired_companies',
+)
+
+
+def split_query(q):
+    """Raw query tokens, split on commas and whitespace."""
+    return [t for t in re.split(r'[,\s]+', (q or '').strip()) if t]
+
+
+class BaseSearchBackend:
+    name = None
+
+    def filter_jobs(self, queryset, q):
+        """Restrict a Job queryset to rows matching `q`."""
+        raise NotImplementedError
+
+    def filter_profiles(self, queryset, q):
+        """Restrict a Profile queryset to rows matching `q`."""
+        raise NotImplementedError
+
+    def search_jobs(self, q):
+        """
+        Ids of jobs matching `q`, best match first, or None when `q` holds
+        nothing to search for.
+        """
+        if not split_query(q):
+            return None
+        qs = self.filter_jobs(Job.objects.all(), q)
+        return list(qs.order_by('-posted_at', '-pk').values_list('pk', flat=True))
+
+
+class IcontainsBackend(BaseSearchBackend):
+    """Every token must appear (case-insensitively) in at least one field."""
+    name = 'icontains'
+
+    @staticmethod
+    def _token_filter(queryset, q, fields):
+        for t in split_query(q):
+            cond = Q()
+            for field in fields:
+                cond |= Q(**{f'{field}__icontains': t})
+            queryset = queryset.filter(cond)
+        return queryset
+
+    def filter_jobs(self, queryset, q):
+        return self._token_filter(queryset, q, JOB_TEXT_FIELDS)
+
+    def filter_profiles(self, queryset, q):
+        return self._token_filter(queryset, q, PROFILE_TEXT_FIELDS)
+
+
+class InvertedIndexBackend(IcontainsBackend):
+    """Jobs from the JobTerm postings with BM25 ranking; profiles via icontains."""
+    name = 'index'
+
+    def filter_jobs(self, queryset, q):
+        terms = search.query_terms(q)
+        if not terms and (q or '').strip():
+            return queryset.none()
+        for term in terms:
+            queryset = queryset.filter(pk__in=search.term_postings(term).values('job_id'))
+        return queryset
+
+    def search_jobs(self, q):
+        return search.search_job_ids(q)
+
+
+class FTS5Backend(BaseSearchBackend):
+    """
+    SQLite FTS5 full-text search. Requires the sqlite3 library to be built
+    with FTS5 (the default for current Python builds); the tables are only
+    created by the migrations when it is available.
+    """
+    name = 'fts5'
+    job_table = 'jobs_job_fts'
+    profile_table = 'accounts_profile_fts'
+
+    @staticmethod
+    def match_expression(q):
+        """
+        Every query term, prefix-matched when long enough (search.is_prefix);
+        FTS5 ANDs space-separated phrases.
+        """
+        return ' '.join(
+            f'"{term}"*' if search.is_prefix(term) else f'"{term}"' for term in search.query_terms(q)
+        )
+
+    def _filter(self, queryset, table, q):
+        expr = self.match_expression(q)
+        if not expr:
+            # a blank query is no filter; one with no indexable terms matches nothing
+            return queryset.none() if (q or '').strip() else queryset
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [expr])
+        )
+
+    def filter_jobs(self, queryset, q):
+        return self._filter(queryset, self.job_table, q)
+
+    def filter_profiles(self, queryset, q):
+        return self._filter(queryset, self.profile_table, q)
+
+    def search_jobs(self, q):
+        expr = self.match_expression(q)
+        if not expr:
+            return [] if (q or '').strip() else None
+        table = self.job_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s '
+                f'ORDER BY bm25({table}), rowid DESC',
+                [expr],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+_backends = {}
+
+
+def get_search_backend(path=None):
+    """Return the (shared) backend instance named by `path` or settings.SEARCH_BACKEND."""
+    path = path or getattr(settings, 'SEARCH_BACKEND', DEFAULT_SEARCH_BACKEND)
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
@@ -0,0 +1,115 @@
+"""
+Versioned cache of search results (lists of matching ids).
+
+Keys are built from the normalized, sorted query tokens, so "Python, Django"
+and "django python" share an entry. Each namespace ('jobs', 'profiles') has
+a version number that is part of every key; saving or deleting a Job or
+Profile bumps the version (see jobs.signals), which orphans all previous
+entries at once instead of having to find and delete them. Orphans simply
+expire after SEARCH_CACHE_TIMEOUT. Versions live in the default cache, which
+must be shared by all worker processes (see jobs.checks).
+"""
+import hashlib
+import json
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+NAMESPACES = ('jobs', 'profiles')
+DEFAULT_TIMEOUT = 300
+
+
+def normalize_tokens(q):
+    """Lowercased, de-duplicated, sorted tokens of `q` (commas/whitespace separated)."""
+    return sorted({t.lower() for t in re.split(r'[,\s]+', q or '') if t})
+
+
+def _version_key(namespace):
+    return f'search:version:{namespace}'
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # Seed from the clock so a version evicted from the cache can never
+        # come back as an old number whose entries are still around
+        cache.add(_version_key(namespace), time.time_ns(), None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def bump_version(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.add(_version_key(namespace), time.time_ns(), None)
+
+
+def _count(namespace, outcome):
+    key = f'search:stats:{namespace}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def cache_key(namespace, scope, tokens):
+    # the scope can hold user input (e.g. a skills filter), so it is hashed
+    # too: keys stay short and free of spaces and control characters
+    digest = hashlib.sha1(json.dumps([scope, tokens]).encode()).hexdigest()
+    return f'search:{namespace}:{get_version(namespace)}:{digest}'
+
+
+def cached_value(namespace, scope, tokens, compute):
+    """
+    Return `compute()` for the normalized query `tokens`, served from the
+    cache when it was computed under the namespace's current version.
+    None results are not cached.
+    """
+    key = cache_key(namespace, scope, tokens)
+    value = cache.get(key)
+    if value is not None:
+        _count(namespace, 'hits')
+        return value
+    _count(namespace, 'misses')
+    value = compute()
+    if value is not None:
+        cache.set(key, value, getattr(settings, 'SEARCH_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return value
+
+
+def cached_ids(namespace, scope, q, compute):
+    """
+    Return `compute()` (a list of ids, or None) for query `q`, served from the
+    cache when the same normalized query was answered under the current
+    version. `scope` separates different searches over one namespace, e.g.
+    which backend produced the ids.
+    """
+    tokens = normalize_tokens(q)
+    if not tokens:
+        return compute()
+    return cached_value(namespace, scope, tokens, lambda: _as_list(compute()))
+
+
+def _as_list(ids):
+    return None if ids is None else list(ids)
+
+
+def stats():
+    """Hit/miss counters and current version for every namespace."""
+    result = {}
+    for namespace in NAMESPACES:
+        hits = cache.get(f'search:stats:{namespace}:hits') or 0
+        misses = cache.get(f'search:stats:{namespace}:misses') or 0
+        lookups = hits + misses
+        result[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else None,
+            'version': get_version(namespace),
+        }
+    result['timeout'] = getattr(settings, 'SEARCH_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+    return result
@@ -0,0 +1,284 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import Profile
+from .models import Application, Job
+from . import (
+    autocomplete, fts, geoindex, idf, lsh, matching, recommendations, scoring, search, search_cache, skills, suggestions,
+    tiles,
+)
+
+# User fields that are part of a candidate's searchable text
+USER_SEARCH_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Job)
+def reindex_job(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Keep the job's search postings in sync with its text."""
+    if raw:
+        return
+    # e.g. the recruiter map only saves coordinates; nothing to re-index
+    if update_fields and not set(update_fields) & set(search.INDEXED_FIELDS):
+        return
+    search.index_job(instance)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_searches(sender, **kwargs):
+    search_cache.bump_version('jobs')
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_searches(sender, **kwargs):
+    search_cache.bump_version('profiles')
+
+
+@receiver(post_save, sender=Job)
+def update_job_completions(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not set(update_fields) & {'title', 'company', 'location'}):
+        return
+    autocomplete.index.update_job(instance)
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_completions(sender, instance, **kwargs):
+    autocomplete.index.remove_job(instance)
+
+
+@receiver(post_save, sender=Profile)
+def update_profile_completions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        autocomplete.index.update_profile(instance)
+
+
+@receiver(post_delete, sender=Profile)
+def remove_profile_completions(sender, instance, **kwargs):
+    autocomplete.index.remove_profile(instance)
+
+
+@receiver(post_save, sender=Job)
+def update_job_location(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not set(update_fields) & {'latitude', 'longitude'}):
+        return
+    geoindex.locations.update_job(instance)
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_location(sender, instance, **kwargs):
+    geoindex.locations.remove_job(instance)
+
+
+@receiver(pre_save, sender=Job)
+def remember_job_marker(sender, instance, raw=False, **kwargs):
+    """Note where the job was and what it was called, for the map tile versions."""
+    instance._previous_marker = None
+    if not raw and not instance._state.adding:
+        instance._previous_marker = sender.objects.filter(pk=instance.pk).values_list(
+            'latitude', 'longitude', 'title'
+        ).first()
+
+
+@receiver(post_save, sender=Job)
+def bump_job_tiles(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_marker', None)
+    positions = [(instance.latitude, instance.longitude)]
+    if previous:
+        positions.append(previous[:2])
+    tiles.bump('jobs', *positions)
+    if previous and previous != (instance.latitude, instance.longitude, instance.title):
+        # applicant markers show the job's title and distance
+        tiles.bump('applicants', *instance.applications.values_list('applicant_latitude', 'applicant_longitude'))
+
+
+@receiver(post_delete, sender=Job)
+def bump_deleted_job_tiles(sender, instance, **kwargs):
+    tiles.bump('jobs', (instance.latitude, instance.longitude))
+
+
+@receiver(pre_save, sender=Application)
+def remember_applicant_marker(sender, instance, raw=False, **kwargs):
+    instance._previous_marker = None
+    if not raw and not instance._state.adding:
+        instance._previous_marker = sender.objects.filter(pk=instance.pk).values_list(
+            'applicant_latitude', 'applicant_longitude'
+        ).first()
+
+
+@receiver(post_save, sender=Application)
+def bump_applicant_tiles(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_marker', None)
+    tiles.bump('applicants', (instance.applicant_latitude, instance.applicant_longitude), *filter(None, [previous]))
+
+
+@receiver(post_delete, sender=Application)
+def bump_deleted_applicant_tiles(sender, instance, **kwargs):
+    tiles.bump('applicants', (instance.applicant_latitude, instance.applicant_longitude))
+
+
+@receiver(pre_save, sender=Job)
+@receiver(pre_save, sender=Profile)
+def remember_match_tokens(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Note the stored tokens a save replaces, for the document frequencies."""
+    instance._previous_match_tokens = None
+    if raw or (update_fields is not None and 'match_tokens' not in update_fields):
+        return
+    if instance._state.adding:
+        instance._previous_match_tokens = ''
+    else:
+        previous = sender.objects.filter(pk=instance.pk).values_list('match_tokens', flat=True).first()
+        instance._previous_match_tokens = previous or ''
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Profile)
+def count_match_tokens(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_match_tokens', None)
+    if previous is None:
+        return
+    idf.record_change(matching.parse(previous), matching.parse(instance.match_tokens), 1 if created else 0)
+
+
+def match_tokens_changed(instance):
+    """Whether a save changed the stored tokens (a new row counts if it has any)."""
+    previous = getattr(instance, '_previous_match_tokens', None)
+    return previous is not None and previous != instance.match_tokens
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Profile)
+def uncount_match_tokens(sender, instance, **kwargs):
+    idf.record_change(matching.parse(instance.match_tokens), (), -1)
+
+
+@receiver(pre_save, sender=Profile)
+def remember_recruiter_flag(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Note whether the profile was a recruiter's; recruiters are not candidates."""
+    instance._was_recruiter = None
+    if raw or instance._state.adding or (update_fields is not None and 'is_recruiter' not in update_fields):
+        return
+    instance._was_recruiter = sender.objects.filter(pk=instance.pk).values_list('is_recruiter', flat=True).first()
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_active_flag(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Note whether the user was active; deactivated users drop out of the candidate pool."""
+    instance._was_active = None
+    if raw or instance._state.adding or (update_fields is not None and 'is_active' not in update_fields):
+        return
+    instance._was_active = sender.objects.filter(pk=instance.pk).values_list('is_active', flat=True).first()
+
+
+def candidacy_changed(profile):
+    """Whether a profile save changed its tokens or whether it is a candidate."""
+    previous_tokens = getattr(profile, '_previous_match_tokens', None)
+    was_recruiter = getattr(profile, '_was_recruiter', None)
+    return (
+        (previous_tokens is not None and previous_tokens != profile.match_tokens)
+        or (was_recruiter is not None and was_recruiter != profile.is_recruiter)
+    )
+
+
+@receiver(post_save, sender=Profile)
+def update_candidate_scores(sender, instance, created, raw=False, **kwargs):
+    if not raw and (created or candidacy_changed(instance)):
+        scoring.engine.update_profile(instance)
+
+
+@receiver(post_delete, sender=Profile)
+def remove_candidate_scores(sender, instance, **kwargs):
+    scoring.engine.remove_profile(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_candidacy_for_user(sender, instance, raw=False, **kwargs):
+    was_active = getattr(instance, '_was_active', None)
+    if raw or was_active is None or was_active == instance.is_active:
+        return
+    profile = Profile.objects.filter(user=instance).first()
+    if profile is not None:
+        scoring.engine.update_profile(profile, instance)
+        recommendations.queue_profile(profile)
+
+
+@receiver(post_save, sender=Job)
+def update_job_suggestions(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_match_tokens', None)
+    if raw or previous is None:
+        return
+    suggestions.postings.update_job(instance)
+    # profiles sharing a token with the old or new text may rank differently
+    suggestions.bump_terms(matching.parse(previous) | matching.parse(instance.match_tokens))
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_suggestions(sender, instance, **kwargs):
+    suggestions.postings.remove_job(instance)
+    suggestions.bump_terms(matching.parse(instance.match_tokens))
+
+
+@receiver(post_save, sender=Job)
+def refresh_job_recommendations(sender, instance, raw=False, **kwargs):
+    if raw or not match_tokens_changed(instance):
+        return
+    recommendations.refresh_job(instance)
+
+
+@receiver(post_save, sender=Job)
+def update_job_skills(sender, instance, raw=False, **kwargs):
+    if raw or not match_tokens_changed(instance):
+        return
+    skills.update_job(instance)
+
+
+@receiver(post_save, sender=Profile)
+def update_profile_skills(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and 'skills' not in update_fields):
+        return
+    skills.update_profile(instance)
+
+
+@receiver(post_save, sender=Profile)
+def update_candidate_buckets(sender, instance, raw=False, **kwargs):
+    if raw or not match_tokens_changed(instance):
+        return
+    lsh.update_profile(instance)
+
+
+@receiver(post_save, sender=Profile)
+def queue_profile_recommendations(sender, instance, created, raw=False, **kwargs):
+    # rescoring against every job is left to refresh_pending_recommendations
+    if not raw and (created or candidacy_changed(instance)):
+        recommendations.queue_profile(instance)
+
+
+@receiver(pre_delete, sender=Profile)
+def remember_profile_recommendations(sender, instance, **kwargs):
+    instance._refill_jobs = recommendations.jobs_to_refill(instance)
+
+
+@receiver(post_delete, sender=Profile)
+def refill_profile_recommendations(sender, instance, **kwargs):
+    # the deleted profile's rows went with it; top up the rankings it was in
+    recommendations.refill(getattr(instance, '_refill_jobs', ()))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_profile_search_for_user(sender, instance, update_fields=None, raw=False, using='default', **kwargs):
+    # logins save last_login only; don't throw the cache away for those
+    if raw or (update_fields and not set(update_fields) & USER_SEARCH_FIELDS):
+        return
+    fts.sync_profile_user(connections[using], instance.pk)
+    search_cache.bump_version('profiles')
+
+
+def drop_fts_triggers(sender, using='default', plan=None, **kwargs):
+    fts.drop_fts_triggers(connections[using], plan)
+
+
+def ensure_fts_triggers(sender, using='default', **kwargs):
+    """Put back the triggers dropped for migrate and resync the FTS tables."""
+    fts.ensure_fts(connections[using])
@@ -0,0 +1,272 @@
+"""
+Skill taxonomy: canonical Skill rows that free-text skills link to.
+
+Profile.skills is a comma-separated list typed by the candidate. Every entry
+is normalized (lowercased, punctuation other than + # . dropped, whitespace
+collapsed) and looked up in SkillAlias, which maps every known spelling,
+including each skill's own key, onto its Skill: "JS", "javascript" and
+" JavaScript" all land on JavaScript. Entries with no alias become new
+skills, unless every word is a stopword ("a", "the", "experience"); only
+the first MAX_PROFILE_SKILLS distinct entries count. The profile's skills
+are stored in ProfileSkill.
+
+Jobs have no skills list. JobSkill links a job to every known skill whose
+spelling appears as a run of up to MAX_PHRASE_WORDS words in its title or
+description. A newly created skill is not linked to the existing jobs
+that mention it by the save that created it: it is marked unlinked and
+the link_new_skills command finds those jobs later through the search
+postings (JobTerm). Until then job filters on it miss older jobs.
+
+Both link tables are indexed on (skill, ...), so "candidates knowing Python
+and Django" or "jobs asking for Kubernetes" are index lookups instead of
+LIKE scans over the text columns. Links are rewritten by jobs.signals when
+the text changes and rebuilt by the rebuild_skill_links command.
+"""
+import re
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count
+
+from . import matching, search, search_cache
+from .models import Job, JobSkill, JobTerm, ProfileSkill, Skill, SkillAlias
+
+WORD_RE = re.compile(r"\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+MAX_KEY_LENGTH = 100
+MAX_PHRASE_WORDS = 4
+MAX_PROFILE_SKILLS = 50
+# SQLite allows 999 query parameters
+LOOKUP_BATCH_SIZE = 900
+
+# Common alternative spellings, seeded into SkillAlias by rebuild()
+ALIASES = {
+    'JavaScript': ['js', 'ecmascript'],
+    'TypeScript': ['ts'],
+    'Python': ['py', 'python3'],
+    'C++': ['cpp'],
+    'C#': ['c sharp', 'csharp'],
+    '.NET': ['dotnet', '.net core'],
+    'Node.js': ['node', 'nodejs'],
+    'React': ['reactjs', 'react.js'],
+    'Vue.js': ['vue', 'vuejs'],
+    'Angular': ['angularjs', 'angular.js'],
+    'PostgreSQL': ['postgres'],
+    'MongoDB': ['mongo'],
+    'Kubernetes': ['k8s'],
+    'Amazon Web Services': ['aws'],
+    'Google Cloud Platform': ['gcp', 'google cloud'],
+    'Machine Learning': ['ml'],
+    'Natural Language Processing': ['nlp'],
+    'scikit-learn': ['sklearn'],
+}
+
+
+def normalize(name):
+    """Lookup key for a skill spelling ('' when nothing is left)."""
+    return ' '.join(WORD_RE.findall((name or '').lower()))[:MAX_KEY_LENGTH]
+
+
+def phrases(*texts):
+    """Every normalized run of up to MAX_PHRASE_WORDS consecutive words in `texts`."""
+    found = set()
+    for text in texts:
+        words = WORD_RE.findall((text or '').lower())
+        for i in range(len(words)):
+            for j in range(i + 1, min(i + MAX_PHRASE_WORDS, len(words)) + 1):
+                found.add(' '.join(words[i:j]))
+    return found
+
+
+def profile_keys(names):
+    """{key: display name} of the first MAX_PROFILE_SKILLS distinct entries in `names`."""
+    spellings = {}
+    for name in names:
+        key = normalize(name)
+        if key and key not in spellings:
+            if len(spellings) == MAX_PROFILE_SKILLS:
+                break
+            spellings[key] = name.strip()
+    return spellings
+
+
+def creatable(key):
+    """Whether an unknown spelling may become a new skill (not stopwords only)."""
+    return any(word not in matching.STOPWORDS for word in key.split())
+
+
+def lookup(keys):
+    """{key: skill id} for the `keys` that are known spellings."""
+    keys = list(keys)
+    found = {}
+    for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        found.update(
+            SkillAlias.objects.filter(alias__in=keys[i:i + LOOKUP_BATCH_SIZE]).values_list('alias', 'skill_id')
+        )
+    return found
+
+
+def resolve(names):
+    """Skill ids for free-text skill names, in order, creating unknown skills."""
+    spellings = profile_keys(names)
+    found = lookup(spellings)
+    ids = []
+    for key, name in spellings.items():
+        if key in found:
+            skill_id = found[key]
+        elif creatable(key):
+            skill_id = _create(key, name)
+        else:
+            continue
+        if skill_id not in ids:
+            ids.append(skill_id)
+    return ids
+
+
+def _create(key, name):
+    # jobs_linked=False: link_pending() links it to the jobs already mentioning it
+    with transaction.atomic():
+        skill, _ = Skill.objects.get_or_create(
+            key=key, defaults={'name': name[:MAX_KEY_LENGTH], 'jobs_linked': False},
+        )
+        SkillAlias.objects.get_or_create(alias=key, defaults={'skill': skill})
+    return skill.pk
+
+
+def link_pending(limit=None):
+    """Link the skills created since the last run to existing jobs. Returns (skills, links)."""
+    n_skills = n_links = 0
+    for skill in Skill.objects.filter(jobs_linked=False).order_by('pk')[:limit]:
+        n_links += link_existing_jobs(skill)
+        Skill.objects.filter(pk=skill.pk).update(jobs_linked=True)
+        n_skills += 1
+    return n_skills, n_links
+
+
+def link_existing_jobs(skill):
+    """Link a new skill to the jobs already mentioning it. Returns the number linked."""
+    terms = set(search.tokenize(skill.key))
+    if not terms or len(skill.key.split()) > MAX_PHRASE_WORDS:
+        return 0
+    # jobs with every word of the skill somewhere; checked for the phrase below
+    job_ids = (
+        JobTerm.objects.filter(term__in=terms)
+        .values('job_id')
+        .annotate(n=Count('term'))
+        .filter(n=len(terms))
+        .values('job_id')
+    )
+    jobs = Job.objects.filter(pk__in=job_ids).only('pk', 'title', 'description')
+    rows = [
+        JobSkill(job_id=job.pk, skill_id=skill.pk)
+        for job in jobs.iterator()
+        if skill.key in phrases(job.title, job.description)
+    ]
+    if rows:
+        JobSkill.objects.bulk_create(rows, ignore_conflicts=True)
+        search_cache.bump_version('jobs')
+    return len(rows)
+
+
+def update_profile(profile):
+    """Rewrite a profile's ProfileSkill rows from its skills text."""
+    ids = resolve(profile.skill_list)
+    with transaction.atomic():
+        ProfileSkill.objects.filter(profile_id=profile.pk).delete()
+        ProfileSkill.objects.bulk_create(
+            ProfileSkill(profile_id=profile.pk, skill_id=skill_id, position=i) for i, skill_id in enumerate(ids)
+        )
+
+
+def job_skill_ids(job):
+    return sorted(set(lookup(phrases(job.title, job.description)).values()))
+
+
+def update_job(job):
+    """Rewrite a job's JobSkill rows from its title and description."""
+    ids = job_skill_ids(job)
+    with transaction.atomic():
+        JobSkill.objects.filter(job_id=job.pk).exclude(skill_id__in=ids).delete()
+        JobSkill.objects.bulk_create((JobSkill(job_id=job.pk, skill_id=i) for i in ids), ignore_conflicts=True)
+
+
+def _filter(queryset, names, link_model, column):
+    keys = {normalize(name) for name in names} - {''}
+    found = lookup(keys)
+    if len(found) < len(keys):
+        # nobody has a skill that doesn't exist
+        return queryset.none()
+    for skill_id in set(found.values()):
+        queryset = queryset.filter(pk__in=link_model.objects.filter(skill_id=skill_id).values(column))
+    return queryset
+
+
+def filter_profiles(queryset, names):
+    """Narrow a Profile queryset to the profiles with every skill in `names`."""
+    return _filter(queryset, names, ProfileSkill, 'profile_id')
+
+
+def filter_jobs(queryset, names):
+    """Narrow a Job queryset to the jobs mentioning every skill in `names`."""
+    return _filter(queryset, names, JobSkill, 'job_id')
+
+
+def rebuild(apps=global_apps, batch_size=1000):
+    """
+    Seed ALIASES and relink every profile and job from scratch. Takes an app
+    registry so the data migration can run it on historical models. Returns
+    (number of skills, profile links, job links).
+    """
+    Skill = apps.get_model('jobs', 'Skill')
+    SkillAlias = apps.get_model('jobs', 'SkillAlias')
+    ProfileSkill = apps.get_model('jobs', 'ProfileSkill')
+    JobSkill = apps.get_model('jobs', 'JobSkill')
+    Profile = apps.get_model('accounts', 'Profile')
+    Job = apps.get_model('jobs', 'Job')
+
+    aliases = dict(SkillAlias.objects.values_list('alias', 'skill_id'))
+
+    def skill_id(key, name):
+        if key not in aliases:
+            if not creatable(key):
+                return None
+            skill, _ = Skill.objects.get_or_create(key=key, defaults={'name': name[:MAX_KEY_LENGTH]})
+            SkillAlias.objects.create(alias=key, skill=skill)
+            aliases[key] = skill.pk
+        return aliases[key]
+
+    with transaction.atomic():
+        for name, spellings in ALIASES.items():
+            canonical = skill_id(normalize(name), name)
+            for key in {normalize(s) for s in spellings} - set(aliases):
+                SkillAlias.objects.create(alias=key, skill_id=canonical)
+                aliases[key] = canonical
+
+        ProfileSkill.objects.all().delete()
+        profile_links, rows = 0, []
+        for pk, text in Profile.objects.values_list('pk', 'skills').iterator(chunk_size=batch_size):
+            ids = []
+            for key, name in profile_keys(matching.split_list(text)).items():
+                found = skill_id(key, name)
+                if found is not None and found not in ids:
+                    ids.append(found)
+            rows.extend(ProfileSkill(profile_id=pk, skill_id=s, position=i) for i, s in enumerate(ids))
+            if len(rows) >= batch_size:
+                ProfileSkill.objects.bulk_create(rows)
+                profile_links, rows = profile_links + len(rows), []
+        ProfileSkill.objects.bulk_create(rows)
+        profile_links += len(rows)
+
+        JobSkill.objects.all().delete()
+        job_links, rows = 0, []
+        for pk, title, description in Job.objects.values_list('pk', 'title', 'description').iterator(chunk_size=batch_size):
+            ids = {aliases[p] for p in phrases(title, description) if p in aliases}
+            rows.extend(JobSkill(job_id=pk, skill_id=s) for s in sorted(ids))
+            if len(rows) >= batch_size:
+                JobSkill.objects.bulk_create(rows)
+                job_links, rows = job_links + len(rows), []
+        JobSkill.objects.bulk_create(rows)
+        job_links += len(rows)
+        # every job was just linked against every skill
+        Skill.objects.filter(jobs_linked=False).update(jobs_linked=True)
+
+    return Skill.objects.count(), profile_links, job_links
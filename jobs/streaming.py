@@ -0,0 +1,73 @@
+"""
+Streaming JSON and CSV responses for large result sets.
+
+The response body is produced while rows are still being read (feed these
+from queryset.iterator(chunk_size=CHUNK_SIZE) over a .values() projection),
+CHUNK_SIZE rows per write, so memory stays constant and the first bytes go
+out before the last row is fetched. Views wrap them in Django's gzip_page,
+which compresses the stream on the fly for clients sending
+Accept-Encoding: gzip.
+
+A failure half-way through can only cut the body short: the status line
+has already been sent.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CHUNK_SIZE = 1000
+
+
+def batched(iterable, size=CHUNK_SIZE):
+    """Lists of up to `size` consecutive items of `iterable`."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def iter_json(key, rows, extra=None):
+    """
+    The JSON text of {key: [rows...], **extra}, in chunks of CHUNK_SIZE rows.
+    Callable values in `extra` are called once the rows are exhausted, so
+    they may depend on them (e.g. whether a limit cut anything off).
+    """
+    yield '{' + json.dumps(key) + ': ['
+    first = True
+    for batch in batched(rows):
+        body = json.dumps(batch, cls=DjangoJSONEncoder)[1:-1]
+        yield body if first else ', ' + body
+        first = False
+    yield ']'
+    for name, value in (extra or {}).items():
+        value = value() if callable(value) else value
+        yield ', ' + json.dumps(name) + ': ' + json.dumps(value, cls=DjangoJSONEncoder)
+    yield '}'
+
+
+def json_response(key, rows, **extra):
+    """StreamingHttpResponse of {key: [rows...], **extra} (see iter_json)."""
+    return StreamingHttpResponse(iter_json(key, rows, extra), content_type='application/json')
+
+
+class _Echo:
+    """File-like object whose write() returns the text, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(filename, header, rows):
+    """StreamingHttpResponse of a CSV attachment: `header`, then `rows` (sequences)."""
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for batch in batched(rows):
+            yield ''.join(writer.writerow(row) for row in batch)
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,133 @@
+"""
+Job suggestions for a candidate: the reverse of the recommendations engine.
+
+Jobs are ranked for a profile with the same score as calculate_match_score
+(share of the job's match tokens the candidate has, optionally IDF
+weighted; see jobs.scoring). Instead of LIKE-scanning the jobs table, an
+in-memory term -> job ids postings index over Job.match_tokens is walked
+for the profile's tokens only, so just the jobs sharing a token are ever
+scored.
+
+Like the autocomplete index, the postings are process-local: built on first
+use, patched by Job signals for this process's saves (jobs.signals) and
+rebuilt every SCORING_REBUILD_INTERVAL seconds.
+
+Results are cached per profile, keyed by the profile's tokens and a version
+number per token, bumped whenever a job carrying that token is
+saved or deleted, so an entry lives until the profile changes or a job that
+could match it does.
+"""
+import hashlib
+import heapq
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import matching, scoring
+from .models import Job
+
+DEFAULT_LIMIT = 20
+DEFAULT_REBUILD_INTERVAL = 600
+
+
+class JobPostings:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = None  # term -> set of job ids
+        self._tokens = {}  # job id -> frozenset of tokens
+        self._built_at = 0.0
+
+    @property
+    def ready(self):
+        return self._postings is not None
+
+    def build(self):
+        postings, tokens = defaultdict(set), {}
+        for job in Job.objects.only('pk', 'title', 'description', 'match_tokens').iterator():
+            tokens[job.pk] = matching.job_tokens(job)
+            for term in tokens[job.pk]:
+                postings[term].add(job.pk)
+        with self._lock:
+            self._postings, self._tokens = postings, tokens
+            self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        interval = getattr(settings, 'SCORING_REBUILD_INTERVAL', DEFAULT_REBUILD_INTERVAL)
+        if not self.ready or time.monotonic() - self._built_at > interval:
+            self.build()
+
+    def _replace(self, job_id, tokens):
+        if not self.ready:
+            return
+        with self._lock:
+            for term in self._tokens.pop(job_id, ()):
+                self._postings[term].discard(job_id)
+            if tokens:
+                self._tokens[job_id] = tokens
+                for term in tokens:
+                    self._postings[term].add(job_id)
+
+    def update_job(self, job):
+        self._replace(job.pk, matching.job_tokens(job))
+
+    def remove_job(self, job):
+        self._replace(job.pk, frozenset())
+
+    def top(self, tokens, k=DEFAULT_LIMIT, mode=None):
+        """[(job_id, score)] for the `k` best jobs for a candidate's tokens."""
+        self._ensure_fresh()
+        with self._lock:
+            job_ids = set().union(*(self._postings.get(term, ()) for term in tokens))
+            job_tokens = {job_id: self._tokens[job_id] for job_id in job_ids}
+        scored = ((-scoring.score(job_tokens[job_id], tokens, mode), -job_id) for job_id in job_ids)
+        # ties: newest job (highest pk) first
+        return [(-neg_job, -neg_score) for neg_score, neg_job in heapq.nsmallest(k, scored)]
+
+
+postings = JobPostings()
+
+
+def _term_version_keys(terms):
+    return {f'suggest:term:{t[:64]}': t for t in terms}
+
+
+def bump_terms(terms):
+    """Invalidate cached suggestions of every profile sharing one of `terms`."""
+    keys = list(_term_version_keys(terms))
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def _cache_key(tokens, mode, k):
+    keys = _term_version_keys(tokens)
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        # seed from the clock, as in jobs.search_cache, so a version evicted
+        # from the cache never reuses an old number
+        for key, value in missing.items():
+            cache.add(key, value, None)
+        versions.update(cache.get_many(list(missing)))
+    raw = '\x1f'.join(f'{keys[key]}={versions.get(key)}' for key in sorted(keys))
+    digest = hashlib.sha1(f'{mode}:{k}:{raw}'.encode()).hexdigest()
+    return f'suggest:profile:{digest}'
+
+
+def suggest_for_profile(profile, k=DEFAULT_LIMIT):
+    """[(job_id, score)] for the `k` best jobs for `profile`, best first."""
+    tokens = matching.profile_tokens(profile)
+    if not tokens:
+        return []
+    mode = scoring.get_mode()
+    key = _cache_key(tokens, mode, k)
+    ranked = cache.get(key)
+    if ranked is None:
+        ranked = postings.top(tokens, k, mode)
+        cache.set(key, ranked, getattr(settings, 'SEARCH_CACHE_TIMEOUT', 300))
+    return ranked
@@ -1,3 +1,1595 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+from array import array
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.checks import registry
+from django.core.management import call_command
+from django.db import connection, migrations, models
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from .forms import JobSearchFilterForm
+from .matching import job_tokens, overlap_score, weighted_overlap_score
+from .models import (
+    Application, Job, JobCandidateScore, JobSkill, JobTerm, MatchTermFrequency, PendingRescore, ProfileSkill,
+    SavedProfile, Skill,
+)
+from .views import calculate_match_score
+from . import (
+    autocomplete, checks, clusters, columnar, facets, fts, geo, geocoding, geoindex, idf, lsh, recommendations,
+    scoring, search, search_backends, search_cache, signals, skills, streaming, suggestions, tiles,
+)
+
+
+
+def streamed_json(response):
+    """Parsed body of a JSON response, streaming (jobs.streaming) or not."""
+    return json.loads(b''.join(response.streaming_content)) if response.streaming else response.json()
+
+
+class JobSearchIndexTests(TestCase):
+    def ids(self, q):
+        return search.search_job_ids(q)
+
+    def test_bm25_ranking(self):
+        once = Job.objects.create(title='Developer', description='Python and a long list of other duties ' * 3)
+        twice = Job.objects.create(title='Python developer', description='Python')
+        Job.objects.create(title='Accountant')
+        self.assertEqual(self.ids('python'), [twice.pk, once.pk])
+        # every term must match; the rarer term weighs more
+        rare = Job.objects.create(title='Django developer', description='Python')
+        self.assertEqual(self.ids('python django'), [rare.pk])
+        self.assertEqual(self.ids('developer django')[0], rare.pk)
+        self.assertEqual(self.ids('cobol'), [])
+        self.assertIsNone(self.ids('  '))
+        self.assertEqual(self.ids(' , '), [])
+
+    def test_prefix_and_symbol_terms(self):
+        kube = Job.objects.create(title='Kubernetes engineer')
+        cpp = Job.objects.create(title='C++ developer')
+        csharp = Job.objects.create(title='C# developer')
+        dotnet = Job.objects.create(title='.NET developer')
+        node = Job.objects.create(title='Node.js developer')
+        Job.objects.create(title='Cloud engineer', description='Ruby')
+        self.assertEqual(self.ids('kube'), [kube.pk])
+        self.assertEqual(self.ids('C++'), [cpp.pk])
+        self.assertEqual(self.ids('c#'), [csharp.pk])
+        self.assertEqual(self.ids('.net'), [dotnet.pk])
+        self.assertEqual(set(self.ids('node')), {node.pk})
+        self.assertEqual(set(self.ids('js')), {node.pk})
+        # short terms match whole words only: "c" is the language, not every word starting with c
+        self.assertEqual(set(self.ids('c')), {cpp.pk, csharp.pk})
+        self.assertEqual(self.ids('ku'), [])
+
+        backend = search_backends.InvertedIndexBackend()
+        self.assertEqual(set(backend.filter_jobs(Job.objects.all(), 'c++').values_list('pk', flat=True)), {cpp.pk})
+        self.assertEqual(search_backends.FTS5Backend.match_expression('C++ kube'), '"c++" "kube"*')
+
+    def test_query_without_terms_matches_nothing(self):
+        Job.objects.create(title='Python developer')
+        Job.objects.create(title='The job')
+        for backend in ['IcontainsBackend', 'InvertedIndexBackend', 'FTS5Backend']:
+            with self.settings(SEARCH_BACKEND=f'jobs.search_backends.{backend}'):
+                for q in ['!!!', '- ?']:
+                    response = self.client.get(reverse('jobs:search'), {'q': q})
+                    self.assertEqual(list(response.context['jobs']), [], (backend, q))
+                    self.assertEqual(response.context['total_count'], 0, (backend, q))
+                self.assertEqual(len(self.client.get(reverse('jobs:search'), {'q': ' '}).context['jobs']), 2)
+
+    def test_reindexed_on_save_and_delete(self):
+        job = Job.objects.create(title='Python developer')
+        job.title = 'Rust developer'
+        job.save()
+        self.assertEqual(self.ids('python'), [])
+        self.assertEqual(self.ids('rust'), [job.pk])
+        job.delete()
+        self.assertFalse(JobTerm.objects.exists())
+
+
+class FTS5SyncTests(TestCase):
+    def setUp(self):
+        if not fts.fts5_available(connection):
+            self.skipTest('SQLite without FTS5')
+        self.backend = search_backends.FTS5Backend()
+
+    def jobs(self, q):
+        return list(self.backend.filter_jobs(Job.objects.order_by('pk'), q).values_list('pk', flat=True))
+
+    def profiles(self, q):
+        return list(self.backend.filter_profiles(Profile.objects.order_by('pk'), q).values_list('pk', flat=True))
+
+    def test_triggers_follow_inserts_updates_and_deletes(self):
+        job = Job.objects.create(title='Haskell developer', company='Acme')
+        self.assertEqual(self.jobs('haskell'), [job.pk])
+        job.title = 'Elixir developer'
+        job.save()
+        self.assertEqual(self.jobs('haskell'), [])
+        self.assertEqual(self.jobs('elixir acme'), [job.pk])
+        self.assertEqual(self.backend.search_jobs('elixir'), [job.pk])
+        job.delete()
+        self.assertEqual(self.jobs('elixir'), [])
+
+        user = User.objects.create_user('zebedee')
+        profile, _ = Profile.objects.update_or_create(user=user, defaults={'skills': 'Erlang'})
+        self.assertEqual(self.profiles('erlang zebedee'), [profile.pk])
+        user.first_name = 'Florence'
+        user.save()
+        self.assertEqual(self.profiles('florence'), [profile.pk])
+        profile.delete()
+        self.assertEqual(self.profiles('erlang'), [])
+
+    def ghost(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM accounts_profile_fts WHERE rowid = 999999")
+            return cursor.fetchone()[0]
+
+    def test_survives_migrate(self):
+        # a row only a rebuild would remove
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO accounts_profile_fts(rowid, username) VALUES (999999, 'ghost')")
+        call_command('migrate', verbosity=0)
+        self.assertEqual(self.ghost(), 1)
+        job = Job.objects.create(title='Haskell developer')
+        self.assertEqual(self.jobs('haskell'), [job.pk])
+
+        # a plan altering a source table drops the triggers; post_migrate restores and resyncs
+        alter = migrations.Migration('9999_alter_job', 'jobs')
+        alter.operations = [migrations.AlterField('job', 'title', models.CharField(max_length=300))]
+        signals.drop_fts_triggers(None, plan=[(alter, False)])
+        Job.objects.filter(pk=job.pk).update(title='Elixir developer')
+        self.assertEqual(self.jobs('elixir'), [])
+        signals.ensure_fts_triggers(None)
+        self.assertEqual(self.jobs('elixir'), [job.pk])
+        self.assertEqual(self.ghost(), 0)
+        job.delete()
+        self.assertEqual(self.jobs('elixir'), [])
+
+
+class KeysetPaginationTests(TestCase):
+    def test_job_pages_stable_across_inserts(self):
+        jobs = [Job.objects.create(title=f'Job {i}') for i in range(25)]
+        first = self.client.get(reverse('jobs:search')).context
+        self.assertEqual([j.pk for j in first['jobs']], [j.pk for j in reversed(jobs)][:20])
+        self.assertEqual(first['total_count'], 25)
+        # a job posted meanwhile sorts before the cursor: no repeats, no gaps
+        Job.objects.create(title='Newer')
+        second = self.client.get(reverse('jobs:search'), {'cursor': first['page'].next_cursor}).context
+        self.assertEqual([j.pk for j in second['jobs']], [j.pk for j in reversed(jobs)][20:])
+        self.assertFalse(second['page'].has_next)
+        # a malformed cursor starts over
+        self.assertEqual(len(self.client.get(reverse('jobs:search'), {'cursor': '!!'}).context['jobs']), 20)
+
+    def test_candidate_pages_stable_across_inserts(self):
+        recruiter = User.objects.create_user('recruiter')
+        Profile.objects.update_or_create(user=recruiter, defaults={'is_recruiter': True})
+        self.client.force_login(recruiter)
+
+        def candidate(username):
+            user = User.objects.create_user(username)
+            Profile.objects.update_or_create(user=user, defaults={'skills': 'Golang'})
+            return user.profile.pk
+
+        ids = [candidate(f'cand{i:02}') for i in range(25)]
+        Profile.objects.filter(pk=candidate('other')).update(skills='Cobol')
+        url = reverse('accounts:find_applicants')
+        first = self.client.get(url, {'q': 'golang'}).context
+        self.assertEqual([p.pk for p in first['profiles']], ids[:20])
+        self.assertEqual((first['total_count'], first['count_capped']), (25, False))
+
+        candidate('cand095')  # sorts before the cursor
+        late = candidate('zed')  # sorts after it
+        second = self.client.get(url, {'q': 'golang', 'cursor': first['page'].next_cursor}).context
+        self.assertEqual([p.pk for p in second['profiles']], ids[20:] + [late])
+
+
+class SearchCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_bump_on_saves(self):
+        jobs, profiles = search_cache.get_version('jobs'), search_cache.get_version('profiles')
+        job = Job.objects.create(title='Python developer')
+        self.assertGreater(search_cache.get_version('jobs'), jobs)
+        self.assertEqual(search_cache.get_version('profiles'), profiles)
+
+        user = User.objects.create_user('candidate')
+        profile, _ = Profile.objects.get_or_create(user=user)
+        profiles = search_cache.get_version('profiles')
+        profile.skills = 'Python'
+        profile.save()
+        self.assertGreater(search_cache.get_version('profiles'), profiles)
+        # a login only touches last_login
+        profiles = search_cache.get_version('profiles')
+        user.save(update_fields=['last_login'])
+        self.assertEqual(search_cache.get_version('profiles'), profiles)
+
+        jobs = search_cache.get_version('jobs')
+        job.delete()
+        self.assertGreater(search_cache.get_version('jobs'), jobs)
+
+    def test_results_cached_per_normalized_query_until_a_save(self):
+        first = Job.objects.create(title='Python Django developer')
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return search.search_job_ids('python django')
+
+        self.assertEqual(search_cache.cached_ids('jobs', 'test', 'Python, Django', compute), [first.pk])
+        self.assertEqual(search_cache.cached_ids('jobs', 'test', 'django  python', compute), [first.pk])
+        self.assertEqual(len(calls), 1)
+        second = Job.objects.create(title='Django and Python engineer')
+        self.assertEqual(set(search_cache.cached_ids('jobs', 'test', 'python django', compute)), {first.pk, second.pk})
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(search_cache.stats()['jobs']['hits'], 1)
+
+    def test_candidate_search_pages_cached_until_a_profile_save(self):
+        recruiter = User.objects.create_user('recruiter')
+        Profile.objects.update_or_create(user=recruiter, defaults={'is_recruiter': True})
+        self.client.force_login(recruiter)
+        for i in range(22):
+            user = User.objects.create_user(f'cand{i:02}')
+            Profile.objects.update_or_create(user=user, defaults={'skills': 'Golang, Rust'})
+        url = reverse('accounts:find_applicants')
+        first = self.client.get(url, {'q': 'Rust golang'}).context
+        self.assertEqual(search_cache.stats()['profiles']['misses'], 1)
+
+        again = self.client.get(url, {'q': 'golang, rust'}).context
+        self.assertEqual(search_cache.stats()['profiles']['hits'], 1)
+        self.assertEqual([p.pk for p in again['profiles']], [p.pk for p in first['profiles']])
+        self.assertEqual(again['page'].next_cursor, first['page'].next_cursor)
+        self.assertEqual((again['total_count'], again['count_capped']), (22, False))
+        # the next page is its own entry
+        second = self.client.get(url, {'q': 'golang rust', 'cursor': first['page'].next_cursor}).context
+        self.assertEqual(len(second['profiles']), 2)
+        self.assertEqual(search_cache.stats()['profiles']['misses'], 2)
+
+        Profile.objects.filter(user__username='cand00').get().delete()
+        after = self.client.get(url, {'q': 'golang rust'}).context
+        self.assertEqual(search_cache.stats()['profiles']['misses'], 3)
+        self.assertEqual(after['total_count'], 21)
+
+    def test_keys_hash_the_filter_scope(self):
+        form = JobSearchFilterForm({'skills': 'Python, C++, ' + 'x' * 180})
+        key = search_cache.cache_key('jobs', f'fts5:{form.cache_scope()}', ['python'])
+        # usable by memcached: short, no whitespace or control characters
+        self.assertLess(len(key), 250)
+        self.assertNotRegex(key, r'[\s\x00-\x1f\x7f]')
+        self.assertNotEqual(key, search_cache.cache_key('jobs', 'fts5:skills=Python', ['python']))
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(autocomplete, 'index', autocomplete.AutocompleteIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def texts(self, prefix, kinds=autocomplete.KINDS):
+        return [s['text'] for s in autocomplete.index.complete(prefix, kinds)]
+
+    def test_updates_on_save_and_delete(self):
+        job = Job.objects.create(title='Senior Engineer', company='Acme')
+        self.assertEqual(self.texts('eng', ['title']), ['Senior Engineer'])
+        job.title = 'Data Analyst'
+        job.save()
+        self.assertEqual(self.texts('eng', ['title']), [])
+        self.assertEqual(self.texts('ana', ['title']), ['Data Analyst'])
+        job.delete()
+        self.assertEqual(self.texts('ana'), [])
+        self.assertEqual(self.texts('acm'), [])
+
+        user = User.objects.create_user('candidate')
+        profile, _ = Profile.objects.get_or_create(user=user)
+        profile.skills = 'Kubernetes, Go'
+        profile.save()
+        self.assertEqual(self.texts('kub', ['skill']), ['Kubernetes'])
+        profile.delete()
+        self.assertEqual(self.texts('kub', ['skill']), [])
+
+    def test_ranks_the_whole_prefix_range(self):
+        phrases = [f'a{i:04d}' for i in range(1000)] + ['azure'] * 3
+        built = autocomplete.PrefixIndex(phrases)
+        self.assertEqual(built.complete('a', 1), [('azure', 3)])
+        one_at_a_time = autocomplete.PrefixIndex()
+        for phrase in phrases:
+            one_at_a_time.add(phrase)
+        self.assertEqual(one_at_a_time.complete('a', 5), built.complete('a', 5))
+        built.discard('azure')
+        built.discard('azure')
+        self.assertEqual(built.complete('a', 2), [('a0000', 1), ('a0001', 1)])
+        self.assertEqual(built.complete('azu'), [('azure', 1)])
+
+    def test_saves_during_a_rebuild_are_kept(self):
+        Job.objects.create(title='Platform Engineer')
+        self.texts('pla')
+        original = autocomplete.job_phrases
+
+        def save_during_build(job):
+            if job.title == 'Platform Engineer':
+                Job.objects.create(title='Platform Architect')
+            return original(job)
+
+        with mock.patch.object(autocomplete, 'job_phrases', side_effect=save_during_build):
+            autocomplete.index.build()
+        self.assertEqual(sorted(self.texts('pla', ['title'])), ['Platform Architect', 'Platform Engineer'])
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        jobs = [
+            ('Acme', 'Austin', 60000, 90000, 'sponsor'),
+            ('Acme', 'Austin', 120000, 160000, 'none'),
+            ('Acme', 'Boston', None, 40000, 'sponsor'),
+            ('Globex', 'Boston', 100000, None, 'sponsor'),
+            ('Initech', 'Denver', None, None, 'none'),
+            ('Umbrella', '', 155000, 170000, 'sponsor'),
+        ]
+        for company, location, low, high, visa in jobs:
+            Job.objects.create(
+                title='Python developer', company=company, location=location,
+                salary_min=low, salary_max=high, visa_sponsorship=visa,
+            )
+
+    def facets(self, **params):
+        return self.client.get(reverse('jobs:search'), params).context['facets']
+
+    def counts(self, found, name):
+        return {row[0]: row[-1] for row in found[name]}
+
+    def test_counts_without_filters(self):
+        found = self.facets()
+        self.assertEqual(found['company'], [('Acme', 3), ('Globex', 1), ('Initech', 1), ('Umbrella', 1)])
+        self.assertEqual(found['location'], [('Austin', 2), ('Boston', 2), ('Denver', 1)])
+        self.assertEqual(self.counts(found, 'visa'), {'none': 2, 'sponsor': 4})
+        self.assertEqual(
+            self.counts(found, 'salary'),
+            {'under_50k': 1, '50k_100k': 1, '100k_150k': 1, '150k_plus': 2},
+        )
+
+    def test_counts_follow_active_filters(self):
+        found = self.facets(visa='sponsor', salary_min=50000)
+        self.assertEqual(found['company'], [('Acme', 1), ('Globex', 1), ('Umbrella', 1)])
+        self.assertEqual(found['location'], [('Austin', 1), ('Boston', 1)])
+        self.assertEqual(self.counts(found, 'visa'), {'none': 0, 'sponsor': 3})
+        self.assertEqual(
+            self.counts(found, 'salary'),
+            {'under_50k': 0, '50k_100k': 1, '100k_150k': 1, '150k_plus': 1},
+        )
+        found = self.facets(q='python', salary_max=45000)
+        # jobs without a salary drop out once a salary bound is given
+        self.assertEqual(found['company'], [('Acme', 1)])
+        self.assertEqual(self.counts(found, 'salary'), {'under_50k': 1, '50k_100k': 0, '100k_150k': 0, '150k_plus': 0})
+
+    def test_top_n_is_applied_per_facet_in_sql(self):
+        for i in range(20):
+            Job.objects.create(title='Other', company=f'Company {i:02d}', location=f'Town {i:02d}')
+        with CaptureQueriesContext(connection) as ctx:
+            result = facets.compute_facets(Job.objects.all(), top_n=2)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(result['company'], [('Acme', 3), ('Company 00', 1)])
+        self.assertEqual(result['location'], [('Austin', 2), ('Boston', 2)])
+
+
+class SearchFilterTests(TestCase):
+    def filtered(self, **params):
+        form = JobSearchFilterForm(params)
+        return set(form.filter(Job.objects.all()).values_list('title', flat=True))
+
+    def test_salary_ranges_overlap(self):
+        for title, low, high in [
+            ('range', 80000, 120000), ('floor only', 100000, None), ('cap only', None, 60000), ('none', None, None),
+        ]:
+            Job.objects.create(title=title, salary_min=low, salary_max=high)
+        self.assertEqual(self.filtered(salary_min=100000), {'range', 'floor only'})
+        self.assertEqual(self.filtered(salary_min=110000), {'range'})
+        self.assertEqual(self.filtered(salary_min=120001), set())
+        self.assertEqual(self.filtered(salary_max=80000), {'range', 'cap only'})
+        self.assertEqual(self.filtered(salary_max=79999), {'cap only'})
+        self.assertEqual(self.filtered(salary_min=90000, salary_max=95000), {'range'})
+        # a single bound is a point, not an open-ended range
+        self.assertEqual(self.filtered(salary_min=70000), {'range', 'floor only'})
+        self.assertEqual(self.filtered(salary_max=99999), {'range', 'cap only'})
+        self.assertEqual(self.filtered(), {'range', 'floor only', 'cap only', 'none'})
+
+    def test_visa(self):
+        Job.objects.create(title='sponsors', visa_sponsorship='sponsor')
+        Job.objects.create(title='does not', visa_sponsorship='none')
+        self.assertEqual(self.filtered(visa='sponsor'), {'sponsors'})
+        self.assertEqual(self.filtered(visa=''), {'sponsors', 'does not'})
+        self.assertEqual(self.filtered(visa='bogus'), {'sponsors', 'does not'})
+
+    def test_posted_within(self):
+        now = timezone.now()
+        for title, age in [('today', timedelta(hours=2)), ('this week', timedelta(days=5)), ('old', timedelta(days=40))]:
+            Job.objects.create(title=title, posted_at=now - age)
+        self.assertEqual(self.filtered(posted_within=1), {'today'})
+        self.assertEqual(self.filtered(posted_within=7), {'today', 'this week'})
+        self.assertEqual(self.filtered(posted_within=30), {'today', 'this week'})
+        self.assertEqual(self.filtered(posted_within=''), {'today', 'this week', 'old'})
+        # not one of the choices: ignored rather than an error
+        self.assertEqual(self.filtered(posted_within=3), {'today', 'this week', 'old'})
+
+    def test_search_view_combines_filters(self):
+        now = timezone.now()
+        Job.objects.create(title='Python match', salary_min=90000, visa_sponsorship='sponsor', posted_at=now)
+        Job.objects.create(title='Python too old', salary_min=90000, visa_sponsorship='sponsor',
+                           posted_at=now - timedelta(days=10))
+        Job.objects.create(title='Python no visa', salary_min=90000, posted_at=now)
+        response = self.client.get(
+            reverse('jobs:search'), {'q': 'python', 'salary_min': 85000, 'visa': 'sponsor', 'posted_within': 7},
+        )
+        self.assertEqual([job.title for job in response.context['jobs']], ['Python match'])
+        self.assertEqual(response.context['total_count'], 1)
+
+
+class MatchTokensTests(TestCase):
+    def test_save_keeps_tokens_in_sync(self):
+        job = Job.objects.create(title='Senior Python Developer', description='Django and the cloud')
+        self.assertEqual(Job.objects.get(pk=job.pk).match_tokens, 'cloud developer django python senior')
+        job.description = 'Flask'
+        job.save(update_fields=['description'])
+        self.assertEqual(Job.objects.get(pk=job.pk).match_tokens, 'developer flask python senior')
+
+        profile, _ = Profile.objects.get_or_create(user=User.objects.create_user('candidate'))
+        profile.skills = 'Python, Go'
+        profile.experience = 'Five years of Go'
+        profile.save()
+        self.assertEqual(Profile.objects.get(pk=profile.pk).match_tokens, 'five go python')
+        self.assertEqual(job_tokens(job), frozenset({'developer', 'flask', 'python', 'senior'}))
+
+    def test_backfill_command(self):
+        job = Job.objects.create(title='Rust engineer')
+        profile, _ = Profile.objects.get_or_create(user=User.objects.create_user('candidate'))
+        profile.skills = 'Rust'
+        profile.save()
+        # rows written around save(), as by a bulk load or before the column existed
+        Job.objects.filter(pk=job.pk).update(match_tokens='')
+        Profile.objects.filter(pk=profile.pk).update(match_tokens='stale')
+
+        out = StringIO()
+        call_command('backfill_match_tokens', stdout=out)
+        self.assertIn('Updated 1 jobs and 1 profiles.', out.getvalue())
+        self.assertEqual(Job.objects.get(pk=job.pk).match_tokens, 'engineer rust')
+        self.assertEqual(Profile.objects.get(pk=profile.pk).match_tokens, 'rust')
+
+        out = StringIO()
+        call_command('backfill_match_tokens', stdout=out)
+        self.assertIn('Updated 0 jobs and 0 profiles.', out.getvalue())
+
+
+class SharedCacheCheckTests(TestCase):
+    def errors(self):
+        return [e.id for e in checks.check_shared_cache(None)]
+
+    def test_process_local_cache_is_an_error(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual(self.errors(), ['jobs.E001'])
+        with override_settings(CACHES=redis):
+            self.assertEqual(self.errors(), [])
+
+    def test_only_a_deployment_check(self):
+        self.assertIn(checks.check_shared_cache, registry.registry.get_checks(include_deployment_checks=True))
+        self.assertNotIn(checks.check_shared_cache, registry.registry.get_checks())
+
+
+class JobRecommendationsTests(TestCase):
+    def setUp(self):
+        # the engine is process-wide and outlives earlier tests' rolled-back profiles
+        scoring.engine.invalidate()
+        self.recruiter = User.objects.create_user('recruiter')
+        Profile.objects.update_or_create(user=self.recruiter, defaults={'is_recruiter': True})
+        self.job = Job.objects.create(
+            title='Python developer', description='Django, SQL and AWS', owner=self.recruiter
+        )
+        self.url = reverse('jobs:job_recommendations', args=[self.job.pk])
+        self.client.force_login(self.recruiter)
+
+    def add_candidates(self, n, skills='Python, Django'):
+        users = []
+        for i in range(n):
+            user = User.objects.create_user(f'candidate{User.objects.count()}')
+            Profile.objects.update_or_create(user=user, defaults={'skills': skills})
+            users.append(user)
+        return users
+
+    def get(self, **params):
+        # build the scoring matrix up front so only the request's own queries are counted
+        scoring.engine.candidates()
+        return self.client.get(self.url, params)
+
+    def count_queries(self):
+        recommendations.rebuild()
+        scoring.engine.candidates()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_candidates(self):
+        users = self.add_candidates(3)
+        Application.objects.create(job=self.job, user=users[0])
+        SavedProfile.objects.create(recruiter=self.recruiter, saved_user=users[1])
+        small = self.count_queries()
+
+        users = self.add_candidates(40)
+        for user in users[:10]:
+            Application.objects.create(job=self.job, user=user)
+            SavedProfile.objects.create(recruiter=self.recruiter, saved_user=user)
+        self.assertEqual(self.count_queries(), small)
+
+    def test_query_count(self):
+        self.add_candidates(30)
+        recommendations.rebuild()
+        # session, user, recruiter profile, job, saved ids, page of stored scores
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+
+    def test_query_count_without_stored_ranking(self):
+        self.add_candidates(30)
+        JobCandidateScore.objects.all().delete()
+        scoring.engine.candidates()
+        # ... plus the empty stored page, the existence check, applied ids, page of profiles
+        with self.assertNumQueries(9):
+            self.client.get(self.url)
+
+    def test_ranking_excludes_applicants_and_marks_saved(self):
+        strong, weak, applied = self.add_candidates(1) + self.add_candidates(1, 'Cooking') + self.add_candidates(1)
+        Application.objects.create(job=self.job, user=applied)
+        SavedProfile.objects.create(recruiter=self.recruiter, saved_user=strong)
+
+        recs = self.get().context['recommendations']
+        self.assertEqual([r['profile'].user for r in recs], [strong, weak])
+        self.assertEqual([r['is_saved'] for r in recs], [True, False])
+        self.assertGreater(recs[0]['score'], recs[1]['score'])
+
+    def test_pagination_walks_the_whole_ranking(self):
+        self.add_candidates(25)
+        self.add_candidates(20, 'Cooking')
+        self.walk_pages()
+        recommendations.rebuild()
+        self.walk_pages()
+
+    def walk_pages(self):
+        first = self.get()
+        page = first.context['page']
+        self.assertEqual(len(page), 20)
+        self.assertTrue(page.has_next)
+
+        seen = [r['profile'].pk for r in first.context['recommendations']]
+        cursor = page.next_cursor
+        while cursor:
+            response = self.get(cursor=cursor)
+            seen += [r['profile'].pk for r in response.context['recommendations']]
+            cursor = response.context['page'].next_cursor
+        self.assertEqual(len(seen), 45)
+        self.assertEqual(len(set(seen)), 45)
+        ranked = [pk for pk, _ in scoring.engine.top(job_tokens(self.job))]
+        self.assertEqual(seen, ranked)
+
+
+@override_settings(RECOMMENDATION_STORE_SIZE=3)
+class StoredRecommendationTests(TestCase):
+    def setUp(self):
+        # the engine is process-wide and outlives earlier tests' rolled-back profiles
+        scoring.engine.invalidate()
+        self.profiles = []
+        for i, skills in enumerate(['Python, Django', 'Python', 'SQL', 'Cooking', 'Gardening']):
+            user = User.objects.create_user(f'candidate{i}')
+            profile, _ = Profile.objects.update_or_create(user=user, defaults={'skills': skills})
+            self.profiles.append(profile)
+        self.job = Job.objects.create(title='Python developer', description='Django and SQL')
+
+    def assertStoreMatchesEngine(self):
+        stored = list(
+            JobCandidateScore.objects.filter(job=self.job)
+            .order_by('-score', 'profile_id').values_list('profile_id', 'score')
+        )
+        self.assertEqual(stored, scoring.engine.top(job_tokens(self.job), 3))
+
+    def test_new_job_is_stored(self):
+        self.assertEqual(JobCandidateScore.objects.filter(job=self.job).count(), 3)
+        self.assertStoreMatchesEngine()
+
+    def test_job_text_change_rescores(self):
+        self.job.description = 'Cooking and gardening'
+        self.job.save(update_fields=['description'])
+        self.assertStoreMatchesEngine()
+
+    def test_non_text_edit_does_not_rescore(self):
+        self.job.salary_min, self.job.visa_sponsorship = 90000, True
+        with mock.patch.object(recommendations, 'refresh_job') as refresh_job, \
+                mock.patch.object(skills, 'update_job') as update_job:
+            self.job.save()
+            self.job.title = 'Python Developer'  # same tokens
+            self.job.save()
+            refresh_job.assert_not_called()
+            update_job.assert_not_called()
+            self.job.title = 'Cook'
+            self.job.save()
+            refresh_job.assert_called_once_with(self.job)
+            update_job.assert_called_once_with(self.job)
+
+    def test_profile_moves_in_and_out(self):
+        weak = self.profiles[4]
+        weak.skills = 'Python, Django, SQL'
+        weak.save()
+        recommendations.refresh_pending()
+        self.assertStoreMatchesEngine()
+
+        weak.skills = 'Gardening'
+        weak.save()
+        recommendations.refresh_pending()
+        self.assertStoreMatchesEngine()
+
+    def test_profile_leaving_the_pool(self):
+        top = self.profiles[0]
+        top.is_recruiter = True
+        top.save()
+        recommendations.refresh_pending()
+        self.assertStoreMatchesEngine()
+
+        self.profiles[1].user.is_active = False
+        self.profiles[1].user.save()
+        recommendations.refresh_pending()
+        self.assertStoreMatchesEngine()
+
+        self.profiles[2].delete()
+        self.assertStoreMatchesEngine()
+
+    def test_profile_saves_are_queued_not_rescored(self):
+        recommendations.refresh_pending()
+        weak = self.profiles[4]
+        # saves that leave the tokens and candidacy alone queue nothing
+        weak.headline = 'Gardener'
+        weak.save()
+        weak.user.save()
+        self.assertFalse(PendingRescore.objects.exists())
+
+        before = list(JobCandidateScore.objects.order_by('pk').values_list('profile_id', 'score'))
+        with CaptureQueriesContext(connection) as ctx:
+            weak.skills = 'Python, Django, SQL'
+            weak.save()
+        self.assertFalse(any('jobs_jobcandidatescore' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(list(JobCandidateScore.objects.order_by('pk').values_list('profile_id', 'score')), before)
+        self.assertEqual(list(PendingRescore.objects.values_list('profile_id', flat=True)), [weak.pk])
+
+        out = StringIO()
+        call_command('refresh_pending_recommendations', stdout=out)
+        self.assertIn('Refreshed 1 profiles', out.getvalue())
+        self.assertFalse(PendingRescore.objects.exists())
+        self.assertStoreMatchesEngine()
+
+    def test_large_queue_rebuilds(self):
+        for profile in self.profiles:
+            profile.skills = 'SQL'
+            profile.save()
+        self.assertEqual(recommendations.refresh_pending(rebuild_over=2), 5)
+        self.assertFalse(PendingRescore.objects.exists())
+        self.assertStoreMatchesEngine()
+
+
+class CandidateScoringTests(TestCase):
+    rows = [
+        (1, 11, {'python', 'django'}),
+        (2, 12, {'python'}),
+        (3, 13, {'cooking'}),
+        (4, 14, {'python', 'django'}),
+        (5, 15, set()),
+    ]
+    tokens = frozenset({'python', 'django', 'sql'})
+
+    def expected(self, exclude=()):
+        scored = [(pk, overlap_score(self.tokens, t)) for pk, user_id, t in self.rows if user_id not in exclude]
+        return sorted(scored, key=lambda r: (-r[1], r[0]))
+
+    def test_fallback_matches_overlap_score(self):
+        candidates = scoring.CandidateList(self.rows)
+        self.assertEqual(candidates.top(self.tokens), self.expected())
+        self.assertEqual(candidates.top(self.tokens, 3, {14}), self.expected({14})[:3])
+
+    def test_matrix_matches_overlap_score(self):
+        if scoring.sparse is None:
+            self.skipTest("NumPy/SciPy not installed")
+        candidates = scoring.CandidateMatrix.from_rows(self.rows)
+        self.assertEqual(candidates.top(self.tokens), self.expected())
+        # ties at the cut-off are broken by pk
+        self.assertEqual(candidates.top(self.tokens, 1), self.expected()[:1])
+        self.assertEqual(candidates.top(self.tokens, 3, {14}), self.expected({14})[:3])
+
+
+class ScoringEngineTests(TestCase):
+    def setUp(self):
+        scoring.engine.invalidate()
+        self.profiles = []
+        for i, skills in enumerate(['Python, Django', 'Python', 'SQL, AWS', 'Cooking', '']):
+            user = User.objects.create_user(f'candidate{i}')
+            profile, _ = Profile.objects.update_or_create(
+                user=user, defaults={'skills': skills, 'experience': 'Django APIs' if i == 3 else ''},
+            )
+            self.profiles.append(profile)
+        self.jobs = [
+            Job.objects.create(title='Python developer', description='Django, SQL and AWS'),
+            Job.objects.create(title='Chef', description='Cooking for Django fans'),
+            Job.objects.create(title='', description=''),
+        ]
+
+    def expected(self, job, mode):
+        scored = [
+            (profile.pk, calculate_match_score(job, profile, mode))
+            for profile in Profile.objects.filter(is_recruiter=False, user__is_active=True).select_related('user')
+        ]
+        return sorted(scored, key=lambda r: (-r[1], r[0]))
+
+    def assertEngineMatchesScores(self, engine=None):
+        engine = engine or scoring.engine
+        for mode in scoring.MODES:
+            for job in Job.objects.all():
+                ranked = engine.top(job_tokens(job), mode=mode)
+                expected = self.expected(job, mode)
+                self.assertEqual([pk for pk, _ in ranked], [pk for pk, _ in expected])
+                for (_, score), (_, want) in zip(ranked, expected):
+                    self.assertAlmostEqual(score, want)
+
+    def test_matches_calculate_match_score(self):
+        self.assertEngineMatchesScores()
+        with mock.patch.object(scoring, 'sparse', None):
+            self.assertEngineMatchesScores(scoring.ScoringEngine())
+
+    def test_saves_patch_the_matrix_in_place(self):
+        built = scoring.engine.candidates()
+        # a full user save that changes nothing leaves the matrix as it is
+        self.profiles[0].user.save()
+        self.profiles[1].skills = 'Python, SQL, AWS'
+        self.profiles[1].save()
+        self.profiles[2].is_recruiter = True
+        self.profiles[2].save()
+        user = self.profiles[3].user
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        self.profiles[4].delete()
+        newcomer = User.objects.create_user('newcomer')
+        Profile.objects.update_or_create(user=newcomer, defaults={'skills': 'Python, Django, SQL'})
+
+        self.assertIs(scoring.engine.candidates(), built)
+        self.assertEngineMatchesScores()
+        fresh = scoring.ScoringEngine()
+        for job in self.jobs:
+            self.assertEqual(scoring.engine.top(job_tokens(job), 3), fresh.top(job_tokens(job), 3))
+
+        # reverting a profile takes it back out of the overlay
+        self.profiles[1].skills = 'Python'
+        self.profiles[1].save()
+        self.assertEngineMatchesScores()
+
+    def test_concurrent_first_use_builds_once(self):
+        engine = scoring.ScoringEngine()
+        built = []
+        start = threading.Barrier(8)
+
+        def rows():
+            built.append(1)
+            return [(1, 11, {'python'})]
+
+        def use():
+            start.wait()
+            engine.top(frozenset({'python'}))
+
+        with mock.patch.object(scoring, 'candidate_rows', rows):
+            threads = [threading.Thread(target=use) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(built), 1)
+
+
+class DocumentFrequencyTests(TestCase):
+    def counts(self):
+        return dict(MatchTermFrequency.objects.filter(document_count__gt=0).values_list('term', 'document_count'))
+
+    def test_incremental_counts_match_a_rebuild(self):
+        user = User.objects.create_user('candidate')
+        profile, _ = Profile.objects.update_or_create(user=user, defaults={'skills': 'Python, Django'})
+        job = Job.objects.create(title='Python developer', description='Django')
+        other = Job.objects.create(title='Chef', description='Cooking')
+        job.description = 'Flask'
+        job.save(update_fields=['description'])
+        profile.skills = 'Python'
+        profile.save()
+        other.delete()
+
+        incremental = self.counts()
+        self.assertEqual(incremental, {'python': 2, 'developer': 1, 'flask': 1})
+        idf.rebuild()
+        self.assertEqual(self.counts(), incremental)
+
+    def test_term_created_concurrently_is_counted(self):
+        bulk_create = MatchTermFrequency.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # another save inserts the same new term first
+            MatchTermFrequency.objects.create(term='erlang', document_count=1)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(MatchTermFrequency.objects, 'bulk_create', side_effect=racing_bulk_create):
+            Job.objects.create(title='Erlang engineer')
+        self.assertEqual(self.counts(), {'erlang': 2, 'engineer': 1})
+
+    def test_rare_tokens_weigh_more(self):
+        for i in range(5):
+            Job.objects.create(title='Python developer', description=f'common{i}')
+        Job.objects.create(title='Haskell developer')
+        idf.frequencies.load()
+        weights = idf.frequencies.weights({'haskell', 'developer'})
+        self.assertGreater(weights['haskell'], weights['developer'])
+
+
+class TfidfScoringTests(TestCase):
+    rows = [
+        (1, 11, {'python', 'haskell'}),
+        (2, 12, {'python', 'sql'}),
+        (3, 13, {'haskell'}),
+        (4, 14, {'cooking'}),
+    ]
+    tokens = frozenset({'python', 'haskell', 'sql'})
+    weights = {'python': 1.0, 'haskell': 3.0, 'sql': 2.0}
+
+    def test_weighted_overlap(self):
+        self.assertAlmostEqual(overlap_score(self.tokens, {'python'}), 100 / 3)
+        self.assertAlmostEqual(weighted_overlap_score(self.tokens, {'haskell'}, self.weights), 50.0)
+        self.assertEqual(weighted_overlap_score(self.tokens, set(), self.weights), 0)
+
+    def test_matrix_matches_fallback(self):
+        # ties (2 and 3) are ranked by pk
+        expected = [(1, 400 / 6), (2, 50.0), (3, 50.0), (4, 0.0)]
+        fallback = scoring.CandidateList(self.rows).top(self.tokens, weights=self.weights)
+        self.assertEqual([pk for pk, _ in fallback], [pk for pk, _ in expected])
+        for (_, score), (_, want) in zip(fallback, expected):
+            self.assertAlmostEqual(score, want)
+        if scoring.sparse is None:
+            return
+        matrix = scoring.CandidateMatrix.from_rows(self.rows).top(self.tokens, weights=self.weights)
+        self.assertEqual([pk for pk, _ in matrix], [pk for pk, _ in fallback])
+        for (_, a), (_, b) in zip(matrix, fallback):
+            self.assertAlmostEqual(a, b)
+
+
+class SuggestJobsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('candidate')
+        self.profile, _ = Profile.objects.update_or_create(user=self.user, defaults={'skills': 'Python, Django'})
+        self.client.force_login(self.user)
+        self.strong = Job.objects.create(title='Python Django developer')
+        self.weak = Job.objects.create(title='Python developer', description='Java, Spring and Kotlin')
+        Job.objects.create(title='Chef', description='Cooking')
+        suggestions.postings.build()
+        cache.clear()
+
+    def suggested(self):
+        response = self.client.get(reverse('jobs:suggested_jobs'))
+        return [(job.pk, job.match_score) for job in response.context['jobs']]
+
+    def test_ranked_like_calculate_match_score(self):
+        expected = [
+            (job.pk, calculate_match_score(job, self.profile)) for job in (self.strong, self.weak)
+        ]
+        self.assertEqual(self.suggested(), expected)
+
+    def test_cache_follows_job_and_profile_changes(self):
+        self.assertEqual(len(self.suggested()), 2)
+        with mock.patch.object(suggestions.postings, 'top') as top:
+            self.suggested()
+        top.assert_not_called()
+
+        new = Job.objects.create(title='Django engineer')
+        self.assertIn(new.pk, [pk for pk, _ in self.suggested()])
+        self.weak.delete()
+        self.assertNotIn(self.weak.pk, [pk for pk, _ in self.suggested()])
+        self.profile.skills = 'Cooking'
+        self.profile.save()
+        self.assertEqual(len(self.suggested()), 1)
+
+
+class CandidateBucketTests(TestCase):
+    def setUp(self):
+        scoring.engine.invalidate()
+
+    def test_signature_estimates_jaccard(self):
+        a = {f'skill{i}' for i in range(40)}
+        b = {f'skill{i}' for i in range(20, 60)}
+        self.assertEqual(lsh.signature(a), lsh.signature(set(a)))
+        agree = sum(x == y for x, y in zip(lsh.signature(a), lsh.signature(b))) / lsh.NUM_HASHES
+        self.assertAlmostEqual(agree, 1 / 3, delta=0.2)
+
+    def test_buckets_follow_profile_tokens(self):
+        user = User.objects.create_user('candidate')
+        profile, _ = Profile.objects.update_or_create(user=user, defaults={'skills': 'Python, Django, SQL'})
+        self.assertEqual(profile.lsh_buckets.count(), lsh.NUM_BANDS)
+        before = set(profile.lsh_buckets.values_list('band', 'bucket'))
+        profile.skills = 'Cooking, Baking'
+        profile.save()
+        self.assertNotEqual(set(profile.lsh_buckets.values_list('band', 'bucket')), before)
+
+    @override_settings(RECOMMENDATION_RETRIEVAL='lsh')
+    def test_shortlist_retrieval_scores_exactly(self):
+        profiles = []
+        for i, skills in enumerate(['Python, Django, SQL, AWS', 'Cooking, Baking', 'Python, Django, SQL']):
+            user = User.objects.create_user(f'candidate{i}')
+            profiles.append(Profile.objects.update_or_create(user=user, defaults={'skills': skills})[0])
+        tokens = frozenset({'python', 'django', 'sql', 'aws'})
+        self.assertEqual(lsh.shortlist(tokens)[0], (profiles[0].pk, lsh.NUM_BANDS))
+        ranked = recommendations.rank_candidates(tokens, 2)
+        self.assertEqual(ranked, [(profiles[0].pk, 100.0), (profiles[2].pk, 75.0)])
+        self.assertEqual(ranked, scoring.engine.top(tokens, 2))
+
+
+    def test_job_weights_computed_once(self):
+        for i in range(5):
+            user = User.objects.create_user(f'candidate{i}')
+            Profile.objects.update_or_create(user=user, defaults={'skills': f'Python, Django, skill{i}'})
+        idf.frequencies.load()
+        tokens = frozenset({'python', 'django', 'haskell'})
+        with mock.patch.object(scoring, 'job_weights', wraps=scoring.job_weights) as job_weights:
+            ranked = lsh.top(tokens, mode='tfidf')
+        self.assertEqual(job_weights.call_count, 1)
+        self.assertTrue(ranked)
+        exact = dict(scoring.engine.top(tokens, mode='tfidf'))
+        self.assertEqual(ranked, [(pk, exact[pk]) for pk, _ in ranked])
+
+class RescoreRecommendationsTests(TestCase):
+    def setUp(self):
+        scoring.engine.invalidate()
+
+    def test_parallel_rescore_matches_rebuild(self):
+        for i, skills in enumerate(['Python, Django', 'Python', 'SQL', 'Cooking']):
+            user = User.objects.create_user(f'candidate{i}')
+            Profile.objects.update_or_create(user=user, defaults={'skills': skills})
+        Job.objects.create(title='Python developer', description='Django and SQL')
+        Job.objects.create(title='Chef', description='Cooking and Haskell')
+        recommendations.rebuild()
+        expected = sorted(JobCandidateScore.objects.values_list('job_id', 'profile_id', 'score'))
+
+        JobCandidateScore.objects.all().delete()
+        call_command('rescore_recommendations', workers=2, chunk_size=1, stdout=StringIO())
+        self.assertEqual(sorted(JobCandidateScore.objects.values_list('job_id', 'profile_id', 'score')), expected)
+
+
+class SkillTaxonomyTests(TestCase):
+    def setUp(self):
+        self.recruiter = User.objects.create_user('recruiter')
+        Profile.objects.update_or_create(user=self.recruiter, defaults={'is_recruiter': True})
+        self.job = Job.objects.create(title='Backend developer', description='Django, Postgres and k8s.')
+
+    def candidate(self, name, skills):
+        user = User.objects.create_user(name)
+        profile, _ = Profile.objects.update_or_create(user=user, defaults={'skills': skills})
+        return profile
+
+    def skill_names(self, links):
+        return [link.skill.name for link in links.select_related('skill').order_by('pk')]
+
+    def test_aliases_normalize_to_one_skill(self):
+        profile = self.candidate('ana', ' JS, Python,javascript , PY')
+        self.assertEqual(self.skill_names(profile.skill_links.order_by('position')), ['JavaScript', 'Python'])
+        self.assertEqual(skills.normalize('  Node.JS '), 'node.js')
+        self.assertEqual(skills.normalize('C++'), 'c++')
+        self.assertEqual(profile.skill_list, ['JS', 'Python', 'javascript', 'PY'])
+
+    def test_skill_list_follows_saves(self):
+        profile = self.candidate('ana', 'Python')
+        self.assertEqual(profile.skill_list, ['Python'])
+        profile.skills = 'Go, Rust'
+        profile.save()
+        self.assertEqual(profile.skill_list, ['Go', 'Rust'])
+        self.assertEqual(self.skill_names(profile.skill_links.order_by('position')), ['Go', 'Rust'])
+
+    def test_jobs_link_known_skills(self):
+        self.assertEqual(sorted(self.skill_names(self.job.skill_links)), ['Kubernetes', 'PostgreSQL'])
+        # a new skill is linked to the jobs that already mention it, later
+        self.candidate('ana', 'Django')
+        self.assertNotIn('Django', self.skill_names(self.job.skill_links))
+        out = StringIO()
+        call_command('link_new_skills', stdout=out)
+        self.assertIn('Linked 1 new skills to 1 jobs', out.getvalue())
+        self.assertIn('Django', self.skill_names(self.job.skill_links))
+        self.assertEqual(skills.link_pending(), (0, 0))
+        self.job.description = 'Django only'
+        self.job.save()
+        self.assertEqual(self.skill_names(self.job.skill_links), ['Django'])
+
+    def test_find_applicants_filters_by_skills(self):
+        ana = self.candidate('ana', 'JavaScript, Django')
+        self.candidate('bob', 'JavaScript')
+        self.client.force_login(self.recruiter)
+
+        def found(**params):
+            response = self.client.get(reverse('accounts:find_applicants'), params)
+            return [p.pk for p in response.context['profiles']]
+
+        self.assertEqual(found(skills='js, django'), [ana.pk])
+        self.assertEqual(found(q='ana', skills='JS'), [ana.pk])
+        self.assertEqual(len(found(skills='javascript')), 2)
+        self.assertEqual(found(skills='Cobol'), [])
+
+    def test_job_search_filters_by_skills(self):
+        Job.objects.create(title='Frontend developer', description='React')
+        response = self.client.get(reverse('jobs:search'), {'skills': 'Kubernetes'})
+        self.assertEqual([job.pk for job in response.context['jobs']], [self.job.pk])
+
+    def test_rebuild_matches_incremental_links(self):
+        self.candidate('ana', 'Django, Rust, the, Communication and a')
+        Job.objects.create(title='Rust engineer')
+        skills.link_pending()
+
+        def links():
+            return (
+                sorted(ProfileSkill.objects.values_list('profile_id', 'skill__key', 'position')),
+                sorted(JobSkill.objects.values_list('job_id', 'skill__key')),
+            )
+
+        before = links()
+        Skill.objects.all().delete()
+        call_command('rebuild_skill_links', stdout=StringIO())
+        self.assertEqual(links(), before)
+        self.assertFalse(Skill.objects.filter(jobs_linked=False).exists())
+
+    def test_stopwords_and_long_lists_create_no_skills(self):
+        profile = self.candidate('ana', 'a, The, experience, Go')
+        self.assertEqual(self.skill_names(profile.skill_links.order_by('position')), ['Go'])
+        self.assertFalse(Skill.objects.filter(key__in=['a', 'the', 'experience']).exists())
+
+        profile.skills = ', '.join(f'skill{i}' for i in range(skills.MAX_PROFILE_SKILLS + 20))
+        profile.save()
+        self.assertEqual(profile.skill_links.count(), skills.MAX_PROFILE_SKILLS)
+        self.assertFalse(Skill.objects.filter(key=f'skill{skills.MAX_PROFILE_SKILLS}').exists())
+
+    def test_profile_save_does_not_scan_jobs(self):
+        for i in range(5):
+            Job.objects.create(title=f'Role {i}', description='Communication matters')
+        with CaptureQueriesContext(connection) as ctx:
+            self.candidate('ana', 'Communication')
+        self.assertFalse(any('jobs_jobterm' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(skills.link_pending(), (1, 5))
+
+
+class NearbyJobsTests(TestCase):
+    NYC = (40.7128, -74.0060)
+
+    def job(self, title, lat, lon):
+        return Job.objects.create(title=title, latitude=lat, longitude=lon)
+
+    def nearby(self, lat, lon, **params):
+        response = self.client.get(reverse('jobs:jobs_nearby'), {'lat': lat, 'lon': lon, **params})
+        self.assertEqual(response.status_code, 200)
+        return streamed_json(response)
+
+    def test_haversine_known_distances(self):
+        self.assertAlmostEqual(geo.haversine(*self.NYC, 34.0522, -118.2437), 2445, delta=3)
+        self.assertAlmostEqual(geo.haversine(51.5074, -0.1278, 48.8566, 2.3522), 213.5, delta=1)
+        self.assertAlmostEqual(geo.haversine(0, 179.9, 0, -179.9), geo.haversine(0, 0, 0, 0.2))
+        self.assertEqual(geo.haversine(*self.NYC, *self.NYC), 0)
+
+    def test_vectorized_distances_match_scalar(self):
+        rng = random.Random(5)
+        points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+        lats, lons = [p[0] for p in points], [p[1] for p in points]
+        for expected, got in zip([geo.haversine(*self.NYC, *p) for p in points], geo.haversine_array(*self.NYC, lats, lons)):
+            self.assertAlmostEqual(expected, got, places=6)
+        pairs = geo.haversine_array(lats, lons, lats[::-1], lons[::-1])
+        self.assertAlmostEqual(pairs[0], geo.haversine(*points[0], *points[-1]), places=6)
+
+        ids = list(range(1, 501))
+        ranked = geo.rank_by_distance(*self.NYC, ids, lats, lons, radius=3000, limit=20)
+        expected = sorted((geo.haversine(*self.NYC, *p), pk) for pk, p in zip(ids, points))
+        expected = [pk for d, pk in expected if d <= 3000][:20]
+        self.assertEqual([pk for _, pk in ranked], expected)
+        # equal distances are ordered by id
+        self.assertEqual(geo.rank_by_distance(0, 0, [3, 1, 2], [1, 1, 0], [0, 0, 1]), [
+            (geo.haversine(0, 0, 1, 0), 1), (geo.haversine(0, 0, 0, 1), 2), (geo.haversine(0, 0, 1, 0), 3),
+        ])
+        self.assertEqual(geo.round_miles([1.23456, 2.0]), [1.23, 2.0])
+
+    def test_bounding_box_contains_circle(self):
+        rng = random.Random(1)
+        for lat, lon, radius in [(*self.NYC, 50), (-17, 179.9, 100), (89.5, 10, 80), (0, -180, 500)]:
+            min_lat, max_lat, lon_ranges = geo.bounding_box(lat, lon, radius)
+            for _ in range(500):
+                p_lat, p_lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+                if rng.random() < 0.9:
+                    # mostly points close to the centre
+                    p_lat = max(-90, min(90, lat + rng.uniform(-10, 10)))
+                    p_lon = (lon + rng.uniform(-30, 30) + 180) % 360 - 180
+                if geo.haversine(lat, lon, p_lat, p_lon) <= radius:
+                    self.assertTrue(min_lat <= p_lat <= max_lat)
+                    self.assertTrue(any(lo <= p_lon <= hi for lo, hi in lon_ranges))
+
+    def test_nearest_first_within_radius(self):
+        newark = self.job('Newark', 40.7357, -74.1724)
+        philly = self.job('Philadelphia', 39.9526, -75.1652)
+        self.job('Boston', 42.3601, -71.0589)
+        here = self.job('Here', *self.NYC)
+        data = self.nearby(*self.NYC, radius=100)
+        self.assertEqual([j['id'] for j in data['jobs']], [here.pk, newark.pk, philly.pk])
+        self.assertAlmostEqual(data['jobs'][2]['distance_miles'], 80.6, delta=1)
+        self.assertFalse(data['truncated'])
+
+        data = self.nearby(*self.NYC, radius=100, limit=2)
+        self.assertEqual([j['id'] for j in data['jobs']], [here.pk, newark.pk])
+        self.assertTrue(data['truncated'])
+
+    def test_crosses_antimeridian(self):
+        fiji = self.job('Suva', -17.0, 179.9)
+        data = self.nearby(-17.0, -179.9, radius=20)
+        self.assertEqual([j['id'] for j in data['jobs']], [fiji.pk])
+
+    def test_prefilter_matches_full_scan(self):
+        rng = random.Random(2)
+        for i in range(300):
+            self.job(f'job {i}', rng.uniform(30, 50), rng.uniform(-90, -60))
+        expected = sorted(
+            (geo.haversine(*self.NYC, job.latitude, job.longitude), job.pk) for job in Job.objects.all()
+        )
+        expected = [pk for dist, pk in expected if dist <= 300]
+        self.assertEqual([j['id'] for j in self.nearby(*self.NYC, radius=300, limit=2000)['jobs']], expected)
+
+    def test_columnar_formats(self):
+        for i in range(5):
+            self.job(f'Job {i}', 40.7 + i / 100, -74.0)
+        rows = self.nearby(*self.NYC)
+        columns = self.nearby(*self.NYC, format='columns')
+        self.assertEqual(columns['jobs']['format'], 'columns')
+        self.assertEqual(columns['truncated'], rows['truncated'])
+        self.assertEqual(
+            [dict(zip(columns['jobs']['columns'], values)) for values in zip(*columns['jobs']['columns'].values())],
+            rows['jobs'],
+        )
+
+        response = self.client.get(
+            reverse('jobs:jobs_nearby'), {'lat': self.NYC[0], 'lon': self.NYC[1]},
+            HTTP_ACCEPT='application/vnd.linkedout.columns-f32+json',
+        )
+        self.assertEqual(response['Content-Type'], 'application/vnd.linkedout.columns-f32+json')
+        self.assertIn('Accept', response['Vary'])
+        packed = response.json()['jobs']
+        self.assertNotIn('lat', packed['columns'])
+        coords = array('f', base64.b64decode(packed['coords']))
+        for i, job in enumerate(rows['jobs']):
+            self.assertAlmostEqual(coords[2 * i], job['lat'], places=4)
+            self.assertAlmostEqual(coords[2 * i + 1], job['lon'], places=4)
+        self.assertEqual(packed['columns']['id'], [job['id'] for job in rows['jobs']])
+
+        self.assertTrue(math.isnan(array('f', base64.b64decode(columnar.pack_coords([None], [1.0])))[0]))
+        self.assertEqual(columnar.encode([], 'columns-f32'), {'format': 'columns-f32', 'count': 0, 'columns': {}, 'coords': ''})
+
+    def test_streamed_with_gzip(self):
+        for i in range(5):
+            self.job(f'Job {i}', 40.7 + i / 100, -74.0)
+        url = reverse('jobs:jobs_nearby')
+        params = {'lat': self.NYC[0], 'lon': self.NYC[1], 'limit': 3}
+        plain = self.client.get(url, params)
+        self.assertTrue(plain.streaming)
+        data = streamed_json(plain)
+        self.assertEqual(len(data['jobs']), 3)
+        self.assertTrue(data['truncated'])
+
+        zipped = self.client.get(url, params, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', zipped['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(b''.join(zipped.streaming_content))), data)
+
+        rows = [{'id': i} for i in range(streaming.CHUNK_SIZE * 2 + 1)]
+        body = ''.join(streaming.iter_json('jobs', iter(rows), {'count': lambda: len(rows), 'ok': True}))
+        self.assertEqual(json.loads(body), {'jobs': rows, 'count': len(rows), 'ok': True})
+        self.assertEqual(json.loads(''.join(streaming.iter_json('jobs', []))), {'jobs': []})
+
+    def test_rejects_bad_coordinates(self):
+        url = reverse('jobs:jobs_nearby')
+        self.assertEqual(self.client.get(url, {'lat': 'x', 'lon': 1}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'lat': 91, 'lon': 1}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'lat': 1, 'lon': 1, 'limit': 'all'}).status_code, 400)
+
+
+class GeohashTests(TestCase):
+    def setUp(self):
+        self.recruiter = User.objects.create_user('recruiter')
+        Profile.objects.update_or_create(user=self.recruiter, defaults={'is_recruiter': True})
+        self.client.force_login(self.recruiter)
+
+    def test_encode(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geo.encode(-90, -180), '0' * geo.GEOHASH_PRECISION)
+        self.assertEqual(geo.encode(None, 10), '')
+
+    def test_cover_contains_box(self):
+        rng = random.Random(3)
+        for west, south, east, north in [(-74.3, 40.5, -73.7, 40.9), (-10, -60, 30, 10), (170, -20, 180, -10)]:
+            cells = geo.cover(west, south, east, north)
+            self.assertLessEqual(len(cells), geo.MAX_COVER_CELLS)
+            for _ in range(300):
+                point = geo.encode(rng.uniform(south, north), rng.uniform(west, east))
+                self.assertTrue(any(point.startswith(cell) for cell in cells))
+
+    def test_saves_keep_geohash(self):
+        job = Job.objects.create(title='Pinned', owner=self.recruiter)
+        self.assertEqual(job.geohash, '')
+        job.latitude, job.longitude = 40.7128, -74.0060
+        job.save(update_fields=['latitude', 'longitude'])
+        self.assertEqual(Job.objects.get(pk=job.pk).geohash, geo.encode(40.7128, -74.0060))
+
+        profile = self.recruiter.profile
+        profile.latitude, profile.longitude = 51.5, -0.12
+        profile.save(update_fields=['latitude', 'longitude'])
+        self.assertEqual(Profile.objects.get(pk=profile.pk).geohash, geo.encode(51.5, -0.12))
+
+        application = Application.objects.create(
+            job=job, user=self.recruiter, applicant_latitude=40.73, applicant_longitude=-74.17
+        )
+        self.assertEqual(application.applicant_geohash, geo.encode(40.73, -74.17))
+
+    def test_radius_query_reads_geohash_index(self):
+        rows = geo.within_box(Job.objects.all(), 40.7128, -74.0060, 50).values_list('pk', 'latitude', 'longitude')
+        self.assertIn('job_geohash_idx', rows.explain())
+
+    def test_viewports(self):
+        inside = Job.objects.create(title='NYC', owner=self.recruiter, latitude=40.71, longitude=-74.0)
+        Job.objects.create(title='SF', owner=self.recruiter, latitude=37.77, longitude=-122.42)
+        fiji = Job.objects.create(title='Suva', owner=self.recruiter, latitude=-17.0, longitude=179.9)
+        url = reverse('jobs:recruiter_job_markers')
+
+        def markers(bbox):
+            return [j['id'] for j in streamed_json(self.client.get(url, {'bbox': bbox}))['jobs']]
+
+        self.assertEqual(markers('-75,40,-73,41.5'), [inside.pk])
+        self.assertEqual(markers('179,-18,-179,-16'), [fiji.pk])
+        self.assertEqual(len(streamed_json(self.client.get(url))['jobs']), 3)
+        self.assertEqual(self.client.get(url, {'bbox': '1,2,3'}).status_code, 400)
+
+        applicant = User.objects.create_user('applicant')
+        Application.objects.create(job=inside, user=applicant, applicant_latitude=40.73, applicant_longitude=-74.17)
+        Application.objects.create(job=inside, user=self.recruiter, applicant_latitude=37.8, applicant_longitude=-122.4)
+        response = self.client.get(reverse('jobs:recruiter_applicants'), {'bbox': '-75,40,-73,41.5'})
+        applications = streamed_json(response)['applications']
+        self.assertEqual([a['username'] for a in applications], ['applicant'])
+        self.assertAlmostEqual(
+            applications[0]['distance_miles'], geo.haversine(40.71, -74.0, 40.73, -74.17), places=2
+        )
+
+
+class GeoIndexTests(TestCase):
+    def setUp(self):
+        geoindex.locations.invalidate()
+        rng = random.Random(4)
+        self.jobs = [
+            Job.objects.create(title=f'job {i}', latitude=rng.uniform(35, 45), longitude=rng.uniform(-80, -70))
+            for i in range(200)
+        ]
+        self.centre = (40.7128, -74.0060)
+
+    def ranked(self, found):
+        return [(round(distance, 9), job.pk) for distance, job in found]
+
+    def test_matches_database_query(self):
+        qs = Job.objects.all()
+        for radius in (0, 25, 100, 400):
+            self.assertEqual(
+                self.ranked(geoindex.nearby_jobs(qs, *self.centre, radius)),
+                self.ranked(geo.nearby(qs, *self.centre, radius)),
+            )
+        with mock.patch.object(geoindex, 'spatial', None):
+            self.assertEqual(
+                self.ranked(geoindex.nearby_jobs(qs, *self.centre, 100, limit=5)),
+                self.ranked(geo.nearby(qs, *self.centre, 100, limit=5)),
+            )
+
+    def test_nearest(self):
+        expected = sorted((geo.haversine(*self.centre, j.latitude, j.longitude), j.pk) for j in self.jobs)[:7]
+        self.assertEqual(
+            [(round(d, 9), pk) for d, pk in geoindex.locations.nearest(*self.centre, 7)],
+            [(round(d, 9), pk) for d, pk in expected],
+        )
+        # filtered: keeps widening until enough jobs pass
+        odd = Job.objects.filter(pk__in=[j.pk for j in self.jobs if j.pk % 2])
+        found = geoindex.nearby_jobs(odd, *self.centre, limit=30)
+        self.assertEqual(len(found), 30)
+        self.assertTrue(all(job.pk % 2 for _, job in found))
+
+    def test_follows_saves_and_deletes(self):
+        geoindex.locations.build()
+        moved, deleted = self.jobs[0], self.jobs[1]
+        moved.latitude, moved.longitude = self.centre
+        moved.save(update_fields=['latitude', 'longitude'])
+        deleted.delete()
+        new = Job.objects.create(title='new', latitude=40.72, longitude=-74.0)
+        found = [pk for _, pk in geoindex.locations.within(*self.centre, 5)]
+        self.assertEqual(found[:2], [moved.pk, new.pk])
+        self.assertNotIn(deleted.pk, [pk for _, pk in geoindex.locations.within(*self.centre, 5000)])
+
+    def test_endpoint_nearest(self):
+        response = self.client.get(reverse('jobs:jobs_nearby'), {'lat': self.centre[0], 'lon': self.centre[1], 'k': 3})
+        expected = [pk for _, pk in geoindex.locations.nearest(*self.centre, 3)]
+        self.assertEqual([j['id'] for j in streamed_json(response)['jobs']], expected)
+
+
+class MapClusterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        rng = random.Random(6)
+        self.jobs = [
+            Job.objects.create(title=f'job {i}', latitude=rng.uniform(-60, 70), longitude=rng.uniform(-180, 180))
+            for i in range(60)
+        ]
+        # on tile edges at every zoom: the equator, the prime meridian, the antimeridian
+        self.jobs += [
+            Job.objects.create(title='edge', latitude=lat, longitude=lon)
+            for lat, lon in [(0.0, 0.0), (0.0, 10.0), (10.0, 0.0), (-5.0, 180.0), (-5.0, -180.0), (89.0, 0.0)]
+        ]
+
+    def get(self, bbox, zoom, **params):
+        return self.client.get(reverse('jobs:jobs_clusters'), {'bbox': bbox, 'zoom': zoom, **params})
+
+    def test_tiles(self):
+        self.assertEqual(tiles.tile_bounds(0, 0, 0), (-180.0, -90.0, 180.0, 90.0))
+        west, south, east, north = tiles.tile_bounds(1, 1, 0)
+        self.assertEqual((west, south, east, north), (0.0, 0.0, 180.0, 90.0))
+        self.assertEqual(tiles.viewport_tiles(170, -10, -170, 10, 4), [(15, 7), (0, 7), (15, 8), (0, 8)])
+        self.assertEqual(len(tiles.viewport_tiles(-180, -90, 180, 90, 3)), 64)
+
+    def test_every_job_counted_once(self):
+        for zoom in (0, 2, 3):
+            data = self.get('-180,-90,180,90', zoom).json()
+            self.assertEqual(sum(c['count'] for c in data['clusters']), len(self.jobs))
+            self.assertEqual(data['jobs'], [])
+        for c in self.get('-180,-90,180,90', 3).json()['clusters']:
+            west, south, east, north = c['bbox']
+            self.assertTrue(south <= c['lat'] <= north and west <= c['lon'] <= east)
+
+    def test_high_zoom_returns_jobs(self):
+        near = Job.objects.create(title='Close by', latitude=40.7128, longitude=-74.0060)
+        data = self.get('-74.02,40.70,-74.00,40.72', clusters.MAX_CLUSTER_ZOOM).json()
+        self.assertEqual([j['id'] for j in data['jobs']], [near.pk])
+        self.assertEqual(data['clusters'], [])
+
+    def test_tiles_cached_until_jobs_change(self):
+        params = ('-180,-90,180,90', 2)
+        first = self.get(*params).json()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(*params).json(), first)
+        Job.objects.create(title='another', latitude=1.0, longitude=1.0)
+        self.assertEqual(sum(c['count'] for c in self.get(*params).json()['clusters']), len(self.jobs) + 1)
+        # filters are part of the key
+        self.assertEqual(sum(c['count'] for c in self.get(*params, q='edge').json()['clusters']), 6)
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.get('1,2,3', 3).status_code, 400)
+        self.assertEqual(self.get('-180,-90,180,90', 99).status_code, 400)
+        self.assertEqual(self.get('-180,-90,180,90', 12).status_code, 400)
+
+
+class MapTileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.recruiter = User.objects.create_user('recruiter')
+        Profile.objects.update_or_create(user=self.recruiter, defaults={'is_recruiter': True})
+        self.job = Job.objects.create(title='NYC', owner=self.recruiter, latitude=40.71, longitude=-74.0)
+        self.tile = (10, *tiles.tiles_at(40.71, -74.0)[10][1:])
+
+    def get(self, name, tile, **headers):
+        return self.client.get(reverse(f'jobs:{name}', args=tile), **headers)
+
+    def test_tiles_at_covers_tile_queries(self):
+        rng = random.Random(7)
+        points = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(20)]
+        points += [(0.0, 0.0), (0.0, 180.0), (-0.0, -180.0), (89.5, 10.0), (tiles.tile_bounds(5, 3, 9)[3], 22.5)]
+        jobs = [Job.objects.create(title='p', latitude=lat, longitude=lon) for lat, lon in points]
+        for job in jobs:
+            for zoom in (0, 1, 5, 12):
+                candidates = [t for t in tiles.tiles_at(job.latitude, job.longitude) if t[0] == zoom]
+                self.assertTrue(any(
+                    tiles.in_tile(Job.objects.filter(pk=job.pk), *tile).exists() for tile in candidates
+                ), (job.latitude, job.longitude, zoom))
+
+    def test_job_tile_revalidates_without_queries(self):
+        response = self.get('job_tile', self.tile)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(c['count'] for c in response.json()['clusters']), 1)
+        self.assertIn('public', response['Cache-Control'])
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get('job_tile', self.tile, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # filters are a different variant of the tile
+        self.assertNotEqual(self.client.get(reverse('jobs:job_tile', args=self.tile), {'q': 'x'})['ETag'], etag)
+
+        # a change elsewhere keeps the tile; one inside (or leaving it) does not
+        sydney = Job.objects.create(title='Sydney', latitude=-33.87, longitude=151.21)
+        self.assertEqual(self.get('job_tile', self.tile, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.job.latitude, self.job.longitude = -33.87, 151.21
+        self.job.save(update_fields=['latitude', 'longitude'])
+        response = self.get('job_tile', self.tile, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['clusters'], [])
+
+        high = (16, *tiles.tiles_at(-33.87, 151.21)[16][1:])
+        self.assertEqual([j['id'] for j in self.get('job_tile', high).json()['jobs']], [self.job.pk, sydney.pk])
+        self.assertEqual(self.get('job_tile', (2, 4, 0)).status_code, 404)
+
+    def test_applicant_tile(self):
+        applicant = User.objects.create_user('applicant')
+        application = Application.objects.create(
+            job=self.job, user=applicant, applicant_latitude=40.71, applicant_longitude=-74.0,
+        )
+        self.assertEqual(self.get('applicant_tile', self.tile).status_code, 302)
+        self.client.force_login(self.recruiter)
+        response = self.get('applicant_tile', self.tile)
+        self.assertEqual([a['id'] for a in response.json()['applications']], [application.pk])
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertEqual(self.get('applicant_tile', self.tile, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        application.status = 'review'
+        application.save(update_fields=['status'])
+        response = self.get('applicant_tile', self.tile, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['applications'][0]['status'], 'review')
+        # the job's title is shown on applicant markers
+        etag = response['ETag']
+        self.job.title = 'New York'
+        self.job.save()
+        response = self.get('applicant_tile', self.tile, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['applications'][0]['job_title'], 'New York')
+
+        self.client.force_login(applicant)
+        self.assertEqual(self.get('applicant_tile', self.tile).status_code, 403)
+
+
+class CsvExportTests(TestCase):
+    def test_export_all_streams_every_row(self):
+        owner = User.objects.create_user('owner', email='owner@example.com')
+        Profile.objects.get_or_create(user=owner)
+        job = Job.objects.create(title='Engineer', company='Acme', owner=owner)
+        Job.objects.create(title='Orphan')
+        Application.objects.create(job=job, user=owner, status='review')
+        response = self.client.get(reverse('export-all'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = list(csv.reader(gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ['Type', 'Username', 'Email'])
+        self.assertEqual([row[0] for row in rows[1:]], ['User', 'Job', 'Job', 'Application'])
+        self.assertEqual(rows[1][1:3], ['owner', 'owner@example.com'])
+        self.assertEqual(rows[2][1], 'owner')
+        self.assertEqual(rows[3][1], '')
+        self.assertEqual(rows[4][1:4] + rows[4][8:9], ['owner', '', 'Engineer', 'review'])
+
+
+class StubGeocoder:
+    """Stands in for NominatimGeocoder: answers from ANSWERS, records every query."""
+    ANSWERS = {'Auckland, New Zealand': (-36.8485, 174.7633)}
+
+    def __init__(self):
+        self.queries = []
+        self.unavailable = False
+
+    def geocode(self, query):
+        self.queries.append(query)
+        if self.unavailable:
+            raise geocoding.GeocoderUnavailable('offline')
+        return self.ANSWERS.get(query)
+
+
+@override_settings(GEOCODER_FALLBACK='jobs.tests.StubGeocoder')
+class GeocodingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stub = geocoding.get_fallback()
+        self.stub.queries.clear()
+        self.stub.unavailable = False
+
+    def test_gazetteer_lookups(self):
+        gazetteer = geocoding.get_gazetteer()
+        austin = (30.2672, -97.7431)
+        for query in ['Austin, TX', 'austin tx', 'Austin, Texas', 'AUSTIN, TX, USA', '500 Congress Ave, Austin, TX']:
+            self.assertEqual(gazetteer.lookup(query), austin, query)
+        self.assertEqual(gazetteer.lookup('St Louis, MO'), gazetteer.lookup('Saint Louis, Missouri'))
+        self.assertEqual(gazetteer.lookup('10001'), (40.7506, -73.9972))
+        self.assertEqual(gazetteer.lookup('Kendall Square, MA 02139-4307'), (42.3647, -71.1042))
+        # a "City, ST" match wins over the ZIP, and an unknown ZIP does not matter
+        self.assertEqual(gazetteer.lookup('Cambridge, MA 02139'), gazetteer.lookup('Cambridge, MA'))
+        self.assertEqual(gazetteer.lookup('Austin, TX 78799'), austin)
+        # without a state, the first place of that name in the file
+        self.assertEqual(gazetteer.lookup('Portland'), gazetteer.lookup('Portland, OR'))
+        self.assertNotEqual(gazetteer.lookup('Portland, ME'), gazetteer.lookup('Portland, OR'))
+        for query in ['', 'Nowhere, ZZ', 'Austin, ME', 'USA']:
+            self.assertIsNone(gazetteer.lookup(query), query)
+
+        small = geocoding.Gazetteer([('Coeur d\'Alène', 'id', 47.7, -116.8)], [('00501', 40.8, -73.0)])
+        self.assertEqual(small.lookup('Coeur d Alene, ID'), (47.7, -116.8))
+        self.assertEqual(small.lookup('00501'), (40.8, -73.0))
+
+    def test_house_numbers_are_not_zip_codes(self):
+        springfield, schenectady = (39.78, -89.65), (42.81, -73.94)
+        gazetteer = geocoding.Gazetteer([('Springfield', 'IL', *springfield)], [('12345', *schenectady)])
+        self.assertEqual(gazetteer.lookup('12345 Main St, Springfield, IL'), springfield)
+        self.assertEqual(gazetteer.lookup('12345 Main St, Springfield IL, USA'), springfield)
+        self.assertIsNone(gazetteer.lookup('12345 Main St'))
+        self.assertIsNone(gazetteer.lookup('12345 Main St, Nowhere, ZZ'))
+        # a ZIP ending the address still counts
+        self.assertEqual(gazetteer.lookup('12345'), schenectady)
+        self.assertEqual(gazetteer.lookup('1 River Rd, Nowhere, NY 12345-0001'), schenectady)
+        self.assertEqual(gazetteer.lookup('12345, USA'), schenectady)
+
+    def test_fallback_only_for_unresolved_inputs(self):
+        self.assertEqual(geocoding.geocode('Austin, TX'), (30.2672, -97.7431))
+        self.assertEqual(self.stub.queries, [])
+
+        self.assertEqual(geocoding.geocode('Auckland, New Zealand'), (-36.8485, 174.7633))
+        self.assertIsNone(geocoding.geocode('Atlantis'))
+        # answers, including misses, are cached
+        self.assertEqual(geocoding.geocode('auckland new zealand'), (-36.8485, 174.7633))
+        self.assertIsNone(geocoding.geocode('Atlantis'))
+        self.assertEqual(self.stub.queries, ['Auckland, New Zealand', 'Atlantis'])
+
+        # an unreachable fallback is not cached
+        self.stub.unavailable = True
+        self.assertIsNone(geocoding.geocode('Wellington, New Zealand'))
+        self.stub.unavailable = False
+        geocoding.geocode('Wellington, New Zealand')
+        self.assertEqual(self.stub.queries[-2:], ['Wellington, New Zealand'] * 2)
+
+        with override_settings(GEOCODER_FALLBACK=''):
+            self.assertIsNone(geocoding.geocode('Dunedin, New Zealand'))
+        self.assertNotIn('Dunedin, New Zealand', self.stub.queries)
+
+    def test_apply_geocodes_location(self):
+        job = Job.objects.create(title='Engineer')
+        user = User.objects.create_user('applicant')
+        self.client.force_login(user)
+        response = self.client.post(reverse('jobs:apply', args=[job.pk]), {'applicant_location': 'Belltown, WA 98101'})
+        self.assertRedirects(response, reverse('jobs:apply_thanks'))
+        application = Application.objects.get(user=user)
+        self.assertEqual((application.applicant_latitude, application.applicant_longitude), (47.6114, -122.3305))
+        self.assertEqual(self.stub.queries, [])
+
+    def test_nominatim_adapter(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = [{'lat': '-36.8', 'lon': '174.7'}]
+        with mock.patch.object(geocoding, 'requests') as requests:
+            requests.get.return_value = response
+            self.assertEqual(geocoding.NominatimGeocoder(timeout=2).geocode('Auckland'), (-36.8, 174.7))
+        self.assertEqual(requests.get.call_args.kwargs['timeout'], 2)
+        with mock.patch.object(geocoding, 'requests') as requests:
+            requests.get.side_effect = OSError('timed out')
+            with self.assertRaises(geocoding.GeocoderUnavailable):
+                geocoding.NominatimGeocoder().geocode('Auckland')
+
+    def test_build_gazetteer(self):
+        rows = [
+            ['US', '73301', 'Austin', 'Texas', 'TX', 'Travis', '453', '', '', '30.2', '-97.7', '4'],
+            ['US', '78701', 'Austin', 'Texas', 'TX', 'Travis', '453', '', '', '30.3', '-97.8', '4'],
+            ['US', '10001', 'New York', 'New York', 'NY', 'New York', '061', '', '', '40.75', '-74.0', '4'],
+            ['CA', 'H2X', 'Montreal', 'Quebec', 'QC', '', '', '', '', '45.5', '-73.6', '4'],
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            source, output = os.path.join(tmp, 'US.txt'), os.path.join(tmp, 'gazetteer.tsv')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.writelines('\t'.join(row) + '\n' for row in rows)
+            call_command('build_gazetteer', source, output, stdout=StringIO())
+            gazetteer = geocoding.Gazetteer.from_file(output)
+        self.assertEqual(gazetteer.lookup('Austin, TX'), (30.25, -97.75))
+        self.assertEqual(gazetteer.lookup('78701'), (30.3, -97.8))
+        self.assertEqual(gazetteer.lookup('New York'), (40.75, -74.0))
+        self.assertIsNone(gazetteer.lookup('Montreal'))
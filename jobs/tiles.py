@@ -0,0 +1,143 @@
+"""
+Slippy-map tiles (Web Mercator z/x/y, as the base map uses) of map markers,
+with change versions for conditional GETs.
+
+Each tile of each LAYER has a version number in the cache. Saving or
+deleting a job (layer 'jobs') or an application (layer 'applicants') bumps
+the tiles containing its old and new position at every zoom level (see
+jobs.signals), and nothing else. Tile responses carry an ETag built from
+the version, so a browser or reverse proxy revalidating a tile gets a 304
+after a single cache read, and tile bodies are cached under the version, so
+a change elsewhere on the map does not throw them away.
+
+As in jobs.search_cache, versions are seeded from the clock, so a version
+evicted from the cache never comes back as an old number. The cache has to
+be shared by all worker processes for bumps and ETags to agree (see
+jobs.checks). Writes that skip signals (QuerySet.update(), bulk_create())
+do not bump versions.
+"""
+import hashlib
+import time
+from math import asinh, atan, degrees, floor, pi, radians, sinh, tan
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import geo
+
+LAYERS = ('jobs', 'applicants')
+MAX_ZOOM = 20
+DEFAULT_TIMEOUT = 300
+# a position this close to a tile edge (in tiles) bumps the neighbouring tile too
+EDGE_TOLERANCE = 1e-9
+
+
+def _x(lon, zoom):
+    return (lon + 180) / 360 * 2 ** zoom
+
+
+def _y(lat, zoom):
+    # beyond the Mercator limit (~85.05 degrees) clamps into the edge rows
+    lat = max(-89.9999, min(89.9999, lat))
+    return (1 - asinh(tan(radians(lat))) / pi) / 2 * 2 ** zoom
+
+
+def _index(value, zoom):
+    return max(0, min(2 ** zoom - 1, floor(value)))
+
+
+def _row_lat(y, zoom):
+    """Latitude of the northern edge of tile row `y`."""
+    return degrees(atan(sinh(pi * (1 - 2 * y / 2 ** zoom))))
+
+
+def is_tile(zoom, x, y):
+    return 0 <= zoom <= MAX_ZOOM and 0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom
+
+
+def tile_bounds(zoom, x, y):
+    """
+    (west, south, east, north) of a tile. The top and bottom rows reach on
+    to the poles, so every point lies in a tile at each zoom level.
+    """
+    n = 2 ** zoom
+    west, east = x / n * 360 - 180, (x + 1) / n * 360 - 180
+    north = 90.0 if y == 0 else _row_lat(y, zoom)
+    south = -90.0 if y == n - 1 else _row_lat(y + 1, zoom)
+    return west, south, east, north
+
+
+def viewport_tiles(west, south, east, north, zoom):
+    """[(x, y)] of the tiles covering a box; west > east crosses the antimeridian."""
+    first, last = _index(_x(west, zoom), zoom), _index(_x(east, zoom), zoom)
+    xs = range(first, last + 1) if west <= east else [*range(first, 2 ** zoom), *range(0, last + 1)]
+    ys = range(_index(_y(north, zoom), zoom), _index(_y(south, zoom), zoom) + 1)
+    return [(x, y) for y in ys for x in dict.fromkeys(xs)]
+
+
+def tiles_at(lat, lon):
+    """[(zoom, x, y)] of every tile containing a point, at every zoom level."""
+    result = []
+    for zoom in range(MAX_ZOOM + 1):
+        n = 2 ** zoom
+        fx, fy = _x(lon, zoom), _y(lat, zoom)
+        # x wraps around the antimeridian; y stops at the poles
+        xs = {min(n - 1, floor(fx + d)) % n for d in (-EDGE_TOLERANCE, EDGE_TOLERANCE)}
+        ys = {_index(fy + d, zoom) for d in (-EDGE_TOLERANCE, EDGE_TOLERANCE)}
+        result.extend((zoom, x, y) for x in xs for y in ys)
+    return result
+
+
+def in_tile(queryset, zoom, x, y, hash_field='geohash', lat_field='latitude', lon_field='longitude'):
+    """Narrow `queryset` to the rows in a tile (see jobs.geo.within_viewport)."""
+    west, south, east, north = tile_bounds(zoom, x, y)
+    qs = geo.within_viewport(queryset, west, south, east, north, hash_field, lat_field, lon_field)
+    # half-open on the shared edges, so a row on a tile border is counted once
+    if north < 90:
+        qs = qs.exclude(**{lat_field: north})
+    if x < 2 ** zoom - 1:
+        qs = qs.exclude(**{lon_field: east})
+    return qs
+
+
+def _version_key(layer, zoom, x, y):
+    return f'tiles:version:{layer}:{zoom}/{x}/{y}'
+
+
+def get_version(layer, zoom, x, y):
+    key = _version_key(layer, zoom, x, y)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(layer, *positions):
+    """Bump the versions of the tiles containing any of the (lat, lon) `positions`."""
+    keys = {
+        _version_key(layer, *tile)
+        for lat, lon in positions if lat is not None and lon is not None
+        for tile in tiles_at(lat, lon)
+    }
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def etag(layer, zoom, x, y, scope=''):
+    """ETag of a tile, for the variant of its layer identified by `scope`."""
+    digest = hashlib.sha1(scope.encode()).hexdigest()[:12]
+    return f'"{layer}-{zoom}-{x}-{y}-{get_version(layer, zoom, x, y)}-{digest}"'
+
+
+def cached(layer, zoom, x, y, scope, compute):
+    """`compute()` for a tile, served from the cache while the tile's version holds."""
+    key = f'tiles:{layer}:{zoom}/{x}/{y}:{get_version(layer, zoom, x, y)}:{hashlib.sha1(scope.encode()).hexdigest()}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, getattr(settings, 'SEARCH_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return value
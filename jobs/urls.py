@@ -6,6 +6,8 @@ app_name = 'jobs'
 urlpatterns = [
     path('', views.search, name='search'),
     path("suggested/", views.suggest_jobs, name="suggested_jobs"),
+    path("autocomplete/", views.search_autocomplete, name="search_autocomplete"),
+    path("cache-stats/", views.search_cache_stats, name="search_cache_stats"),
     path('post/', views.post_job, name='post_job'),
     path('my-postings/', views.my_postings, name='my_postings'),
     path('<int:pk>/', views.job_detail, name='job_detail'),
@@ -25,8 +27,11 @@ urlpatterns = [
     path("<int:job_id>/recommendations/", views.job_recommendations, name="job_recommendations"),
     path('map/', views.interactive_map, name='interactive_map'),
     path('map/nearby/', views.jobs_nearby, name='jobs_nearby'),
+    path('map/clusters/', views.jobs_clusters, name='jobs_clusters'),
+    path('map/tiles/jobs/<int:zoom>/<int:x>/<int:y>.json', views.job_tile, name='job_tile'),
     # Recruiter map APIs
     path('map/recruiter/jobs/', views.recruiter_job_markers, name='recruiter_job_markers'),
     path('map/recruiter/set-location/', views.recruiter_set_job_location, name='recruiter_set_job_location'),
     path('map/recruiter/applicants/', views.recruiter_applicants, name='recruiter_applicants'),
+    path('map/recruiter/applicants/<int:zoom>/<int:x>/<int:y>.json', views.applicant_tile, name='applicant_tile'),
 ]
@@ -1,84 +1,129 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from .models import Job, Application, SavedProfile
-from .forms import JobPostForm
+from .forms import JobPostForm, JobSearchFilterForm
+from .search_backends import get_search_backend
+from .pagination import keyset_page, id_list_page, top_k_page, capped_count
+from . import search_cache
+from . import autocomplete
+from . import clusters
+from . import columnar
+from . import streaming
+from . import geo
+from . import geocoding
+from . import geoindex
+from . import tiles
+from . import matching
+from .recommendations import rank_candidates
+from . import scoring
+from . import suggestions
+from .facets import compute_facets
 from accounts.models import Profile
 from django import forms
 from django.http import HttpResponseForbidden
 from django.db.models import Case, When, Value, IntegerField, F, Q
 from django.http import JsonResponse
-from django.core.cache import cache
-try:
-	import requests
-except Exception:
-	requests = None
-import urllib.parse
-import urllib.request
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+from itertools import islice
 import json
 from django.http import HttpResponseForbidden
-from math import radians, cos, sin, asin, sqrt
-import re
 
 
 def search(request):
     """
-    Unified jobs search view: single 'q' parameter filters across title, company, description, and location.
+    Unified jobs search view: single 'q' parameter matched by the configured
+    search backend (title, company, description, location), best match first,
+    optionally narrowed by salary range, visa sponsorship and recency filters.
     Renders the new jobs/find-jobs.html template.
     """
     q = request.GET.get('q', '').strip()
+    cursor = request.GET.get('cursor')
+    filter_form = JobSearchFilterForm(request.GET)
+    filters = filter_form.cache_scope()
 
-    qs = Job.objects.all()
-
+    backend = get_search_backend()
+    ids = None
     if q:
-        # Tokenize by commas and whitespace; require each token to match at least one field.
-        tokens = [t for t in re.split(r'[,\s]+', q) if t]
-        for t in tokens:
-            qs = qs.filter(
-                Q(title__icontains=t) |
-                Q(company__icontains=t) |
-                Q(description__icontains=t) |
-                Q(location__icontains=t)
+        def ranked_ids():
+            ranked = backend.search_jobs(q)
+            if ranked is None or not filters:
+                return ranked
+            # filters run as indexed range scans over the text matches
+            allowed = set(
+                filter_form.filter(backend.filter_jobs(Job.objects.all(), q)).values_list('pk', flat=True)
             )
+            return [pk for pk in ranked if pk in allowed]
+        ids = search_cache.cached_ids('jobs', f'{backend.name}:{filters}', q, ranked_ids)
+    if ids is None:
+        # No text filter: newest first, paged on (posted_at, id)
+        qs = filter_form.filter(Job.objects.all())
+        page = keyset_page(qs, ('-posted_at', '-pk'), cursor)
+        total_count, count_capped = capped_count(qs)
+        jobs = page.object_list
+    else:
+        # Ranked matches: page through the id list, load only this page's rows
+        page = id_list_page(ids, cursor)
+        total_count, count_capped = len(ids), False
+        found = Job.objects.in_bulk(page.object_list)
+        jobs = [found[pk] for pk in page.object_list if pk in found]
+
+    facets = search_cache.cached_value(
+        'jobs', f'facets:{backend.name}:{filters}', search_cache.normalize_tokens(q),
+        lambda: compute_facets(filter_form.filter(backend.filter_jobs(Job.objects.all(), q))),
+    )
 
-    jobs = qs.order_by('-posted_at')
+    # query string for paging links: everything but the cursor
+    params = request.GET.copy()
+    params.pop('cursor', None)
 
     context = {
         'q': q,
         'jobs': jobs,
+        'facets': facets,
+        'filter_form': filter_form,
+        'filters_active': bool(filters),
+        'page_query': params.urlencode(),
+        'page': page,
+        'cursor': cursor,
+        'total_count': total_count,
+        'count_capped': count_capped,
     }
     return render(request, 'jobs/find-jobs.html', context)
 
-def calculate_match_score(job, profile):
+def search_autocomplete(request):
     """
-    Quantitative overlap score (0-100) based on how much a candidate's
-    skills and experience overlap with the job title and description.
+    JSON typeahead for the search boxes: most common job titles, companies,
+    locations and candidate skills starting with 'q'. Served from the
+    in-memory prefix index, never from a LIKE query.
     """
-    import re as _re
-
-    job_text = f"{getattr(job, 'title', '') or ''} {getattr(job, 'description', '') or ''}".lower()
-    cand_text = f"{getattr(profile, 'skills', '') or ''} {getattr(profile, 'experience', '') or ''}".lower()
+    prefix = request.GET.get('q', '')
+    kinds = [k for k in request.GET.get('kinds', '').split(',') if k in autocomplete.KINDS]
+    try:
+        limit = max(1, min(int(request.GET.get('limit', autocomplete.DEFAULT_LIMIT)), autocomplete.MAX_LIMIT))
+    except ValueError:
+        limit = autocomplete.DEFAULT_LIMIT
+    suggestions = autocomplete.index.complete(prefix, kinds or autocomplete.KINDS, limit)
+    return JsonResponse({'q': prefix, 'suggestions': suggestions})
 
-    # Tokenize to alphanumerics and drop common stopwords
-    job_tokens = set(_re.findall(r"[a-z0-9]+", job_text))
-    cand_tokens = set(_re.findall(r"[a-z0-9]+", cand_text))
 
-    stop = {
-        'the','and','a','an','of','to','in','for','with','on','at','by','from','as','is','are','be','this','that',
-        'it','or','we','our','you','your','their','they','he','she','his','her','them','us','i','have','has','had',
-        'will','can','may','must','should','would','could','about','over','under','into','out','up','down','new',
-        'role','job','position','responsibilities','requirements','preferred','experience','years','year'
-    }
-    job_tokens = {t for t in job_tokens if t not in stop}
-    cand_tokens = {t for t in cand_tokens if t not in stop}
+@user_passes_test(lambda u: u.is_staff)
+def search_cache_stats(request):
+    """Staff-only: search result cache hit/miss counters, for tuning SEARCH_CACHE_TIMEOUT."""
+    return JsonResponse(search_cache.stats())
 
-    if not job_tokens or not cand_tokens:
-        return 0
 
-    overlap = len(job_tokens & cand_tokens)
-    # Normalize by job token count to capture how much of the job text is covered by candidate background
-    score = (overlap / len(job_tokens)) * 100.0
-    # Clamp to [0,100]
-    return max(0, min(100, score))
+def calculate_match_score(job, profile, mode=None):
+    """
+    Quantitative overlap score (0-100) based on how much a candidate's
+    skills and experience overlap with the job title and description.
+    Uses the token sets stored on both rows (see jobs.matching); `mode`
+    ('overlap' or 'tfidf', default settings.MATCH_SCORING) picks whether
+    shared tokens count equally or by IDF weight (see jobs.scoring).
+    """
+    return scoring.score(matching.job_tokens(job), matching.profile_tokens(profile), mode)
 
 
 @login_required
@@ -90,32 +135,44 @@ def job_recommendations(request, job_id):
     
     job = get_object_or_404(Job, pk=job_id, owner=request.user)
     
-    # Get all non-recruiter profiles
-    candidates = Profile.objects.filter(
-        is_recruiter=False,
-        user__is_active=True
-    ).select_related('user')
-    
-    # Calculate match scores for ALL candidates and rank them
-    recommendations = []
-    for candidate in candidates:
-        # Skip if candidate already applied
-        if Application.objects.filter(job=job, user=candidate.user).exists():
-            continue
-        
-        score = calculate_match_score(job, candidate)
-        recommendations.append({
+    saved = set(SavedProfile.objects.filter(recruiter=request.user).values_list('saved_user_id', flat=True))
+    cursor = request.GET.get('cursor')
+
+    # Materialized ranking (jobs.recommendations): one indexed query per page
+    stored = job.candidate_scores.filter(
+        profile__is_recruiter=False,
+        profile__user__is_active=True
+    ).exclude(
+        profile__user__in=Application.objects.filter(job=job).values('user_id')
+    ).select_related('profile__user')
+    page = keyset_page(stored, ('-score', 'profile_id'), cursor)
+    if page.object_list or job.candidate_scores.exists():
+        ranked = [(row.profile, row.score) for row in page]
+    else:
+        # Not materialized yet: rank live, selecting only the top candidates this page needs
+        applied = set(Application.objects.filter(job=job).values_list('user_id', flat=True))
+        job_tokens = matching.job_tokens(job)
+        page = top_k_page(lambda k: rank_candidates(job_tokens, k, applied), cursor)
+        profiles = Profile.objects.filter(
+            is_recruiter=False,
+            user__is_active=True
+        ).select_related('user').in_bulk([pk for pk, _ in page])
+        ranked = [(profiles[pk], score) for pk, score in page if pk in profiles]
+
+    recommendations = [
+        {
             'profile': candidate,
             'score': score,
-            'is_saved': SavedProfile.objects.filter(recruiter=request.user, saved_user=candidate.user).exists()
-        })
-    
-    # Sort by score (highest first)
-    recommendations.sort(key=lambda x: x['score'], reverse=True)
-    
+            'is_saved': candidate.user_id in saved,
+        }
+        for candidate, score in ranked
+    ]
+
     return render(request, 'jobs/job_recommendations.html', {
         'job': job,
         'recommendations': recommendations,
+        'page': page,
+        'cursor': cursor,
     })
 
 
@@ -136,27 +193,17 @@ def suggest_jobs(request):
         # recruiters don’t get suggestions
         return redirect("jobs:search")
 
-    skills_str = profile.skills or ""
-    skills = [s.strip() for s in skills_str.split(",") if s.strip()]
+    # Ranked from the in-memory postings index, cached per profile
+    ranked = suggestions.suggest_for_profile(profile)
+    jobs_by_id = Job.objects.in_bulk([pk for pk, _ in ranked])
+    jobs = []
+    for pk, score in ranked:
+        job = jobs_by_id.get(pk)
+        if job is not None:
+            job.match_score = score
+            jobs.append(job)
 
-    if not skills:
-        jobs = Job.objects.none()
-    else:
-        # Build OR query across all skills
-        query = Q()
-        for skill in skills:
-            # break "Software Engineering" into ["Software", "Engineering"]
-            words = skill.split()
-            for word in words:
-                query |= (
-                    Q(title__icontains=word) |
-                    Q(description__icontains=word) |
-                    Q(company__icontains=word)
-                )
-
-        jobs = Job.objects.filter(query).order_by("-posted_at").distinct()
-
-    return render(request, "jobs/suggested_jobs.html", {"jobs": jobs, "skills": skills})
+    return render(request, "jobs/suggested_jobs.html", {"jobs": jobs, "skills": profile.skill_list})
 
 
 class ApplicationForm(forms.ModelForm):
@@ -198,32 +245,12 @@ def apply(request, pk):
 			app.applicant_latitude = form.cleaned_data.get('applicant_latitude')
 			app.applicant_longitude = form.cleaned_data.get('applicant_longitude')
 
-			# If a location string was provided but lat/lon missing, attempt server-side geocode
-			if app.applicant_location and not (app.applicant_latitude and app.applicant_longitude):
-				q = app.applicant_location.strip()
-				cache_key = f"geocode:app:{q}"
-				cached = cache.get(cache_key)
-				if cached:
-					app.applicant_latitude = cached.get('lat')
-					app.applicant_longitude = cached.get('lon')
-				else:
-					# Use Nominatim for server-side geocoding (respect usage policy in production)
-					try:
-						url = 'https://nominatim.openstreetmap.org/search'
-						resp = requests.get(url, params={'format':'json', 'q': q, 'limit': 1}, headers={'User-Agent':'linkedout/1.0'})
-						if resp.status_code == 200:
-							data = resp.json()
-							if data:
-								place = data[0]
-								lat = float(place.get('lat'))
-								lon = float(place.get('lon'))
-								app.applicant_latitude = lat
-								app.applicant_longitude = lon
-								# cache result for 24 hours
-								cache.set(cache_key, {'lat': lat, 'lon': lon}, 60*60*24)
-					except Exception:
-						# fallback: leave coords empty
-						pass
+			# If a location string was provided but lat/lon missing, geocode it
+			# from the local gazetteer (jobs.geocoding)
+			if app.applicant_location and (app.applicant_latitude is None or app.applicant_longitude is None):
+				found = geocoding.geocode(app.applicant_location)
+				if found:
+					app.applicant_latitude, app.applicant_longitude = found
 			app.save()
 			return redirect('jobs:apply_thanks')
 	else:
@@ -419,139 +446,123 @@ def edit_post(request, pk):
 
 
 
-def haversine(lat1, lon1, lat2, lon2):
-    # convert decimal degrees to radians
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    # haversine formula
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    miles = 3956 * c
-    return miles
+# Cap on /map/nearby/ results; `limit` may ask for fewer
+NEARBY_DEFAULT_LIMIT = 500
+NEARBY_MAX_LIMIT = 2000
+
+
+def _map_jobs(filter_form, q):
+	# Jobs with coordinates, narrowed by the map's filters and text query
+	qs = filter_form.filter(Job.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True))
+	if q:
+		qs = qs.filter(Q(title__icontains=q) | Q(company__icontains=q) | Q(description__icontains=q))
+	return qs
 
 
+@gzip_page
 def jobs_nearby(request):
-	# Returns JSON list of jobs within radius miles of given lat/lon params
+	# Returns JSON list of jobs within radius miles of given lat/lon params,
+	# nearest first, or of the k nearest jobs when k is given without a radius.
+	# Distances come from the in-memory KD-tree (jobs.geoindex), or from the
+	# geohash-indexed database query (jobs.geo) without SciPy. The response
+	# streams (jobs.streaming) unless `format` (or the Accept header) selects
+	# a compact columnar encoding (jobs.columnar).
 	try:
 		lat = float(request.GET.get('lat'))
 		lon = float(request.GET.get('lon'))
 	except (TypeError, ValueError):
 		return JsonResponse({'error': 'lat and lon required'}, status=400)
+	if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+		return JsonResponse({'error': 'lat must be within [-90, 90] and lon within [-180, 180]'}, status=400)
+	try:
+		if 'k' in request.GET and 'radius' not in request.GET:
+			radius, limit = None, min(max(1, int(request.GET['k'])), NEARBY_MAX_LIMIT)
+		else:
+			radius = max(0.0, float(request.GET.get('radius', 15)))
+			limit = min(max(1, int(request.GET.get('limit', NEARBY_DEFAULT_LIMIT))), NEARBY_MAX_LIMIT)
+	except ValueError:
+		return JsonResponse({'error': 'radius, limit and k must be numbers'}, status=400)
 
-	radius = float(request.GET.get('radius', 15))
 	q = request.GET.get('q', '').strip()
 
-	jobs = []
-	qs = Job.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
-	if q:
-		qs = qs.filter(Q(title__icontains=q) | Q(company__icontains=q) | Q(description__icontains=q))
-
-	for job in qs:
-		dist = haversine(lon, lat, job.longitude, job.latitude)
-		if dist <= radius:
-			jobs.append({
-				'id': job.pk,
-				'title': job.title,
-				'company': job.company,
-				'location': job.location,
-				'lat': job.latitude,
-				'lon': job.longitude,
-				'distance_miles': round(dist, 2),
-			})
+	qs = _map_jobs(JobSearchFilterForm(request.GET), q).only('pk', 'title', 'company', 'location', 'latitude', 'longitude')
+
+	# one extra row tells whether the limit cut anything off
+	found = geoindex.iter_nearby_jobs(qs, lat, lon, radius, limit + 1)
+
+	def rows():
+		# loaded and rounded a batch at a time while the response streams
+		for batch in streaming.batched(islice(found, limit)):
+			distances = geo.round_miles([dist for dist, _ in batch])
+			for dist, (_, job) in zip(distances, batch):
+				yield {
+					'id': job.pk,
+					'title': job.title,
+					'company': job.company,
+					'location': job.location,
+					'lat': job.latitude,
+					'lon': job.longitude,
+					'distance_miles': dist,
+				}
+
+	return columnar.marker_response(request, 'jobs', rows(), truncated=lambda: next(found, None) is not None)
+
+
+def jobs_clusters(request):
+	# Returns JSON clusters (centroid, count, bbox) of the jobs in a viewport
+	# for a map zoom level, or the jobs themselves at high zoom; computed and
+	# cached per tile (jobs.clusters). Takes bbox ("west,south,east,north"),
+	# zoom, and the same q and filters as /map/nearby/.
+	try:
+		bbox = geo.parse_bbox(request.GET.get('bbox', ''))
+		zoom = int(request.GET.get('zoom', ''))
+	except ValueError:
+		return JsonResponse({'error': 'bbox ("west,south,east,north") and zoom required'}, status=400)
+	if not 0 <= zoom <= clusters.MAX_ZOOM:
+		return JsonResponse({'error': f'zoom must be within [0, {clusters.MAX_ZOOM}]'}, status=400)
 
-	# sort by distance
-	jobs.sort(key=lambda x: x['distance_miles'])
-	return JsonResponse({'jobs': jobs})
+	q = request.GET.get('q', '').strip()
+	filter_form = JobSearchFilterForm(request.GET)
+	try:
+		result = clusters.viewport(_map_jobs(filter_form, q), *bbox, zoom, filter_form.cache_scope(), q)
+	except ValueError:
+		return JsonResponse({'error': 'viewport too large for this zoom level'}, status=400)
+	return JsonResponse(result)
 
 
 def geocode_address(q):
     """
-    Return (lat, lon) for an address string or None if lookup fails.
-    Tries multiple cleaned variants of the address to improve match success.
+    Return (lat, lon) for an address string or None if lookup fails
+    (see jobs.geocoding: the local gazetteer, then the optional fallback).
     """
-    if not q:
-        return None
-
-    headers = {'User-Agent': 'linkedout/1.0'}
-    q = q.strip()
-
-    # Candidate variants
-    candidates = [q]
-
-    # Strip suite/apt/unit markers
-    stripped = re.sub(r'\b(?:suite|ste|apt|unit|#)\.?\s*\w+\b', '', q, flags=re.I).strip()
-    if stripped and stripped != q:
-        candidates.append(stripped)
-
-    # Add ", United States"
-    candidates.append(q + ', United States')
-    if stripped:
-        candidates.append(stripped + ', United States')
-
-    # Use last two comma-separated parts ("City, ST ZIP")
-    parts = [p.strip() for p in q.split(',') if p.strip()]
-    if len(parts) >= 2:
-        tail = ', '.join(parts[-2:])
-        candidates.append(tail)
-        candidates.append(tail + ', United States')
-
-    # Deduplicate while preserving order
-    seen, final_candidates = set(), []
-    for c in candidates:
-        if c and c not in seen:
-            seen.add(c)
-            final_candidates.append(c)
-
-    # Try each candidate
-    for candidate in final_candidates:
-        try:
-            if 'requests' in globals() and requests:
-                resp = requests.get(
-                    'https://nominatim.openstreetmap.org/search',
-                    params={'format': 'json', 'q': candidate, 'limit': 1},
-                    headers=headers, timeout=5
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    if data:
-                        return float(data[0]['lat']), float(data[0]['lon'])
-        except Exception:
-            pass
-
-        try:
-            url = 'https://nominatim.openstreetmap.org/search?format=json&limit=1&q=' + urllib.parse.quote(candidate)
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=5) as r:
-                raw = r.read().decode('utf-8')
-                data = json.loads(raw)
-                if data:
-                    return float(data[0]['lat']), float(data[0]['lon'])
-        except Exception:
-            pass
-
-    return None
+    return geocoding.geocode(q)
 
 
 @login_required
+@gzip_page
 def recruiter_job_markers(request):
-    """Return the logged-in recruiter's own jobs with existing coordinates (if any)."""
+    """
+    Return the logged-in recruiter's own jobs with existing coordinates (if any).
+    Optional GET params: bbox ("west,south,east,north") to only return jobs inside it,
+    format (see jobs.columnar).
+    """
     profile = getattr(request.user, "profile", None)
     if not profile or not profile.is_recruiter:
         return JsonResponse({"error": "Not authorized"}, status=403)
 
     jobs_qs = Job.objects.filter(owner=request.user).order_by("-posted_at")
-    data = [
-        {
-            "id": j.pk,
-            "title": j.title,
-            "company": j.company,
-            "lat": j.latitude,
-            "lon": j.longitude,
-        }
-        for j in jobs_qs
-    ]
-    return JsonResponse({"jobs": data})
+    # Optional viewport, "west,south,east,north": only jobs placed inside it
+    if request.GET.get("bbox"):
+        try:
+            jobs_qs = geo.within_viewport(jobs_qs, *geo.parse_bbox(request.GET["bbox"]))
+        except ValueError:
+            return JsonResponse({"error": "Invalid bbox"}, status=400)
+    rows = jobs_qs.values("pk", "title", "company", "latitude", "longitude").iterator(chunk_size=streaming.CHUNK_SIZE)
+    markers = (
+        {"id": j["pk"], "title": j["title"], "company": j["company"], "lat": j["latitude"], "lon": j["longitude"]}
+        for j in rows
+    )
+    return columnar.marker_response(request, "jobs", markers)
 
 
 @login_required
@@ -606,10 +617,46 @@ def recruiter_set_job_location(request):
     return JsonResponse({"ok": True, "job_id": job.pk, "lat": lat, "lon": lon})
 
 
+# Application columns behind an applicant map marker, for .values()
+APPLICANT_MARKER_FIELDS = (
+    "pk", "user__username", "job_id", "job__title", "job__latitude", "job__longitude",
+    "applicant_latitude", "applicant_longitude", "applicant_location", "status", "submitted_at",
+)
+
+
+def _applicant_markers(rows):
+    """Map marker dicts for Application rows from .values(*APPLICANT_MARKER_FIELDS)."""
+    # applicant-to-job distances, in one vectorized pass (jobs.geo)
+    located = [row for row in rows if row["job__latitude"] is not None and row["job__longitude"] is not None]
+    distances = dict(zip(
+        (row["pk"] for row in located),
+        geo.round_miles(geo.haversine_array(
+            [row["applicant_latitude"] for row in located], [row["applicant_longitude"] for row in located],
+            [row["job__latitude"] for row in located], [row["job__longitude"] for row in located],
+        )),
+    ))
+    return [{
+        "id": row["pk"],
+        "username": row["user__username"],
+        "job_id": row["job_id"],
+        "job_title": row["job__title"],
+        "lat": row["applicant_latitude"],
+        "lon": row["applicant_longitude"],
+        "location": row["applicant_location"] or "",
+        "distance_miles": distances.get(row["pk"]),
+        "status": row["status"],
+        "submitted_at": row["submitted_at"].isoformat(),
+    } for row in rows]
+
+
 @login_required
+@gzip_page
 def recruiter_applicants(request):
     """Return applicants (with coordinates) for jobs owned by the logged-in recruiter.
-    Optional GET param: job_id to filter by a specific job the applicant applied to.
+    Optional GET params: job_id to filter by a specific job the applicant applied to,
+    bbox ("west,south,east,north") to only return applicants inside it.
+    Each applicant carries distance_miles to the job (null when the job has no coordinates).
+    format selects a compact columnar encoding (see jobs.columnar).
     """
     profile = getattr(request.user, "profile", None)
     if not profile or not profile.is_recruiter:
@@ -617,8 +664,7 @@ def recruiter_applicants(request):
 
     job_id = request.GET.get("job_id")
     qs = (
-        Application.objects.select_related("job", "user")
-        .filter(job__owner=request.user)
+        Application.objects.filter(job__owner=request.user)
         .exclude(applicant_latitude__isnull=True)
         .exclude(applicant_longitude__isnull=True)
     )
@@ -627,19 +673,96 @@ def recruiter_applicants(request):
             qs = qs.filter(job__pk=int(job_id))
         except (TypeError, ValueError):
             return JsonResponse({"error": "Invalid job_id"}, status=400)
+    # Optional viewport, "west,south,east,north"
+    if request.GET.get("bbox"):
+        try:
+            qs = geo.within_viewport(
+                qs, *geo.parse_bbox(request.GET["bbox"]),
+                hash_field="applicant_geohash", lat_field="applicant_latitude", lon_field="applicant_longitude",
+            )
+        except ValueError:
+            return JsonResponse({"error": "Invalid bbox"}, status=400)
 
-    apps = []
-    for app in qs:
-        apps.append({
-            "id": app.pk,
-            "username": app.user.username,
-            "job_id": app.job_id,
-            "job_title": app.job.title,
-            "lat": app.applicant_latitude,
-            "lon": app.applicant_longitude,
-            "location": app.applicant_location or "",
-            "status": app.status,
-            "submitted_at": app.submitted_at.isoformat(),
-        })
+    # streamed a chunk at a time, in constant memory
+    rows = qs.values(*APPLICANT_MARKER_FIELDS).iterator(chunk_size=streaming.CHUNK_SIZE)
+    markers = (marker for batch in streaming.batched(rows) for marker in _applicant_markers(batch))
+    return columnar.marker_response(request, "applications", markers)
+
+
+# Cap on applicants per map tile
+APPLICANT_TILE_LIMIT = 500
+
+
+def _job_tile_query(request):
+    """(filter form, q) of a job tile request. posted_within is left out: its
+    results move with the clock, which the tile's version does not follow.
+    """
+    params = request.GET.copy()
+    params.pop("posted_within", None)
+    return JobSearchFilterForm(params), request.GET.get("q", "").strip()
+
+
+def _job_tile_etag(request, zoom, x, y):
+    if not tiles.is_tile(zoom, x, y):
+        return None
+    filter_form, q = _job_tile_query(request)
+    return tiles.etag("jobs", zoom, x, y, clusters.scope(filter_form.cache_scope(), q))
+
+
+@condition(etag_func=_job_tile_etag)
+def job_tile(request, zoom, x, y):
+    """Job markers of one map tile (z/x/y): clusters below clusters.MAX_CLUSTER_ZOOM, jobs from there on.
+    Takes the same q and filters as /map/nearby/ (but posted_within). Carries an ETag from the
+    tile's change version (jobs.tiles), so repeat views revalidate without touching the database.
+    """
+    if not tiles.is_tile(zoom, x, y):
+        return JsonResponse({"error": "No such tile"}, status=404)
+    filter_form, q = _job_tile_query(request)
+    tile = clusters.cached_tile(_map_jobs(filter_form, q), zoom, x, y, filter_form.cache_scope(), q)
+    response = JsonResponse(tile)
+    patch_cache_control(response, public=True, max_age=settings.MAP_TILE_MAX_AGE)
+    return response
+
+
+def _applicant_tile_etag(request, zoom, x, y):
+    profile = getattr(request.user, "profile", None)
+    if not tiles.is_tile(zoom, x, y) or not profile or not profile.is_recruiter:
+        return None
+    return tiles.etag("applicants", zoom, x, y, f"{request.user.pk}:{request.GET.get('job_id', '')}")
+
+
+@login_required
+@condition(etag_func=_applicant_tile_etag)
+def applicant_tile(request, zoom, x, y):
+    """Applicant markers of one map tile (z/x/y) for the logged-in recruiter's jobs,
+    as recruiter_applicants returns them; optional job_id. ETag as for job_tile.
+    """
+    profile = getattr(request.user, "profile", None)
+    if not profile or not profile.is_recruiter:
+        return JsonResponse({"error": "Not authorized"}, status=403)
+    if not tiles.is_tile(zoom, x, y):
+        return JsonResponse({"error": "No such tile"}, status=404)
+
+    qs = Application.objects.filter(job__owner=request.user)
+    job_id = request.GET.get("job_id", "")
+    if job_id:
+        try:
+            qs = qs.filter(job__pk=int(job_id))
+        except ValueError:
+            return JsonResponse({"error": "Invalid job_id"}, status=400)
+    qs = tiles.in_tile(
+        qs, zoom, x, y,
+        hash_field="applicant_geohash", lat_field="applicant_latitude", lon_field="applicant_longitude",
+    )
+
+    def compute():
+        applications = list(qs.order_by("pk").values(*APPLICANT_MARKER_FIELDS)[:APPLICANT_TILE_LIMIT + 1])
+        return {
+            "applications": _applicant_markers(applications[:APPLICANT_TILE_LIMIT]),
+            "truncated": len(applications) > APPLICANT_TILE_LIMIT,
+        }
 
-    return JsonResponse({"applications": apps})
+    tile = tiles.cached("applicants", zoom, x, y, f"{request.user.pk}:{job_id}", compute)
+    response = JsonResponse(tile)
+    patch_cache_control(response, private=True, max_age=settings.MAP_TILE_MAX_AGE)
+    return response
@@ -1,136 +1,86 @@
 from django.contrib import admin
-from django.http import HttpResponse
 from django.urls import path
-import csv
+from django.views.decorators.gzip import gzip_page
 from accounts.models import Profile
 from django.contrib.auth.models import User
+from jobs import streaming
 from jobs.models import Job, Application
 
 
-def export_accounts_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="accounts.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Username', 'Email', 'First Name', 'Last Name', 'Headline', 'Bio', 'Skills', 'Experience', 'Education', 'Location', 'Company', 'Is Recruiter'])
-
-    for profile in Profile.objects.select_related('user'):
-        writer.writerow([
-            profile.user.username,
-            profile.user.email,
-            profile.user.first_name,
-            profile.user.last_name,
-            profile.headline,
-            profile.bio,
-            profile.skills,
-            profile.experience,
-            profile.education,
-            profile.location,
-            profile.company,
-            profile.is_recruiter,
-        ])
-
-    return response
-
+# Exports are streamed (jobs.streaming): rows are read CHUNK_SIZE at a time
+# from .values() projections and written out as they come, gzipped on the fly
+# for clients that accept it.
 
+@gzip_page
+def export_accounts_csv(request):
+    rows = Profile.objects.values_list(
+        'user__username', 'user__email', 'user__first_name', 'user__last_name', 'headline', 'bio',
+        'skills', 'experience', 'education', 'location', 'company', 'is_recruiter',
+    ).order_by('pk').iterator(chunk_size=streaming.CHUNK_SIZE)
+    return streaming.csv_response(
+        'accounts.csv',
+        ['Username', 'Email', 'First Name', 'Last Name', 'Headline', 'Bio', 'Skills', 'Experience', 'Education', 'Location', 'Company', 'Is Recruiter'],
+        rows,
+    )
+
+
+@gzip_page
 def export_auth_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="auth.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Username', 'Email', 'First Name', 'Last Name', 'Is Staff', 'Is Superuser', 'Date Joined', 'Last Login'])
-
-    for user in User.objects.all():
-        writer.writerow([
-            user.username,
-            user.email,
-            user.first_name,
-            user.last_name,
-            user.is_staff,
-            user.is_superuser,
-            user.date_joined,
-            user.last_login,
-        ])
-
-    return response
-
-
+    rows = User.objects.values_list(
+        'username', 'email', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'date_joined', 'last_login',
+    ).order_by('pk').iterator(chunk_size=streaming.CHUNK_SIZE)
+    return streaming.csv_response(
+        'auth.csv',
+        ['Username', 'Email', 'First Name', 'Last Name', 'Is Staff', 'Is Superuser', 'Date Joined', 'Last Login'],
+        rows,
+    )
+
+
+def _job_rows():
+    rows = Job.objects.values_list(
+        'title', 'company', 'location', 'description', 'posted_at', 'salary_min', 'salary_max',
+        'visa_sponsorship', 'owner__username',
+    ).order_by('pk').iterator(chunk_size=streaming.CHUNK_SIZE)
+    for *fields, owner in rows:
+        yield [*fields, owner or '']
+
+
+@gzip_page
 def export_jobs_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="jobs.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Title', 'Company', 'Location', 'Description', 'Posted At', 'Salary Min', 'Salary Max', 'Visa Sponsorship', 'Owner'])
+    return streaming.csv_response(
+        'jobs.csv',
+        ['Title', 'Company', 'Location', 'Description', 'Posted At', 'Salary Min', 'Salary Max', 'Visa Sponsorship', 'Owner'],
+        _job_rows(),
+    )
 
-    for job in Job.objects.select_related('owner'):
-        writer.writerow([
-            job.title,
-            job.company,
-            job.location,
-            job.description,
-            job.posted_at,
-            job.salary_min,
-            job.salary_max,
-            job.visa_sponsorship,
-            job.owner.username if job.owner else '',
-        ])
-
-    return response
-
-
-def export_all_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="all_data.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Type', 'Username', 'Email', 'Title', 'Company', 'Location', 'Description', 'Posted At', 'Status', 'Submitted At'])
 
+def _all_rows():
     # Export users
-    for profile in Profile.objects.select_related('user'):
-        writer.writerow([
-            'User',
-            profile.user.username,
-            profile.user.email,
-            profile.headline,
-            profile.company,
-            profile.location,
-            profile.bio,
-            '',
-            '',
-            '',
-        ])
+    for username, email, headline, company, location, bio in Profile.objects.values_list(
+        'user__username', 'user__email', 'headline', 'company', 'location', 'bio',
+    ).order_by('pk').iterator(chunk_size=streaming.CHUNK_SIZE):
+        yield ['User', username, email, headline, company, location, bio, '', '', '']
 
     # Export jobs
-    for job in Job.objects.select_related('owner'):
-        writer.writerow([
-            'Job',
-            job.owner.username if job.owner else '',
-            '',
-            job.title,
-            job.company,
-            job.location,
-            job.description,
-            job.posted_at,
-            '',
-            '',
-        ])
+    for owner, title, company, location, description, posted_at in Job.objects.values_list(
+        'owner__username', 'title', 'company', 'location', 'description', 'posted_at',
+    ).order_by('pk').iterator(chunk_size=streaming.CHUNK_SIZE):
+        yield ['Job', owner or '', '', title, company, location, description, posted_at, '', '']
 
     # Export applications
-    for app in Application.objects.select_related('job', 'user'):
-        writer.writerow([
-            'Application',
-            app.user.username,
-            '',
-            app.job.title,
-            app.job.company,
-            app.applicant_location,
-            app.cover_letter_text,
-            '',
-            app.status,
-            app.submitted_at,
-        ])
-
-    return response
+    for username, title, company, location, cover_letter, status, submitted_at in Application.objects.values_list(
+        'user__username', 'job__title', 'job__company', 'applicant_location', 'cover_letter_text', 'status', 'submitted_at',
+    ).order_by('pk').iterator(chunk_size=streaming.CHUNK_SIZE):
+        yield ['Application', username, '', title, company, location, cover_letter, '', status, submitted_at]
+
+
+@gzip_page
+def export_all_csv(request):
+    return streaming.csv_response(
+        'all_data.csv',
+        ['Type', 'Username', 'Email', 'Title', 'Company', 'Location', 'Description', 'Posted At', 'Status', 'Submitted At'],
+        _all_rows(),
+    )
 
 
 class LinkedOutAdminSite(admin.AdminSite):
@@ -87,6 +87,26 @@ DATABASES = {
 }
 
 
+# Cache
+# The search cache (jobs/search_cache.py) and the map tile versions
+# (jobs/tiles.py) keep their version counters here, and every worker process
+# must see the same ones: a save handled by one worker has to invalidate the
+# results and tile ETags served by all of them. Local memory is per process,
+# which only suits a single-process server such as runserver. Deployments
+# with several workers must point CACHE_BACKEND / CACHE_LOCATION at a shared
+# cache, e.g. django.core.cache.backends.redis.RedisCache with
+# redis://127.0.0.1:6379/1, django.core.cache.backends.memcached.PyMemcacheCache
+# with 127.0.0.1:11211, or django.core.cache.backends.db.DatabaseCache with a
+# table created by `manage.py createcachetable`. A process-local cache fails
+# `manage.py check --deploy` (jobs.E001).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -149,6 +169,62 @@ SERVER_EMAIL = os.getenv('SERVER_EMAIL', DEFAULT_FROM_EMAIL)
 if not EMAIL_HOST or not EMAIL_HOST_USER:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Full-text search backend used by job/candidate search and the admin
+# (see jobs/search_backends.py). Options: InvertedIndexBackend, FTS5Backend,
+# IcontainsBackend.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'jobs.search_backends.InvertedIndexBackend')
+
+# Seconds a cached search result (list of matching ids) is kept. Entries are
+# invalidated early by version bumps whenever jobs or profiles change.
+SEARCH_CACHE_TIMEOUT = int(os.getenv('SEARCH_CACHE_TIMEOUT', '300'))
+
+# Seconds between full rebuilds of each process's in-memory autocomplete
+# index (picks up edits saved by other worker processes).
+AUTOCOMPLETE_REBUILD_INTERVAL = int(os.getenv('AUTOCOMPLETE_REBUILD_INTERVAL', '600'))
+
+# Seconds between rebuilds of each process's candidate scoring matrix used by
+# job recommendations (see jobs/scoring.py).
+SCORING_REBUILD_INTERVAL = int(os.getenv('SCORING_REBUILD_INTERVAL', '600'))
+
+# Job/candidate match score: 'overlap' (every shared token counts the same)
+# or 'tfidf' (shared tokens weighted by rarity; see jobs/idf.py).
+MATCH_SCORING = os.getenv('MATCH_SCORING', 'overlap')
+
+# Seconds between reloads of each process's document-frequency snapshot used
+# by 'tfidf' scoring.
+MATCH_IDF_SNAPSHOT_INTERVAL = int(os.getenv('MATCH_IDF_SNAPSHOT_INTERVAL', '300'))
+
+# Number of top candidates stored per job for the recommendations page
+# (see jobs/recommendations.py).
+RECOMMENDATION_STORE_SIZE = int(os.getenv('RECOMMENDATION_STORE_SIZE', '500'))
+
+# How recommendations find candidates for a job: 'exact' scores every
+# candidate; 'lsh' scores only a MinHash/LSH shortlist of LSH_SHORTLIST_SIZE
+# profiles (see jobs/lsh.py; `manage.py evaluate_lsh` reports its recall).
+RECOMMENDATION_RETRIEVAL = os.getenv('RECOMMENDATION_RETRIEVAL', 'exact')
+LSH_SHORTLIST_SIZE = int(os.getenv('LSH_SHORTLIST_SIZE', '2000'))
+
+# Seconds between rebuilds of each process's in-memory KD-tree of job
+# coordinates used by the map (see jobs/geoindex.py).
+GEO_INDEX_REBUILD_INTERVAL = int(os.getenv('GEO_INDEX_REBUILD_INTERVAL', '600'))
+
+# Seconds browsers and proxies may reuse a map tile (z/x/y marker JSON)
+# before revalidating it; revalidation is answered from the tile's change
+# version without a database query (see jobs/tiles.py).
+MAP_TILE_MAX_AGE = int(os.getenv('MAP_TILE_MAX_AGE', '60'))
+
+# Geocoding of locations submitted without coordinates (see jobs/geocoding.py).
+# GEOCODER_GAZETTEER is the gazetteer file (empty: the small bundled one;
+# `manage.py build_gazetteer` writes a full one). GEOCODER_FALLBACK is a
+# dotted path to an opt-in geocoder for inputs the gazetteer cannot
+# resolve, e.g. 'jobs.geocoding.NominatimGeocoder'. It is called while the
+# request waits, so it is off by default (empty): deployments should point
+# GEOCODER_GAZETTEER at a full gazetteer rather than rely on it.
+# GEOCODER_TIMEOUT bounds its calls, in seconds.
+GEOCODER_GAZETTEER = os.getenv('GEOCODER_GAZETTEER', '')
+GEOCODER_FALLBACK = os.getenv('GEOCODER_FALLBACK', '')
+GEOCODER_TIMEOUT = float(os.getenv('GEOCODER_TIMEOUT', '3'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 